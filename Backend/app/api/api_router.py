@@ -1,6 +1,6 @@
 from fastapi import APIRouter
 
-from app.api.endpoints import auth, users, projects, tasks
+from app.api.endpoints import auth, users, projects, tasks, comments, sync
 
 api_router = APIRouter()
 
@@ -12,4 +12,10 @@ api_router.include_router(users.router, prefix="/users", tags=["Users"])
 api_router.include_router(projects.router, prefix="/projects", tags=["Projects"])
 
 
-api_router.include_router(tasks.router, prefix="/projects/{project_id}/tasks", tags=["Tasks"])
\ No newline at end of file
+api_router.include_router(tasks.router, prefix="/projects/{project_id}/tasks", tags=["Tasks"])
+
+api_router.include_router(tasks.batch_router, prefix="/projects", tags=["Tasks"])
+
+api_router.include_router(comments.router, prefix="/projects/{project_id}/comments", tags=["Comments"])
+
+api_router.include_router(sync.router, prefix="/sync", tags=["Sync"])
\ No newline at end of file
@@ -2,9 +2,11 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.core.config import settings
-from app.db.database import get_session
+from app.core.principals import principal_cache
+from app.db.database import get_async_session, get_session
 from app.models.user_models import User
 from app.schemas.token_schemas import TokenData
 from app.crud import crud_user
@@ -23,27 +25,62 @@ def get_current_user(
     This function is a security dependency. It performs the following steps:
     1. Extracts the JWT token from the request's Authorization header.
     2. Decodes the token using the application's secret key.
-    3. Validates the token's payload to extract the user's email.
-    4. Fetches the user from the database using the email.
+    3. Validates the token's payload to extract the user's email and id.
+    4. Resolves the user by id through the principal cache, falling back to an
+       email lookup for tokens issued before the `uid` claim existed.
     5. Returns the user object if valid, otherwise raises an HTTP 401 exception.
     """
-    credentials_exception = HTTPException(
+    token_data = _decode_token(token)
+    if token_data.user_id is not None:
+        user = principal_cache.get_user(db, user_id=token_data.user_id)
+    else:
+        user = crud_user.get_user_by_email(db, email=token_data.email)
+    if user is None:
+        raise _credentials_exception()
+    return user
+
+
+async def get_current_user_async(
+        db: AsyncSession = Depends(get_async_session), token: str = Depends(oauth2_scheme)
+) -> User:
+    """
+    Async counterpart of `get_current_user`, for `async def` endpoints, so
+    resolving the user doesn't hold a worker thread and a connection of the
+    sync pool for the request.
+    """
+    token_data = _decode_token(token)
+    if token_data.user_id is not None:
+        user = await principal_cache.get_user_async(db, user_id=token_data.user_id)
+    else:
+        user = await crud_user.get_user_by_email_async(db, email=token_data.email)
+    if user is None:
+        raise _credentials_exception()
+    return user
+
+
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+
+def _decode_token(token: str) -> TokenData:
+    """Validates the token and reads its claims; raises an HTTP 401 exception if it isn't valid."""
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
-            raise credentials_exception
-        token_data = TokenData(email=email)
     except JWTError:
-        raise credentials_exception
+        raise _credentials_exception()
+    email: str = payload.get("sub")
+    if email is None:
+        raise _credentials_exception()
+    return TokenData(email=email, user_id=payload.get("uid"))
 
-    user = crud_user.get_user_by_email(db, email=token_data.email)
-    if user is None:
-        raise credentials_exception
+
+def _ensure_active(user: User) -> User:
+    if not user.is_active:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Inactive user")
     return user
 
 
@@ -56,6 +93,9 @@ def get_current_active_user(current_user: User = Depends(get_current_user)) -> U
     `is_active` flag is true. This is useful for deactivating or banning users
     without permanently deleting their data.
     """
-    if not current_user.is_active:
-        raise HTTPException(status_code=400, detail="Inactive user")
-    return current_user
+    return _ensure_active(current_user)
+
+
+async def get_current_active_user_async(current_user: User = Depends(get_current_user_async)) -> User:
+    """Async counterpart of `get_current_active_user`."""
+    return _ensure_active(current_user)
@@ -1,32 +1,45 @@
 from fastapi import APIRouter, HTTPException,status,Depends
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.core import security
-from app.core.security import verify_password
+from app.core.security import password_hasher
 from app.crud import crud_user
-from app.db.database import get_session
+from app.db.database import get_async_session
 from app.schemas.token_schemas import Token
 from app.schemas.user_schemas import UserRead, UserCreate
 
 router=APIRouter()
 
+# Password hashing is offloaded to `password_hasher`'s process pool; when it is
+# saturated these endpoints answer 503 with Retry-After (see main.py).
+
 @router.post("/register", response_model=UserRead,status_code=status.HTTP_201_CREATED)
-def register_user(user_in:UserCreate,db:Session=Depends(get_session)):
-    db_user=crud_user.get_user_by_email(db,email=user_in.email)
+async def register_user(user_in:UserCreate,db:AsyncSession=Depends(get_async_session)):
+    db_user=await crud_user.get_user_by_email_async(db,email=user_in.email)
     if db_user:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,detail="Email already registered")
-    return crud_user.create_user(db,user_in=user_in)
+    # End the read transaction so no pooled connection is held while bcrypt runs
+    await db.commit()
+    return await crud_user.create_user_async(db,user_in=user_in)
 
 
 @router.post("/login", response_model=Token)
-def login_for_access_token(db:Session=Depends(get_session),form_data: OAuth2PasswordRequestForm = Depends()):
-    user=crud_user.get_user_by_email(db,email=form_data.username)
-    if not user or not verify_password(form_data.password, user.hashed_password):
+async def login_for_access_token(db:AsyncSession=Depends(get_async_session),form_data: OAuth2PasswordRequestForm = Depends()):
+    user=await crud_user.get_user_by_email_async(db,email=form_data.username)
+    verified, new_hash = False, None
+    # End the read transaction so no pooled connection is held while bcrypt runs
+    await db.commit()
+    if user:
+        verified, new_hash = await password_hasher.verify_and_update(form_data.password, user.hashed_password)
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    access_token = security.create_access_token(subject=user.email)
+    if new_hash:
+        # The stored hash used an outdated cost factor
+        await crud_user.update_password_hash_async(db, db_user=user, hashed_password=new_hash)
+    access_token = security.create_access_token(subject=user.email, user_id=user.id)
     return {"access_token": access_token, "token_type": "bearer"}
\ No newline at end of file
@@ -0,0 +1,69 @@
+from datetime import datetime
+from typing import List
+
+from fastapi import APIRouter, status, Depends, HTTPException, Query, Response
+from sqlmodel import Session
+
+from app.api.dependencies import get_current_active_user
+from app.core.access import project_access
+from app.core.pagination import decode_cursor, encode_cursor
+from app.crud import crud_comment, crud_project
+from app.db.database import get_session
+from app.models.user_models import User
+from app.schemas.comment_schemas import CommentCreate, CommentRead
+
+router = APIRouter()
+
+
+def _check_project_member(db: Session, *, project_id: int, user_id: int) -> None:
+    if crud_project.get_project_version(db=db, project_id=project_id) is None:
+        raise HTTPException(status_code=404, detail="Project not found")
+    if not project_access.is_member(db, user_id=user_id, project_id=project_id):
+        raise HTTPException(
+            status_code=403, detail="Not authorized to access comments in this project"
+        )
+
+
+@router.post("/", response_model=CommentRead, status_code=status.HTTP_201_CREATED)
+def create_comment(*,db: Session = Depends(get_session),project_id: int,comment_in: CommentCreate,current_user: User = Depends(get_current_active_user)):
+    _check_project_member(db, project_id=project_id, user_id=current_user.id)
+    return crud_comment.create_comment(
+        db=db, comment_in=comment_in, project_id=project_id, author_id=current_user.id
+    )
+
+
+@router.get("/", response_model=List[CommentRead])
+def get_project_comments(
+        *,
+        db: Session = Depends(get_session),
+        response: Response,
+        project_id: int,
+        cursor: str | None = None,
+        limit: int = Query(default=50, ge=1, le=200),
+        current_user: User = Depends(get_current_active_user),
+):
+    """
+    Lists a page of the project's comments, newest first.
+
+    When older comments are available, the opaque cursor for the next page is
+    returned in the `X-Next-Cursor` response header.
+    """
+    _check_project_member(db, project_id=project_id, user_id=current_user.id)
+    before = None
+    if cursor:
+        try:
+            position = decode_cursor(cursor)
+            before = (datetime.fromisoformat(position["created_at"]), int(position["id"]))
+        except (ValueError, KeyError, TypeError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    comments = crud_comment.get_comments_by_project(
+        db=db, project_id=project_id, before=before, limit=limit + 1
+    )
+    if len(comments) > limit:
+        comments = comments[:limit]
+        last = comments[-1]
+        response.headers["X-Next-Cursor"] = encode_cursor(
+            {"created_at": last.created_at.isoformat(), "id": last.id}
+        )
+    return comments
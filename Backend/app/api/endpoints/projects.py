@@ -1,44 +1,199 @@
+import asyncio
+import json
 from typing import List
 
-from fastapi import APIRouter,Depends,status,HTTPException
+import orjson
+
+from fastapi import APIRouter,Depends,status,HTTPException,Request,Response,Query
+from fastapi.responses import StreamingResponse
 from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.api.dependencies import get_current_active_user
-from app.crud import crud_project
-from app.db.database import get_session
+from app.api.dependencies import get_current_active_user, get_current_active_user_async
+from app.core.access import project_access
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.events import Subscription, change_hub
+from app.core.serialization import json_rows_response, parse_fields
+from app.crud import crud_project, crud_stats
+from app.db.database import get_session, get_async_session, get_async_read_session
+from app.db.unit_of_work import run_write
 from app.models.project_models import Project
 from app.models.user_models import User, ProjectMemberLink
-from app.schemas.project_schemas import ProjectRead, ProjectCreate, ProjectDetail, ProjectUpdate
+from app.schemas.project_schemas import ProjectRead, ProjectCreate, ProjectDetail, ProjectUpdate, ProjectStats
 from app.schemas.user_schemas import UserPublic
 
 router = APIRouter()
 
+# Serialized ProjectDetail bodies keyed by (project_id, version, task version,
+# fields). A version is never reused, so entries can't go stale; the TTL only bounds memory.
+project_detail_cache = TTLCache(
+    maxsize=settings.PROJECT_DETAIL_CACHE_SIZE, ttl=settings.PROJECT_DETAIL_CACHE_TTL_SECONDS
+)
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates
+
 @router.post("/",response_model=ProjectRead, status_code=status.HTTP_201_CREATED)
-async def create_project(*,project_in: ProjectCreate,db:Session=Depends(get_session),current_user:User=Depends(get_current_active_user)):
-        project=crud_project.create_project_with_owner(db=db,project_in=project_in,owner_id=current_user.id)
+async def create_project(*,project_in: ProjectCreate,db:AsyncSession=Depends(get_async_session),current_user:User=Depends(get_current_active_user_async)):
+        project=await crud_project.create_project_with_owner_async(db=db,project_in=project_in,owner_id=current_user.id)
         return project
 
 
 @router.get("/",response_model=List[ProjectRead])
-async def get_projects(*,db:Session=Depends(get_session),current_user:User=Depends(get_current_active_user)):
-
-    return current_user.projects
+async def get_projects(*,db:AsyncSession=Depends(get_async_read_session),current_user:User=Depends(get_current_active_user_async)):
+    rows = await crud_project.get_project_rows_by_user_async(db=db,user_id=current_user.id)
+    return json_rows_response(rows)
 
 
 @router.get("/{project_id}",response_model=ProjectDetail)
-def get_project_details(*,db:Session=Depends(get_session),project_id=int,current_user:User=Depends(get_current_active_user)):
-    project=crud_project.get_project_by_id(db=db,project_id=project_id)
-    if not project:
+def get_project_details(
+        *,
+        db:Session=Depends(get_session),
+        request:Request,
+        project_id:int,
+        fields:str|None=Query(default=None, description="Comma-separated ProjectDetail fields to return; `tasks.<field>` and `members.<field>` narrow those lists"),
+        current_user:User=Depends(get_current_active_user),
+):
+    """
+    Returns the project with its members and tasks.
+
+    `fields` trims the response, e.g. `name,tasks.id,tasks.title,tasks.status`
+    for a board; only the named columns are read, and members or tasks not
+    asked for aren't queried at all.
+
+    The response carries an ETag derived from the project's version, which
+    every project and member write advances, and its task version, which
+    every task write advances. A matching If-None-Match gets a 304 after
+    reading just those, and unchanged projects are served from a cache of
+    serialized bodies instead of being rebuilt.
+    """
+    version=crud_project.get_project_version(db=db,project_id=project_id)
+    if version is None:
         raise HTTPException(status_code=404,detail="Project not found")
 
-    if current_user not in project.members:
+    if not project_access.is_member(db, user_id=current_user.id, project_id=project_id):
         raise HTTPException(
             status_code=403, detail="Not authorized to access this project"
         )
+    try:
+        projection = parse_fields(fields, ProjectDetail)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=f"Unknown field: {exc}")
+    projection_key = None if projection is None else tuple(projection.items())
 
-    return project
+    # Read before the tasks, so a body is never older than the version it is cached under
+    task_version = crud_project.get_task_version(db=db, project_id=project_id)
+    etag = f'"{project_id}-{version}-{task_version}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    body = project_detail_cache.get((project_id, version, task_version, projection_key))
+    if body is None:
+        if projection is None:
+            project = crud_project.get_project_detail(db=db, project_id=project_id)
+            if not project:
+                raise HTTPException(status_code=404, detail="Project not found")
+            loaded_version = project.version
+            body = ProjectDetail.model_validate(project).model_dump_json().encode()
+        else:
+            detail = crud_project.get_project_detail_rows(db=db, project_id=project_id, fields=projection)
+            if not detail:
+                raise HTTPException(status_code=404, detail="Project not found")
+            loaded_version = detail.pop("version")
+            body = orjson.dumps(detail)
+        # Key by the version that was actually loaded, which may be newer
+        etag = f'"{project_id}-{loaded_version}-{task_version}"'
+        headers["ETag"] = etag
+        project_detail_cache.set((project_id, loaded_version, task_version, projection_key), body)
+
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+
+@router.get("/{project_id}/stats", response_model=ProjectStats)
+def get_project_stats(*,db:Session=Depends(get_session),project_id:int,current_user:User=Depends(get_current_active_user)):
+    """
+    Task counts by status and by assignee, and the number of overdue tasks.
+
+    Served from counters kept up to date by every task write, so the cost
+    doesn't depend on the number of tasks in the project.
+    """
+    if crud_project.get_project_version(db=db, project_id=project_id) is None:
+        raise HTTPException(status_code=404, detail="Project not found")
+    if not project_access.is_member(db, user_id=current_user.id, project_id=project_id):
+        raise HTTPException(
+            status_code=403, detail="Not authorized to access this project"
+        )
+    return crud_stats.get_project_stats(db, project_id=project_id)
+
+def _sse_frame(event) -> bytes:
+    return f"id: {event.id}\nevent: {event.kind}\ndata: {json.dumps(event.data)}\n\n".encode()
+
+
+async def _event_stream(*, project_id: int, user_id: int, last_event_id: int | None):
+    subscription: Subscription = change_hub.subscribe(
+        project_id=project_id, user_id=user_id, last_event_id=last_event_id
+    )
+    events = aiter(subscription)
+    try:
+        # Tells EventSource how long to wait before reconnecting
+        yield b"retry: 2000\n\n"
+        while True:
+            try:
+                event = await asyncio.wait_for(anext(events), timeout=settings.EVENT_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield b": keep-alive\n\n"
+                continue
+            except StopAsyncIteration:
+                return
+            yield _sse_frame(event)
+    finally:
+        subscription.close()
 
 
+@router.get("/{project_id}/events", response_class=StreamingResponse)
+def stream_project_events(
+        *,
+        db:Session=Depends(get_session),
+        request:Request,
+        project_id:int,
+        last_event_id:int|None=Query(default=None, description="Resume after this event id; the Last-Event-ID header also works"),
+        current_user:User=Depends(get_current_active_user),
+):
+    """
+    Server-Sent Events stream of the project's changes.
+
+    Events are `task.created`, `task.updated` (the task as data),
+    `task.deleted`, `task.archived`, `task.reminder` (ahead of an open
+    task's due date), `project.updated`, `member.added` and `member.removed`.
+    Membership is checked once here; the stream ends when the subscriber's
+    membership is removed, or when it falls too far behind, in which case the
+    client reconnects with the last id it received. A `reset` event means the
+    missed events are gone and the project should be refetched.
+    """
+    if crud_project.get_project_version(db=db, project_id=project_id) is None:
+        raise HTTPException(status_code=404, detail="Project not found")
+    if not project_access.is_member(db, user_id=current_user.id, project_id=project_id):
+        raise HTTPException(
+            status_code=403, detail="Not authorized to access this project"
+        )
+    # Don't hold a pooled connection for the lifetime of the stream
+    db.close()
+
+    header = request.headers.get("last-event-id")
+    if last_event_id is None and header and header.isdigit():
+        last_event_id = int(header)
+    return StreamingResponse(
+        _event_stream(project_id=project_id, user_id=current_user.id, last_event_id=last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 @router.put("/{project_id}", response_model=ProjectRead)
 def update_project(*,db: Session = Depends(get_session),project_id: int,project_in: ProjectUpdate,current_user: User = Depends(get_current_active_user),):
@@ -50,9 +205,9 @@ def update_project(*,db: Session = Depends(get_session),project_id: int,project_
             status_code=403, detail="Only the project owner can update it"
         )
 
-    project = crud_project.update_project(
-        db=db, db_project=project, project_in=project_in
-    )
+    project = run_write(db, lambda session: crud_project.update_project(
+        db=session, db_project=project, project_in=project_in
+    ))
     return project
 
 @router.post("/{project_id}/members",response_model=UserPublic,status_code=status.HTTP_201_CREATED)
@@ -69,10 +224,40 @@ def add_project_member(*,db: Session = Depends(get_session),project_id: int,user
     if not user_to_add:
         raise HTTPException(status_code=404, detail="User to add not found")
 
-    if user_to_add in project.members:
+    if project_access.is_member(db, user_id=user_to_add.id, project_id=project.id):
+        raise HTTPException(
+            status_code=409, detail="User is already a member of this project"
+        )
+
+    # Serialized before the write, whose commit would expire `user_to_add`
+    member = UserPublic.model_validate(user_to_add)
+    added = run_write(db, lambda session: crud_project.add_member_to_project(db=session, project=project, user=user_to_add))
+    if not added:
+        # Added by a concurrent request since the check above
         raise HTTPException(
             status_code=409, detail="User is already a member of this project"
         )
+    return member
 
-    crud_project.add_member_to_project(db=db, project=project, user=user_to_add)
-    return user_to_add
\ No newline at end of file
+@router.delete("/{project_id}/members/{user_id}",status_code=status.HTTP_204_NO_CONTENT)
+def remove_project_member(*,db: Session = Depends(get_session),project_id: int,user_id: int,current_user: User = Depends(get_current_active_user),):
+    """Removes a member from the project; their tasks stay assigned to them."""
+    project = crud_project.get_project_by_id(db=db, project_id=project_id)
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    if project.owner_id != current_user.id:
+        raise HTTPException(
+            status_code=403, detail="Only the project owner can remove members"
+        )
+    if user_id == project.owner_id:
+        raise HTTPException(
+            status_code=409, detail="The project owner can't be removed"
+        )
+
+    removed = run_write(db, lambda session: crud_project.remove_member_from_project(
+        db=session, project_id=project_id, user_id=user_id
+    ))
+    if not removed:
+        raise HTTPException(
+            status_code=404, detail="User is not a member of this project"
+        )
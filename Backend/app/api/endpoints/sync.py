@@ -0,0 +1,69 @@
+from datetime import datetime, timedelta
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import ORJSONResponse
+from sqlmodel import Session
+
+from app.api.dependencies import get_current_active_user
+from app.core.config import settings
+from app.core.pagination import decode_cursor, encode_cursor
+from app.crud import crud_sync
+from app.db.database import get_session
+from app.models.user_models import User
+from app.schemas.sync_schemas import SyncRead
+
+router = APIRouter()
+
+
+def _decode_token(token: str) -> tuple[datetime | None, tuple | None]:
+    position = decode_cursor(token)
+    since = position["since"] and datetime.fromisoformat(position["since"])
+    after = position.get("after")
+    if after is not None:
+        # Snapshot pages continue after a (project_id, id), delta pages after an (updated_at, id)
+        after = (int(after[0]) if since is None else datetime.fromisoformat(after[0]), int(after[1]))
+    return since, after
+
+
+@router.get("/", response_model=SyncRead)
+def sync(
+        *,
+        db: Session = Depends(get_session),
+        since: str | None = None,
+        limit: int = Query(default=1000, ge=1, le=5000),
+        current_user: User = Depends(get_current_active_user),
+):
+    """
+    Returns the projects and tasks changed across all of the caller's projects
+    since the `next` token of their previous sync, or everything without one.
+    """
+    now = datetime.utcnow()
+    since_at, after = None, None
+    if since:
+        try:
+            since_at, after = _decode_token(since)
+        except (ValueError, KeyError, TypeError, IndexError):
+            raise HTTPException(status_code=400, detail="Invalid sync token")
+        if since_at is not None and since_at < now - timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS):
+            # Deletions this old may have been purged; start over
+            since_at, after = None, None
+
+    changes, next_after = crud_sync.get_changes(
+        db, user_id=current_user.id, since=since_at, after=after, limit=limit
+    )
+    if next_after is not None:
+        # Same starting point, continuing after the last task sent
+        token = {
+            "since": since_at and since_at.isoformat(),
+            "after": [next_after[0] if since_at is None else next_after[0].isoformat(), next_after[1]],
+        }
+    else:
+        token = {"since": (now - timedelta(seconds=settings.SYNC_SETTLE_SECONDS)).isoformat()}
+    # Built from column rows in SyncRead's field order; see json_rows_response
+    return ORJSONResponse(content={
+        **changes,
+        "next": encode_cursor(token),
+        "has_more": next_after is not None,
+        # Only the first page of a snapshot resets; later pages add to it
+        "reset": since_at is None and after is None,
+    })
@@ -1,52 +1,213 @@
+from datetime import datetime
 from typing import List
 
-from fastapi import APIRouter, status, Depends, HTTPException
+import anyio
+from fastapi import APIRouter, status, Depends, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 
 from sqlmodel import Session, select
 
 from app.api.dependencies import get_current_active_user
-from app.crud import crud_task, crud_project
-from app.db.database import get_session
-from app.models.project_models import Project
+from app.core.access import project_access
+from app.core.config import settings
+from app.core.export import EXPORT_FORMATS, csv_chunks, gzip_chunks, ndjson_chunks
+from app.core.pagination import decode_cursor, encode_cursor
+from app.core.serialization import json_rows_response, parse_fields
+from app.crud import crud_import, crud_task, crud_project
+from app.db import database
+from app.db.database import get_read_session, get_session
+from app.db.unit_of_work import run_write
+from app.models.project_models import Project, TaskStatus
 from app.models.user_models import User, ProjectMemberLink
-from app.schemas.task_schemas import TaskRead, TaskCreate, TaskUpdate
+from app.schemas.task_schemas import TaskRead, TaskCreate, TaskUpdate, TaskBatchCreate, TaskBatchUpdate, TaskBatchResult, TaskImportReport
 
 router = APIRouter()
 
+# Batch routes live at /projects/{project_id}/tasks:batch, which can't be
+# expressed under the "/projects/{project_id}/tasks" prefix of `router`
+batch_router = APIRouter()
+
 @router.post("/", response_model=TaskRead,status_code=status.HTTP_201_CREATED)
 def create_task_for_project(*,db:Session = Depends(get_session),project_id: int,task_in:TaskCreate,current_user:User=Depends(get_current_active_user)):
     project = crud_project.get_project_by_id(db=db, project_id=project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
 
-    if current_user not in project.members:
+    if not project_access.is_member(db, user_id=current_user.id, project_id=project_id):
         raise HTTPException(status_code=403, detail="Not authorized to create tasks in this project")
 
     if task_in.assignee_id:
-        assignee = db.get(User, task_in.assignee_id)
-        # Check for existence and membership in one simple line
-        if not assignee or assignee not in project.members:
+        # A membership link can only exist for a real user, so this covers existence too
+        if not project_access.is_member(db, user_id=task_in.assignee_id, project_id=project_id):
             raise HTTPException(
                 status_code=400, detail="Assignee is not a member of this project"
             )
 
-    task = crud_task.create_task(db=db, task_in=task_in, project_id=project_id)
+    task = run_write(db, lambda session: crud_task.create_task(db=session, task_in=task_in, project_id=project_id))
     return task
 
 
 @router.get("/", response_model=List[TaskRead])
-def get_project_tasks(*,db: Session = Depends(get_session),project_id: int,current_user: User = Depends(get_current_active_user)):
+def get_project_tasks(
+        *,
+        db: Session = Depends(get_session),
+        read_db: Session = Depends(get_read_session),
+        project_id: int,
+        cursor: str | None = None,
+        limit: int = Query(default=100, ge=1, le=1000),
+        status_filter: TaskStatus | None = Query(default=None, alias="status"),
+        assignee_id: int | None = None,
+        due_after: datetime | None = None,
+        due_before: datetime | None = None,
+        include_archived: bool = False,
+        fields: str | None = Query(default=None, description="Comma-separated TaskRead fields to return; `id` is always included"),
+        current_user: User = Depends(get_current_active_user),
+):
+    """
+    Lists a page of the project's tasks, ordered by id. Archived tasks (Done
+    for a long time) are only included with `include_archived`.
+
+    `fields` trims the rows to the named fields, e.g. `id,title,status,assignee_id`
+    for a board, and only those columns are read from the database.
+
+    When more tasks are available, the opaque cursor for the next page is
+    returned in the `X-Next-Cursor` response header.
+    """
     project = crud_project.get_project_by_id(db=db, project_id=project_id)
 
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
 
-    if current_user not in project.members:
+    if not project_access.is_member(db, user_id=current_user.id, project_id=project_id):
+        raise HTTPException(
+            status_code=403, detail="Not authorized to view tasks in this project"
+        )
+    after_id = None
+    if cursor:
+        try:
+            after_id = int(decode_cursor(cursor)["id"])
+        except (ValueError, KeyError, TypeError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    try:
+        projection = parse_fields(fields, TaskRead)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=f"Unknown field: {exc}")
+
+    # Column-only rows encoded with orjson, skipping ORM objects and response
+    # validation. The checks above stay on the primary, the listing can lag
+    rows = crud_task.get_task_rows_by_project(
+        db=read_db,
+        project_id=project_id,
+        status=status_filter,
+        assignee_id=assignee_id,
+        due_after=due_after,
+        due_before=due_before,
+        after_id=after_id,
+        limit=limit + 1,
+        include_archived=include_archived,
+        fields=None if projection is None else tuple(projection),
+    )
+    headers = {}
+    if len(rows) > limit:
+        rows = rows[:limit]
+        headers["X-Next-Cursor"] = encode_cursor({"id": rows[-1]["id"]})
+    return json_rows_response(rows, headers=headers)
+
+def _export_chunks(*, project_id: int, format: str, batch_size: int):
+    # Runs after the request's session is gone, so it reads through its own
+    with database.shard_map.session(project_id) as db:
+        batches = crud_task.iter_task_rows_by_project(db, project_id=project_id, batch_size=batch_size)
+        if format == "csv":
+            yield from csv_chunks(batches, fieldnames=list(TaskRead.model_fields))
+        else:
+            yield from ndjson_chunks(batches)
+
+
+@router.get("/export", response_class=StreamingResponse)
+def export_project_tasks(
+        *,
+        db: Session = Depends(get_session),
+        project_id: int,
+        format: str = Query(default="ndjson", pattern="^(ndjson|csv)$"),
+        gzip: bool = False,
+        current_user: User = Depends(get_current_active_user),
+):
+    """
+    Streams all of the project's tasks as NDJSON or CSV, optionally gzipped.
+
+    Rows are fetched and written a batch at a time, so memory use doesn't
+    grow with the size of the project.
+    """
+    if crud_project.get_project_version(db=db, project_id=project_id) is None:
+        raise HTTPException(status_code=404, detail="Project not found")
+    if not project_access.is_member(db, user_id=current_user.id, project_id=project_id):
         raise HTTPException(
             status_code=403, detail="Not authorized to view tasks in this project"
         )
-    tasks = crud_task.get_tasks_by_project(db=db, project_id=project_id)
-    return tasks
+    db.close()
+
+    chunks = _export_chunks(project_id=project_id, format=format, batch_size=settings.EXPORT_BATCH_SIZE)
+    filename = f"project-{project_id}-tasks.{format}"
+    media_type = EXPORT_FORMATS[format]
+    if gzip:
+        chunks = gzip_chunks(chunks)
+        filename += ".gz"
+        media_type = "application/gzip"
+    return StreamingResponse(
+        chunks, media_type=media_type, headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@router.post(
+    "/import",
+    response_model=TaskImportReport,
+    openapi_extra={"requestBody": {"required": True, "content": {
+        "text/csv": {"schema": {"type": "string"}},
+        "application/x-ndjson": {"schema": {"type": "string"}},
+    }}},
+)
+async def import_project_tasks(
+        *,
+        db: Session = Depends(get_session),
+        request: Request,
+        project_id: int,
+        format: str = Query(default="csv", pattern="^(csv|ndjson)$"),
+        chunk_size: int = Query(default=settings.IMPORT_CHUNK_SIZE, ge=1, le=50_000),
+        current_user: User = Depends(get_current_active_user),
+):
+    """
+    Bulk-loads tasks from a CSV (with a header row) or NDJSON request body.
+
+    Columns are those of TaskCreate plus optional `status` and
+    `assignee_email`. The body is parsed as it arrives and written in chunks
+    of `chunk_size` rows, each committed on its own; rejected rows are listed
+    in the report instead of failing the import. Progress is published on the
+    project's event stream as `task.imported` events.
+    """
+    def check_access() -> None:
+        if crud_project.get_project_version(db=db, project_id=project_id) is None:
+            raise HTTPException(status_code=404, detail="Project not found")
+        if not project_access.is_member(db, user_id=current_user.id, project_id=project_id):
+            raise HTTPException(
+                status_code=403, detail="Not authorized to create tasks in this project"
+            )
+
+    await run_in_threadpool(check_access)
+    body = request.stream()
+
+    def body_chunks():
+        # Runs in the worker thread, pulling the body from the event loop on demand
+        while True:
+            try:
+                yield anyio.from_thread.run(body.__anext__)
+            except StopAsyncIteration:
+                return
+
+    def run_import() -> TaskImportReport:
+        importer = crud_import.TaskImporter(db, project_id=project_id, chunk_size=chunk_size)
+        return importer.run(crud_import.parse_records(crud_import.iter_lines(body_chunks()), format))
+
+    return await anyio.to_thread.run_sync(run_import)
 
 @router.put("/{task_id}", response_model=TaskRead)
 def update_task(*,db: Session = Depends(get_session),project_id: int,task_id: int,task_in: TaskUpdate,current_user: User = Depends(get_current_active_user),):
@@ -54,7 +215,7 @@ def update_task(*,db: Session = Depends(get_session),project_id: int,task_id: in
         if not project:
             raise HTTPException(status_code=404, detail="Project not found")
 
-        if current_user not in project.members:
+        if not project_access.is_member(db, user_id=current_user.id, project_id=project_id):
             raise HTTPException(status_code=403, detail="Not authorized to update tasks in this project")
 
         task = crud_task.get_task(db=db, task_id=task_id)
@@ -62,11 +223,121 @@ def update_task(*,db: Session = Depends(get_session),project_id: int,task_id: in
             raise HTTPException(status_code=404, detail="Task not found in this project")
 
         if task_in.assignee_id is not None:
-            new_assignee = db.get(User, task_in.assignee_id)
-            if not new_assignee or new_assignee not in project.members:
+            if not project_access.is_member(db, user_id=task_in.assignee_id, project_id=project_id):
                 raise HTTPException(
                     status_code=400, detail="New assignee is not a member of this project"
                 )
 
-        task = crud_task.update_task(db=db, db_task=task, task_in=task_in)
-        return task
\ No newline at end of file
+        def write(session: Session):
+            # Loaded again, since a grouped write runs in the group's session
+            db_task = crud_task.get_task(db=session, task_id=task_id)
+            if db_task is None:
+                return None
+            return crud_task.update_task(db=session, db_task=db_task, task_in=task_in)
+
+        task = run_write(db, write)
+        if task is None:
+            raise HTTPException(status_code=404, detail="Task not found in this project")
+        return task
+
+
+@router.delete("/{task_id}", status_code=status.HTTP_204_NO_CONTENT)
+def delete_task(*,db: Session = Depends(get_session),project_id: int,task_id: int,current_user: User = Depends(get_current_active_user)):
+    """Deletes a task. It is kept in the archive, marked as deleted, and no longer listed."""
+    if not crud_project.get_project_by_id(db=db, project_id=project_id):
+        raise HTTPException(status_code=404, detail="Project not found")
+
+    if not project_access.is_member(db, user_id=current_user.id, project_id=project_id):
+        raise HTTPException(status_code=403, detail="Not authorized to delete tasks in this project")
+
+    task = crud_task.get_task(db=db, task_id=task_id)
+    if not task or task.project_id != project_id:
+        raise HTTPException(status_code=404, detail="Task not found in this project")
+    if run_write(db, lambda session: crud_task.delete_task(db=session, task_id=task_id)) is None:
+        raise HTTPException(status_code=404, detail="Task not found in this project")
+
+
+def _get_project_for_batch(db: Session, *, project_id: int, current_user: User, size: int) -> Project:
+    if size > settings.TASK_BATCH_MAX_SIZE:
+        raise HTTPException(
+            status_code=413, detail=f"A batch can contain at most {settings.TASK_BATCH_MAX_SIZE} tasks"
+        )
+    project = crud_project.get_project_by_id(db=db, project_id=project_id)
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    if not project_access.is_member(db, user_id=current_user.id, project_id=project_id):
+        raise HTTPException(status_code=403, detail="Not authorized to modify tasks in this project")
+    return project
+
+
+@batch_router.post("/{project_id}/tasks:batch", response_model=List[TaskBatchResult])
+def create_tasks_batch(*,db: Session = Depends(get_session),project_id: int,batch_in: TaskBatchCreate,current_user: User = Depends(get_current_active_user)):
+    """
+    Creates many tasks in one transaction.
+
+    Assignees are checked with one set-based membership query. Items with an
+    invalid assignee are rejected individually; the rest are written together.
+    """
+    _get_project_for_batch(db, project_id=project_id, current_user=current_user, size=len(batch_in.tasks))
+
+    assignee_ids = {task_in.assignee_id for task_in in batch_in.tasks if task_in.assignee_id}
+    member_ids = crud_project.get_member_ids(db, project_id=project_id, user_ids=assignee_ids)
+
+    results: list[TaskBatchResult] = []
+    accepted: list[tuple[TaskBatchResult, TaskCreate]] = []
+    for index, task_in in enumerate(batch_in.tasks):
+        result = TaskBatchResult(index=index, ok=False)
+        results.append(result)
+        if task_in.assignee_id and task_in.assignee_id not in member_ids:
+            result.error = "Assignee is not a member of this project"
+            continue
+        accepted.append((result, task_in))
+
+    tasks = crud_task.create_tasks(db=db, tasks_in=[task_in for _, task_in in accepted], project_id=project_id)
+    for (result, _), task in zip(accepted, tasks):
+        result.ok = True
+        result.task = TaskRead.model_validate(task)
+    return results
+
+
+@batch_router.patch("/{project_id}/tasks:batch", response_model=List[TaskBatchResult])
+def update_tasks_batch(*,db: Session = Depends(get_session),project_id: int,batch_in: TaskBatchUpdate,current_user: User = Depends(get_current_active_user)):
+    """
+    Updates many tasks in one transaction.
+
+    The tasks and the new assignees are each loaded with a single query. Items
+    that reference an unknown task or a non-member assignee are rejected
+    individually; the rest are written together.
+    """
+    _get_project_for_batch(db, project_id=project_id, current_user=current_user, size=len(batch_in.tasks))
+
+    tasks_by_id = crud_task.get_tasks_by_ids(
+        db, project_id=project_id, task_ids={task_in.id for task_in in batch_in.tasks}
+    )
+    assignee_ids = {task_in.assignee_id for task_in in batch_in.tasks if task_in.assignee_id is not None}
+    member_ids = crud_project.get_member_ids(db, project_id=project_id, user_ids=assignee_ids)
+
+    results: list[TaskBatchResult] = []
+    accepted = []
+    for index, task_in in enumerate(batch_in.tasks):
+        result = TaskBatchResult(index=index, ok=False)
+        results.append(result)
+        task = tasks_by_id.get(task_in.id)
+        if task is None:
+            result.error = "Task not found in this project"
+            continue
+        if task_in.assignee_id is not None and task_in.assignee_id not in member_ids:
+            result.error = "New assignee is not a member of this project"
+            continue
+        accepted.append((result, task, task_in))
+
+    tasks = crud_task.update_tasks(
+        db=db, updates=[(task, task_in) for _, task, task_in in accepted], project_id=project_id
+    )
+    for (result, _, _), task in zip(accepted, tasks):
+        if task is None:
+            result.error = "Task not found in this project"
+            continue
+        result.ok = True
+        result.task = TaskRead.model_validate(task)
+    return results
@@ -1,13 +1,20 @@
-from typing import List
+from datetime import datetime, timedelta
+from typing import List, Literal
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 
 from sqlmodel import select,Session
 from starlette import status
 
 from app.api.dependencies import get_current_active_user
-from app.db.database import get_session
+from app.core.pagination import decode_cursor, encode_cursor
+from app.core.serialization import json_rows_response
+from app.core.user_search import user_search_index
+from app.crud import crud_task, crud_user
+from app.db.database import get_read_session, get_session
+from app.models.project_models import TaskStatus
 from app.models.user_models import User
+from app.schemas.task_schemas import TaskRead
 from app.schemas.user_schemas import UserRead, UserPublic
 
 router=APIRouter()
@@ -17,12 +24,132 @@ def read_users_me(current_user:User=Depends(get_current_active_user)):
     return current_user
 
 
+def _decode_task_position(cursor: str, sort: str) -> dict:
+    position = decode_cursor(cursor)
+    if position.pop("sort") != sort:
+        raise ValueError("Cursor belongs to another sort order")
+    due_date = position["due_date"]
+    return {
+        "due_date": None if due_date is None else datetime.fromisoformat(due_date),
+        "id": int(position["id"]),
+        **({"status": TaskStatus(position["status"])} if sort == "status" else {}),
+    }
+
+
+@router.get("/me/tasks", response_model=List[TaskRead])
+def read_my_tasks(
+        *,
+        db: Session = Depends(get_read_session),
+        sort: Literal["due_date", "status"] = "due_date",
+        status_filter: TaskStatus | None = Query(default=None, alias="status"),
+        cursor: str | None = None,
+        limit: int = Query(default=100, ge=1, le=1000),
+        current_user: User = Depends(get_current_active_user),
+):
+    """
+    Lists a page of the tasks assigned to the current user across all their
+    projects, by due date (undated last) or by status and then due date.
+
+    When more tasks are available, the opaque cursor for the next page is
+    returned in the `X-Next-Cursor` response header.
+    """
+    after = None
+    if cursor:
+        try:
+            after = _decode_task_position(cursor, sort)
+        except (ValueError, KeyError, TypeError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    rows = crud_task.get_task_rows_by_assignee(
+        db, assignee_id=current_user.id, sort=sort, status=status_filter, after=after, limit=limit + 1
+    )
+    headers = {}
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        headers["X-Next-Cursor"] = encode_cursor(
+            {"sort": sort, **{field: last[field] for field in crud_task.ASSIGNED_TASK_SORTS[sort]}}
+        )
+    return json_rows_response(rows, headers=headers)
+
+
+@router.get("/me/tasks/due", response_model=List[TaskRead])
+def read_my_due_tasks(
+        *,
+        db: Session = Depends(get_read_session),
+        within: timedelta = Query(
+            default=timedelta(days=1), description="How far ahead to look, as seconds or an ISO 8601 duration (PT12H)"
+        ),
+        cursor: str | None = None,
+        limit: int = Query(default=100, ge=1, le=1000),
+        current_user: User = Depends(get_current_active_user),
+):
+    """
+    Lists a page of the current user's open tasks across all their projects
+    that are due within `within` from now, overdue ones included, soonest
+    due first.
+
+    When more tasks are available, the opaque cursor for the next page is
+    returned in the `X-Next-Cursor` response header.
+    """
+    after = None
+    if cursor:
+        try:
+            after = _decode_task_position(cursor, "due")
+        except (ValueError, KeyError, TypeError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        if after["due_date"] is None:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    rows = crud_task.get_due_task_rows_by_assignee(
+        db, assignee_id=current_user.id, due_before=datetime.utcnow() + within, after=after, limit=limit + 1
+    )
+    headers = {}
+    if len(rows) > limit:
+        rows = rows[:limit]
+        headers["X-Next-Cursor"] = encode_cursor({"sort": "due", "due_date": rows[-1]["due_date"], "id": rows[-1]["id"]})
+    return json_rows_response(rows, headers=headers)
+
+
 @router.get("/", response_model=List[UserPublic])
-def search_users(*,db:Session=Depends(get_session),email:str="",current_user:User=Depends(get_current_active_user)):
-    if not email:
+def search_users(
+        *,
+        db:Session=Depends(get_session),
+        read_db:Session=Depends(get_read_session),
+        response:Response,
+        q:str="",
+        email:str="",
+        offset:int=Query(default=0, ge=0),
+        limit:int=Query(default=10, ge=1, le=50),
+        current_user:User=Depends(get_current_active_user),
+):
+    """
+    Ranked prefix search over user emails and names.
+
+    `email` is still accepted as an alias of `q` for existing clients. While
+    the search index is still loading, only email prefixes are matched. A
+    query too broad for the index to rank within its scan limit gets an
+    `X-Search-Truncated: true` header: the page may be short and later pages
+    empty, so the client should narrow the query.
+    """
+    query = q or email
+    if not query:
         return []
-    statement=select(User).where(User.email.contains(email)).limit(10)
-    users=db.exec(statement).all()
+    # The index syncs from the primary, which a session only connects to if it is used
+    user_search_index.sync(db)
+    page = user_search_index.search(query, offset=offset, limit=limit)
+    if page is None:
+        return crud_user.search_users_by_email_prefix(read_db, prefix=query.strip(), offset=offset, limit=limit)
+    user_ids, truncated = page
+    if truncated:
+        response.headers["X-Search-Truncated"] = "true"
+    users = crud_user.get_users_by_ids(read_db, user_ids=user_ids)
+    if len(users) < len(user_ids):
+        # Deleted users stay in the index until a search finds them missing; the
+        # primary tells them apart from users the replica hasn't received yet
+        missing = set(user_ids) - {user.id for user in users}
+        for user_id in missing - {user.id for user in crud_user.get_users_by_ids(db, user_ids=list(missing))}:
+            user_search_index.remove(user_id)
     return users
 
 
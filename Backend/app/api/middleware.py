@@ -0,0 +1,212 @@
+import logging
+import time
+import zlib
+from typing import Callable
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core import metrics
+from app.core.config import settings
+from app.db.instrumentation import QueryStats, current_query_stats
+
+try:
+    import brotli
+except ImportError:  # optional; responses are only gzipped without it
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+
+def _statement_summary(statement: str) -> str:
+    """A statement on one line, cut to 200 characters, for logs and headers."""
+    return " ".join(statement.split())[:200]
+
+
+class RequestMetricsMiddleware:
+    """
+    Records per-request latency and SQL activity.
+
+    Every request gets a fresh `QueryStats` that the SQL instrumentation hooks
+    fill in. Once the response starts, the totals feed the per-route histograms
+    served on `/metrics`, and in DEBUG mode they are also attached as
+    `X-DB-*` response headers, along with the slowest statement. Requests
+    repeating an identical statement `N_PLUS_ONE_THRESHOLD` or more times are
+    logged as likely N+1 patterns.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = current_query_stats.set(stats)
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_metrics(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if settings.DEBUG:
+                    headers = MutableHeaders(scope=message)
+                    headers["X-DB-Query-Count"] = str(stats.count)
+                    headers["X-DB-Time-Ms"] = f"{stats.total_time * 1000:.2f}"
+                    headers["X-DB-Slowest-Ms"] = f"{stats.slowest_time * 1000:.2f}"
+                    if stats.slowest_statement is not None:
+                        # Header values must encode as latin-1
+                        headers["X-DB-Slowest-Statement"] = _statement_summary(
+                            stats.slowest_statement
+                        ).encode("latin-1", "replace").decode("latin-1")
+                    headers["X-DB-Repeated-Statements"] = str(
+                        len(stats.repeated_statements(settings.N_PLUS_ONE_THRESHOLD))
+                    )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            current_query_stats.reset(token)
+            self._record(scope, stats, status_code, time.perf_counter() - started)
+
+    @staticmethod
+    def _record(scope: Scope, stats: QueryStats, status_code: int, elapsed: float) -> None:
+        route = scope.get("route")
+        route_path = getattr(route, "path", "unmatched")
+        method = scope["method"]
+
+        metrics.http_request_duration.observe(elapsed, method, route_path)
+        metrics.http_requests.inc(method, route_path, status_code)
+        metrics.db_queries_per_request.observe(stats.count, method, route_path)
+        metrics.db_time_per_request.observe(stats.total_time, method, route_path)
+
+        repeated = stats.repeated_statements(settings.N_PLUS_ONE_THRESHOLD)
+        if repeated:
+            metrics.db_repeated_statement_requests.inc(method, route_path)
+            for statement, count in repeated.items():
+                logger.warning(
+                    "Possible N+1 on %s %s: statement ran %d times: %s",
+                    method, route_path, count, _statement_summary(statement),
+                )
+
+
+# Bodies that are compressed already, or must reach the client as written
+_UNCOMPRESSED_MEDIA_TYPES = ("text/event-stream", "application/gzip", "application/zip")
+
+
+def _accepted_encoding(accept_encoding: str) -> str | None:
+    """The best of br and gzip that an Accept-Encoding header allows, or None."""
+    weights = {}
+    for item in accept_encoding.split(","):
+        coding, *params = (part.strip() for part in item.split(";"))
+        weight = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    weight = float(param[2:])
+                except ValueError:
+                    weight = 0.0
+        weights[coding.lower()] = weight
+    for coding in ("br", "gzip") if brotli is not None else ("gzip",):
+        if weights.get(coding, weights.get("*", 0.0)) > 0:
+            return coding
+    return None
+
+
+class CompressionMiddleware:
+    """
+    Compresses response bodies of at least `minimum_size` bytes with brotli or
+    gzip, as negotiated by Accept-Encoding.
+
+    Streamed responses are compressed chunk by chunk as they are sent. Event
+    streams (whose events must not wait in a compressor) and bodies that
+    carry a Content-Encoding or an archive media type, such as gzipped
+    exports, are passed through. A strong ETag becomes weak on a compressed
+    response, since the bytes differ from the identity encoding's.
+    """
+
+    def __init__(self, app: ASGIApp, *, minimum_size: int, gzip_level: int, brotli_quality: int):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    def _compressor(self, encoding: str) -> tuple[Callable[[bytes], bytes], Callable[[], bytes]]:
+        """(compress, finish) functions of a new compressor."""
+        if encoding == "br":
+            compressor = brotli.Compressor(quality=self.brotli_quality)
+            return compressor.process, compressor.finish
+        compressor = zlib.compressobj(self.gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        return compressor.compress, compressor.flush
+
+    @staticmethod
+    def _compressible(message: Message) -> bool:
+        if message["status"] < 200 or message["status"] in (204, 304):
+            return False
+        headers = Headers(raw=message["headers"])
+        if "content-encoding" in headers:
+            return False
+        media_type = headers.get("content-type", "").partition(";")[0].strip().lower()
+        return media_type not in _UNCOMPRESSED_MEDIA_TYPES
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        encoding = None
+        if scope["type"] == "http" and self.minimum_size > 0:
+            encoding = _accepted_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Message | None = None
+        compress: Callable[[bytes], bytes] | None = None
+        finish: Callable[[], bytes] | None = None
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start, compress, finish
+            if message["type"] == "http.response.start":
+                # Held back until the first body chunk shows how large the body is
+                start = message
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if start is not None:
+                response_start, start = start, None
+                if not self._compressible(response_start) or (not more_body and len(body) < self.minimum_size):
+                    await send(response_start)
+                    await send(message)
+                    return
+                compress, finish = self._compressor(encoding)
+                headers = MutableHeaders(scope=response_start)
+                headers["Content-Encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                etag = headers.get("etag")
+                if etag and not etag.startswith("W/"):
+                    headers["ETag"] = f"W/{etag}"
+                if more_body:
+                    del headers["Content-Length"]
+                else:
+                    body = compress(body) + finish()
+                    headers["Content-Length"] = str(len(body))
+                    await send(response_start)
+                    await send({"type": "http.response.body", "body": body})
+                    return
+                await send(response_start)
+
+            if compress is None:
+                await send(message)
+                return
+            body = compress(body)
+            if not more_body:
+                body += finish()
+            if body or not more_body:
+                await send({"type": "http.response.body", "body": body, "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
@@ -0,0 +1,51 @@
+from sqlmodel import Session, select
+from sqlalchemy import exists
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.models.user_models import ProjectMemberLink
+
+
+class ProjectAccessChecker:
+    """
+    Answers "is this user a member of this project?" without loading the member list.
+
+    Each check is a single EXISTS lookup on the (user_id, project_id) primary key
+    of `ProjectMemberLink`, and the answer is kept in a bounded LRU/TTL cache.
+    Anything that adds or removes a member must call `invalidate` so the next
+    check sees the change immediately in this process; the TTL bounds how long
+    other workers can serve a stale answer.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def is_member(self, db: Session, *, user_id: int, project_id: int) -> bool:
+        key = (user_id, project_id)
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+
+        statement = select(
+            exists().where(
+                ProjectMemberLink.user_id == user_id,
+                ProjectMemberLink.project_id == project_id,
+            )
+        )
+        is_member = bool(db.exec(statement).one())
+        self._cache.set(key, is_member)
+        return is_member
+
+    def invalidate(self, *, user_id: int, project_id: int) -> None:
+        self._cache.delete((user_id, project_id))
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def stats(self) -> dict[str, int]:
+        return self._cache.stats()
+
+
+project_access = ProjectAccessChecker(
+    maxsize=settings.ACCESS_CACHE_SIZE, ttl=settings.ACCESS_CACHE_TTL_SECONDS
+)
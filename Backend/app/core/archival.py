@@ -0,0 +1,58 @@
+import logging
+import threading
+from datetime import datetime, timedelta
+
+from sqlalchemy.engine import Engine
+from sqlmodel import Session
+
+from app.crud import crud_task
+from app.db.database import get_shard_map
+
+logger = logging.getLogger(__name__)
+
+
+class TaskArchiver:
+    """
+    Runs task archival on a background thread every `interval` seconds.
+
+    For deployments without a scheduler for `manage.py archive-tasks`. Every
+    worker that starts one archives independently; that is safe, since each
+    batch locks and re-checks its tasks, but one is enough.
+    """
+
+    def __init__(self, *, after_days: int, batch_size: int, interval: float):
+        self.after_days = after_days
+        self.batch_size = batch_size
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def run_once(self, engine: Engine) -> int:
+        """Archives on every shard in turn; `engine` is the global database's."""
+        done_before = datetime.utcnow() - timedelta(days=self.after_days)
+        with Session(engine) as db, get_shard_map().shard_sessions(db) as sessions:
+            return sum(
+                crud_task.archive_done_tasks(session, done_before=done_before, batch_size=self.batch_size)
+                for session in sessions
+            )
+
+    def _run(self, engine: Engine) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                archived = self.run_once(engine)
+            except Exception:
+                logger.exception("Task archival failed")
+            else:
+                if archived:
+                    logger.info("Archived %d tasks", archived)
+
+    def start(self, engine: Engine) -> None:
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(engine,), name="task-archiver", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
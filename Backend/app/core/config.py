@@ -2,10 +2,126 @@ from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
     DATABASE_URL: str
+    # Defaults to DATABASE_URL with its async driver (aiosqlite/asyncpg)
+    ASYNC_DATABASE_URL: str | None = None
+    # Read replicas, as a JSON list of URLs. Read-only endpoints spread their
+    # sessions over them round-robin; everything else uses DATABASE_URL
+    DATABASE_REPLICA_URLS: list[str] = []
+    # Connection pool of each replica: size and overflow, seconds before a
+    # connection is replaced, and the wait for a free connection
+    DATABASE_REPLICA_POOL_SIZE: int = 5
+    DATABASE_REPLICA_MAX_OVERFLOW: int = 10
+    DATABASE_REPLICA_POOL_RECYCLE_SECONDS: int = 1800
+    DATABASE_REPLICA_POOL_TIMEOUT_SECONDS: float = 5.0
+    # A replica that fails to connect is skipped for this long
+    DATABASE_REPLICA_DOWN_SECONDS: float = 30.0
+    # Clients read from the primary for this long after a successful write,
+    # so they see their own changes while the replicas catch up
+    READ_YOUR_WRITES_SECONDS: float = 5.0
+    # Project shards, as a JSON list of URLs, for write throughput beyond one
+    # database: each project's tasks, comments and their counters live on one
+    # of them, while users, projects and memberships stay on DATABASE_URL.
+    # List DATABASE_URL itself first to shard an existing database, then move
+    # projects out with `manage.py shards rebalance`. All must be of the same
+    # database kind; group commit is off when sharded
+    DATABASE_SHARD_URLS: list[str] = []
+    # Project placements cached per process; moves run with the app stopped
+    SHARD_MAP_CACHE_SIZE: int = 100_000
+    # Task and comment ids handed to each process at a time when sharded,
+    # from one counter on DATABASE_URL, so they stay unique across shards
+    SHARD_ID_BLOCK_SIZE: int = 1000
     SECRET_KEY: str
     ALGORITHM: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int
 
+    # Adds X-DB-* query statistics headers to every response
+    DEBUG: bool = False
+    SQL_ECHO: bool = False
+    # Identical statements repeated this often in one request are flagged as N+1
+    N_PLUS_ONE_THRESHOLD: int = 5
+
+    # Project access checks are cached per (user_id, project_id)
+    ACCESS_CACHE_SIZE: int = 100_000
+    ACCESS_CACHE_TTL_SECONDS: float = 60.0
+
+    # Authenticated principals are cached by the user id carried in the token.
+    # Other workers see a deactivation only once their entry expires, so the
+    # TTL is how long a deactivated user can keep access
+    PRINCIPAL_CACHE_ENABLED: bool = True
+    PRINCIPAL_CACHE_SIZE: int = 50_000
+    PRINCIPAL_CACHE_TTL_SECONDS: float = 300.0
+
+    # bcrypt cost factor; stored hashes with a different cost are rehashed on login
+    BCRYPT_ROUNDS: int = 12
+    # Password hashing runs in its own process pool; 0 runs it on the thread pool
+    PASSWORD_HASH_WORKERS: int = 2
+    # Calls allowed to wait for a worker before logins get a 503
+    PASSWORD_HASH_QUEUE_SIZE: int = 32
+    PASSWORD_HASH_RETRY_AFTER_SECONDS: int = 1
+
+    TASK_BATCH_MAX_SIZE: int = 1000
+
+    # Group commit, off at 0: single-row writes of concurrent requests wait up
+    # to this long for each other and are committed in one transaction, at
+    # most GROUP_COMMIT_MAX_SIZE together; a write with none queued behind it
+    # doesn't wait. Trades a little latency per write under concurrency for
+    # far fewer commits (fsyncs) under write-heavy load
+    GROUP_COMMIT_WINDOW_MS: float = 0.0
+    GROUP_COMMIT_MAX_SIZE: int = 64
+
+    # Responses of at least this many bytes are compressed for clients that
+    # accept it: brotli when the `brotli` package is installed, else gzip.
+    # 0 turns compression off. Higher levels cost far more CPU per response
+    # than they save in bytes on JSON
+    RESPONSE_COMPRESSION_MINIMUM_SIZE: int = 1024
+    RESPONSE_GZIP_LEVEL: int = 1
+    RESPONSE_BROTLI_QUALITY: int = 4
+
+    # Serialized project details, keyed by (project_id, versions)
+    PROJECT_DETAIL_CACHE_SIZE: int = 1000
+    PROJECT_DETAIL_CACHE_TTL_SECONDS: float = 600.0
+
+    # Project change streams: per-subscriber queue bound (slower consumers are
+    # dropped and resume by event id), replay history kept per project, and the
+    # keep-alive interval of idle streams
+    EVENT_QUEUE_SIZE: int = 256
+    EVENT_HISTORY_SIZE: int = 256
+    EVENT_HISTORY_PROJECTS: int = 10_000
+    EVENT_HEARTBEAT_SECONDS: float = 15.0
+
+    # Rows fetched and written per chunk by streaming exports
+    EXPORT_BATCH_SIZE: int = 1000
+
+    # Task imports insert and commit this many rows at a time, and list at
+    # most this many rejected rows in their report
+    IMPORT_CHUNK_SIZE: int = 5000
+    IMPORT_MAX_REPORTED_ERRORS: int = 1000
+
+    # Delta sync tokens trail the clock by this much, so changes still being
+    # committed when a client syncs are sent again on its next sync
+    SYNC_SETTLE_SECONDS: float = 5.0
+    # Deletions are remembered this long; older tokens get a full snapshot
+    SYNC_TOMBSTONE_RETENTION_DAYS: int = 30
+
+    # Tasks Done for longer than this are moved to the archive table, this
+    # many per transaction. The app does so every TASK_ARCHIVE_INTERVAL_SECONDS;
+    # 0 leaves it to `manage.py archive-tasks`, e.g. run from cron
+    TASK_ARCHIVE_AFTER_DAYS: int = 90
+    TASK_ARCHIVE_BATCH_SIZE: int = 1000
+    TASK_ARCHIVE_INTERVAL_SECONDS: float = 0.0
+
+    # `task.reminder` events are sent this many minutes before each open
+    # task's due date (0: when it falls due), by a scheduler thread that is
+    # off unless enabled; run it in one worker. It holds the reminders of the
+    # next TASK_REMINDER_HORIZON_HOURS, at most TASK_REMINDER_MAX_PENDING, and
+    # reads them again every TASK_REMINDER_REFRESH_SECONDS to see due dates
+    # set by the other workers, whose reminders can be sent that much late
+    TASK_REMINDERS_ENABLED: bool = False
+    TASK_REMINDER_LEAD_MINUTES: list[int] = [60, 0]
+    TASK_REMINDER_HORIZON_HOURS: float = 24.0
+    TASK_REMINDER_MAX_PENDING: int = 200_000
+    TASK_REMINDER_REFRESH_SECONDS: float = 60.0
+
     model_config = SettingsConfigDict(
         env_file=".env",
         env_file_encoding="utf-8"
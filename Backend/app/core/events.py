@@ -0,0 +1,253 @@
+import abc
+import asyncio
+import threading
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+from app.core.config import settings
+
+
+@dataclass(frozen=True)
+class ChangeEvent:
+    """A change to a project, e.g. kind "task.updated" with the task as `data`."""
+    id: int
+    project_id: int
+    kind: str
+    data: dict[str, Any] = field(default_factory=dict)
+
+
+class EventBackend(abc.ABC):
+    """
+    Transport between the processes publishing and delivering change events.
+
+    `publish` assigns the event its id and hands it to every worker's `deliver`
+    callback, in id order; `replay` returns a project's events after a given id
+    for resuming subscribers, or None if they are no longer available. The
+    in-memory backend only reaches the current process; a multi-worker
+    deployment plugs in a broker-backed implementation (e.g. Redis Streams or
+    Postgres LISTEN/NOTIFY) with the same interface.
+    """
+
+    @abc.abstractmethod
+    def start(self, deliver: Callable[[ChangeEvent], None]) -> None:
+        ...
+
+    @abc.abstractmethod
+    def publish(self, project_id: int, kind: str, data: dict[str, Any]) -> ChangeEvent:
+        ...
+
+    @abc.abstractmethod
+    def replay(self, project_id: int, after_id: int) -> list[ChangeEvent] | None:
+        ...
+
+    @abc.abstractmethod
+    def last_id(self) -> int:
+        ...
+
+
+class InMemoryEventBackend(EventBackend):
+    """
+    Single-process backend keeping the last `history_size` events of up to
+    `max_projects` recently active projects for replay.
+    """
+
+    def __init__(self, history_size: int, max_projects: int):
+        self.history_size = history_size
+        self.max_projects = max_projects
+        self._lock = threading.Lock()
+        self._deliver: Callable[[ChangeEvent], None] = lambda event: None
+        self._next_id = 1
+        self._history: OrderedDict[int, deque[ChangeEvent]] = OrderedDict()
+        # Highest id dropped from each project's history, and from evicted projects
+        self._trimmed_upto: dict[int, int] = {}
+        self._evicted_upto = 0
+
+    def start(self, deliver: Callable[[ChangeEvent], None]) -> None:
+        self._deliver = deliver
+
+    def publish(self, project_id: int, kind: str, data: dict[str, Any]) -> ChangeEvent:
+        # Delivered under the lock, so subscribers see events in id order
+        with self._lock:
+            event = ChangeEvent(id=self._next_id, project_id=project_id, kind=kind, data=data)
+            self._next_id += 1
+            history = self._history.get(project_id)
+            if history is None:
+                history = self._history[project_id] = deque()
+                while len(self._history) > self.max_projects:
+                    evicted_id, evicted = self._history.popitem(last=False)
+                    self._trimmed_upto.pop(evicted_id, None)
+                    if evicted:
+                        self._evicted_upto = max(self._evicted_upto, evicted[-1].id)
+            self._history.move_to_end(project_id)
+            history.append(event)
+            if len(history) > self.history_size:
+                self._trimmed_upto[project_id] = history.popleft().id
+            self._deliver(event)
+        return event
+
+    def replay(self, project_id: int, after_id: int) -> list[ChangeEvent] | None:
+        with self._lock:
+            history = self._history.get(project_id)
+            if history is None:
+                return [] if after_id >= self._evicted_upto else None
+            if after_id < self._trimmed_upto.get(project_id, 0):
+                return None
+            return [event for event in history if event.id > after_id]
+
+    def last_id(self) -> int:
+        return self._next_id - 1
+
+
+_DROPPED = object()
+
+
+class Subscription:
+    """
+    One subscriber's bounded queue of a project's events; iterate it with `async for`.
+
+    When the queue overflows the subscriber is dropped: iteration ends with
+    `dropped` set, and the client is expected to reconnect with the last event
+    id it received. Iteration also ends when the subscriber's own membership is
+    removed, since membership is only checked when subscribing.
+    """
+
+    def __init__(self, hub: "ChangeHub", *, project_id: int, user_id: int, queue_size: int):
+        self.hub = hub
+        self.project_id = project_id
+        self.user_id = user_id
+        self.dropped = False
+        self.closed = False
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self._last_id = 0
+
+    def _offer(self, event: ChangeEvent) -> None:
+        if self.closed or event.id <= self._last_id:
+            return
+        self._last_id = event.id
+        try:
+            self._queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.dropped = True
+            self._end()
+            return
+        if event.kind == "member.removed" and event.data.get("user_id") == self.user_id:
+            self._end()
+
+    def _end(self) -> None:
+        """Stops delivery; whatever is already queued is still yielded first unless dropped."""
+        if self.dropped:
+            while not self._queue.empty():
+                self._queue.get_nowait()
+        self.close()
+        try:
+            self._queue.put_nowait(_DROPPED)
+        except asyncio.QueueFull:
+            # The sentinel must get through; it replaces the newest event
+            self._queue.get_nowait()
+            self._queue.put_nowait(_DROPPED)
+
+    def close(self) -> None:
+        if not self.closed:
+            self.closed = True
+            self.hub._unsubscribe(self)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> ChangeEvent:
+        if self.closed and self._queue.empty():
+            raise StopAsyncIteration
+        item = await self._queue.get()
+        if item is _DROPPED:
+            raise StopAsyncIteration
+        return item
+
+
+class ChangeHub:
+    """
+    Fans project change events out to the subscribers in this process.
+
+    `publish` is safe to call from any thread, typically from sync CRUD code in
+    the request thread pool after its commit; delivery to the subscribers'
+    queues is handed over to the event loop they were created on.
+    """
+
+    def __init__(self, backend: EventBackend, queue_size: int):
+        self.backend = backend
+        self.queue_size = queue_size
+        self._lock = threading.Lock()
+        self._subscribers: dict[int, set[Subscription]] = {}
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self.published = 0
+        self.dropped = 0
+        backend.start(self._deliver)
+
+    def publish(self, project_id: int, kind: str, data: dict[str, Any] | None = None) -> None:
+        self.published += 1
+        self.backend.publish(project_id, kind, data or {})
+
+    def subscribe(self, *, project_id: int, user_id: int, last_event_id: int | None = None) -> Subscription:
+        """
+        Registers a subscriber; call from the event loop after checking membership.
+
+        With `last_event_id`, the events published since are queued first. If
+        they are no longer available, the first event is a "reset" telling the
+        client to refetch the project instead.
+        """
+        self._loop = asyncio.get_running_loop()
+        subscription = Subscription(self, project_id=project_id, user_id=user_id, queue_size=self.queue_size)
+        with self._lock:
+            self._subscribers.setdefault(project_id, set()).add(subscription)
+        if last_event_id is not None:
+            missed = self.backend.replay(project_id, last_event_id)
+            if missed is None:
+                missed = [ChangeEvent(id=self.backend.last_id(), project_id=project_id, kind="reset")]
+            for event in missed:
+                subscription._offer(event)
+        return subscription
+
+    def _unsubscribe(self, subscription: Subscription) -> None:
+        if subscription.dropped:
+            self.dropped += 1
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.project_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.project_id]
+
+    def _deliver(self, event: ChangeEvent) -> None:
+        loop = self._loop
+        if loop is None or event.project_id not in self._subscribers:
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            self._fan_out(event)
+        elif not loop.is_closed():
+            loop.call_soon_threadsafe(self._fan_out, event)
+
+    def _fan_out(self, event: ChangeEvent) -> None:
+        with self._lock:
+            subscribers = list(self._subscribers.get(event.project_id, ()))
+        for subscription in subscribers:
+            subscription._offer(event)
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            subscribers = sum(len(subs) for subs in self._subscribers.values())
+        return {
+            "subscribers": subscribers,
+            "projects": len(self._subscribers),
+            "published": self.published,
+            "dropped": self.dropped,
+        }
+
+
+change_hub = ChangeHub(
+    InMemoryEventBackend(history_size=settings.EVENT_HISTORY_SIZE, max_projects=settings.EVENT_HISTORY_PROJECTS),
+    queue_size=settings.EVENT_QUEUE_SIZE,
+)
@@ -0,0 +1,47 @@
+import csv
+import io
+import zlib
+from enum import Enum
+from typing import Iterable, Iterator
+
+import orjson
+
+EXPORT_FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+def ndjson_chunks(batches: Iterable[list[dict]]) -> Iterator[bytes]:
+    """One JSON object per line; each batch of rows becomes one chunk."""
+    for rows in batches:
+        yield b"".join(orjson.dumps(row) + b"\n" for row in rows)
+
+
+def _csv_value(value):
+    if isinstance(value, Enum):
+        return value.value
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return value
+
+
+def csv_chunks(batches: Iterable[list[dict]], fieldnames: list[str]) -> Iterator[bytes]:
+    """CSV with a header row; each batch of rows becomes one chunk."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fieldnames)
+    for rows in batches:
+        writer.writerows([_csv_value(row[name]) for name in fieldnames] for row in rows)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def gzip_chunks(chunks: Iterable[bytes], level: int = 6) -> Iterator[bytes]:
+    """Compresses a chunk stream into a single gzip member without buffering it."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
@@ -0,0 +1,79 @@
+from sqlalchemy.orm import make_transient_to_detached
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.models.user_models import User
+
+
+class PrincipalCache:
+    """
+    Caches snapshots of authenticated users by id so `get_current_user` does not
+    query the user table on every request.
+
+    A snapshot is a plain dict of the user's columns (minus the password hash).
+    On a hit it is merged into the request's session without a SELECT, so the
+    returned `User` behaves like one loaded from the database, including lazy
+    relationships. Any change to `email` or `is_active` must go through
+    `invalidate` (`crud_user.update_user` does), so that deactivation takes
+    effect on the next request handled by the same process. The cache is per
+    process and nothing tells the others, so their snapshots stay in use until
+    the TTL expires: a deactivated user keeps access to other workers for up
+    to PRINCIPAL_CACHE_TTL_SECONDS. Lower it, or disable the cache, if that
+    bound is too loose.
+    """
+
+    _excluded_fields = {"hashed_password"}
+
+    def __init__(self, maxsize: int, ttl: float, enabled: bool = True):
+        self.enabled = enabled
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def get_user(self, db: Session, *, user_id: int) -> User | None:
+        if not self.enabled:
+            return db.get(User, user_id)
+
+        cached = self._cached(user_id)
+        if cached is None:
+            return self._store(db.get(User, user_id))
+        return db.merge(cached, load=False)
+
+    async def get_user_async(self, db: AsyncSession, *, user_id: int) -> User | None:
+        """Async counterpart of `get_user`, for sessions from `get_async_session`."""
+        if not self.enabled:
+            return await db.get(User, user_id)
+
+        cached = self._cached(user_id)
+        if cached is None:
+            return self._store(await db.get(User, user_id))
+        return await db.merge(cached, load=False)
+
+    def _cached(self, user_id: int) -> User | None:
+        snapshot = self._cache.get(user_id)
+        if snapshot is None:
+            return None
+        user = User(**snapshot)
+        make_transient_to_detached(user)
+        return user
+
+    def _store(self, user: User | None) -> User | None:
+        if user is not None:
+            self._cache.set(user.id, user.model_dump(exclude=self._excluded_fields))
+        return user
+
+    def invalidate(self, *, user_id: int) -> None:
+        self._cache.delete(user_id)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def stats(self) -> dict[str, int]:
+        return self._cache.stats()
+
+
+principal_cache = PrincipalCache(
+    maxsize=settings.PRINCIPAL_CACHE_SIZE,
+    ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+    enabled=settings.PRINCIPAL_CACHE_ENABLED,
+)
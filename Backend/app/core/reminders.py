@@ -0,0 +1,333 @@
+"""
+Reminder events for task due dates, sent without polling the task table.
+
+`ReminderScheduler` keeps the reminders falling due within the next `horizon`
+in a min-heap by time, and its thread sleeps until the earliest one. For each
+of `leads`, an open task gets a `task.reminder` event on its project's change
+stream that long before its due date (a zero lead: when it falls due).
+
+The heap is loaded from the (status, due_date) index, then kept current by
+the task CRUD helpers calling `track`/`forget` after their commits; when the
+clock passes the loaded horizon, the next one is loaded. Memory stays bounded
+however many tasks have due dates: only the horizon's reminders are held, at
+most `max_pending`, and the horizon is cut short when there are more.
+
+Other processes' writes aren't tracked, so the horizon is also read again
+every `refresh`, starting from where the previous read started: reminders
+of due dates they set are found then and, if already due, sent late rather
+than missed. Reminders sent since the previous read are skipped. Every
+reminder is checked against its task before it is sent, so tasks changed
+by another process are never reminded of wrongly. Run the scheduler in one
+process; when sharded, it reads every shard.
+"""
+import heapq
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable
+
+from sqlalchemy.engine import Engine
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.core.events import change_hub
+from app.db.database import get_shard_map
+from app.models.project_models import Task, TaskStatus
+
+logger = logging.getLogger(__name__)
+
+OPEN_STATUSES = tuple(status for status in TaskStatus if status != TaskStatus.DONE)
+# Due dates are stored to the microsecond; a horizon cut short ends this
+# much before the first reminder left out
+_TICK = timedelta(microseconds=1)
+# Upper bound of a sleep, so a wall clock set back is noticed
+_MAX_SLEEP_SECONDS = 300.0
+# Tasks checked per query before their reminders are sent
+_SEND_BATCH_SIZE = 500
+
+# A pending reminder: (time, task_id, due_date, lead)
+Reminder = tuple[datetime, int, datetime, timedelta]
+
+
+def _utc(value: datetime) -> datetime:
+    """Due dates are stored as naive UTC; aware ones from requests are converted to compare with them."""
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+class ReminderScheduler:
+    """
+    Sends `task.reminder` events as task due dates approach; see the module
+    docstring. `clock` returns the current naive UTC time and `emit` is
+    called as `emit(project_id, kind, data)`; both can be replaced in tests,
+    which then call `run_pending` instead of starting the thread.
+    """
+
+    def __init__(
+            self,
+            *,
+            leads: list[timedelta],
+            horizon: timedelta,
+            max_pending: int,
+            refresh: timedelta,
+            clock: Callable[[], datetime] = datetime.utcnow,
+            emit: Callable[[int, str, dict[str, Any]], None] = change_hub.publish,
+    ):
+        self.leads = sorted(set(leads))
+        self.horizon = horizon
+        self.max_pending = max_pending
+        self.refresh = refresh
+        self.clock = clock
+        self.emit = emit
+        self._condition = threading.Condition()
+        self._heap: list[Reminder] = []
+        # Due date each task's reminders in the heap are for; entries for any
+        # other due date are stale and skipped when they come up
+        self._due: dict[int, datetime] = {}
+        # Reminders up to `_sent_until` have been sent (or were past at
+        # startup, or are for due dates another process set since the last
+        # load); the heap holds all the others up to `_loaded_until`
+        self._sent_until: datetime | None = None
+        self._loaded_until: datetime | None = None
+        # Where the last read of the horizon started, when it happened, and
+        # the (task_id, due_date, lead) of the reminders sent since
+        self._loaded_from: datetime | None = None
+        self._loaded_at: datetime | None = None
+        self._sent: set[tuple[int, datetime, timedelta]] = set()
+        # Changes tracked while a horizon is being read, applied after it
+        self._loading: list[tuple[int, TaskStatus | None, datetime | None]] | None = None
+        self._stopping = False
+        self._thread: threading.Thread | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def pending(self) -> int:
+        """Reminders held in the heap, stale ones included."""
+        with self._condition:
+            return len(self._heap)
+
+    def _reminders(self, task_id: int, due_date: datetime, start: datetime, end: datetime) -> list[Reminder]:
+        return [
+            (due_date - lead, task_id, due_date, lead)
+            for lead in self.leads
+            if start < due_date - lead <= end
+        ]
+
+    def track(self, task_id: int, *, status: TaskStatus | None, due_date: datetime | None) -> None:
+        """Schedules a created or updated task's reminders, replacing any it had; call after the commit."""
+        with self._condition:
+            if self._loaded_until is None:
+                return
+            if self._loading is not None:
+                self._loading.append((task_id, status, due_date))
+                return
+            self._track(task_id, status, due_date)
+
+    def forget(self, task_id: int) -> None:
+        """Drops a deleted task's reminders; call after the commit."""
+        self.track(task_id, status=None, due_date=None)
+
+    def reload(self) -> None:
+        """
+        Has the current horizon read again from the database, for writes that
+        don't track their tasks one by one, such as imports.
+        """
+        with self._condition:
+            if self._loaded_until is not None:
+                self._loaded_until = self._sent_until
+                self._condition.notify()
+
+    def _track(self, task_id: int, status: TaskStatus | None, due_date: datetime | None) -> None:
+        self._due.pop(task_id, None)
+        if status not in OPEN_STATUSES or due_date is None:
+            return
+        due_date = _utc(due_date)
+        reminders = self._reminders(task_id, due_date, self._sent_until, self._loaded_until)
+        if not reminders:
+            return
+        self._due[task_id] = due_date
+        earliest = self._heap[0][0] if self._heap else None
+        for reminder in reminders:
+            heapq.heappush(self._heap, reminder)
+        if len(self._heap) > self.max_pending:
+            self._shrink()
+        if self._heap and (earliest is None or self._heap[0][0] < earliest):
+            self._condition.notify()
+
+    def _shrink(self) -> None:
+        """Drops stale entries and, if still over `max_pending`, the latest reminders along with their part of the horizon."""
+        live = sorted(reminder for reminder in self._heap if self._due.get(reminder[1]) == reminder[2])
+        if len(live) > self.max_pending:
+            self._loaded_until = live[self.max_pending][0] - _TICK
+            live = [reminder for reminder in live[:self.max_pending] if reminder[0] <= self._loaded_until]
+            self._due = {task_id: due_date for _, task_id, due_date, _ in live}
+        # A sorted list is a valid heap
+        self._heap = live
+
+    def _read_horizon(self, db: Session, start: datetime, end: datetime) -> tuple[list[Reminder], datetime]:
+        """
+        The reminders in (start, end], with `end` cut short if there are more
+        than `max_pending`. Reads each lead's tasks as ranges of the (status,
+        due_date) index, by due date and at most its share of `max_pending`.
+        """
+        limit = max(1, self.max_pending // len(self.leads))
+        reminders: list[Reminder] = []
+        for lead in self.leads:
+            rows = []
+            with get_shard_map().shard_sessions(db) as sessions:
+                for session in sessions:
+                    for status in OPEN_STATUSES:
+                        rows += session.exec(
+                            select(Task.id, Task.due_date)
+                            .where(Task.status == status, Task.due_date > start + lead, Task.due_date <= end + lead)
+                            .order_by(Task.due_date)
+                            .limit(limit + 1)
+                        ).all()
+            rows.sort(key=lambda row: row[1])
+            if len(rows) > limit:
+                # Complete up to just before the first due date left out,
+                # unless more than `limit` tasks share the one due date
+                cut = rows[limit][1] - lead - _TICK
+                if cut <= start:
+                    logger.warning("More than %d tasks due at %s, some get no reminder", limit, rows[limit][1])
+                    cut = rows[limit][1] - lead
+                end = min(end, cut)
+                rows = rows[:limit]
+            reminders += [(due_date - lead, task_id, due_date, lead) for task_id, due_date in rows]
+        return [reminder for reminder in reminders if reminder[0] <= end], end
+
+    def load(self, db: Session, now: datetime) -> None:
+        """
+        Replaces the heap with the reminders between the start of the previous
+        load (the first: `now`) and `now + horizon`, less those sent since.
+        """
+        with self._condition:
+            if self._sent_until is None:
+                self._sent_until = now
+            start = self._loaded_from or self._sent_until
+            self._loading = []
+        try:
+            reminders, end = self._read_horizon(db, start, now + self.horizon)
+        except BaseException:
+            with self._condition:
+                self._loading = None
+            raise
+        with self._condition:
+            reminders = [reminder for reminder in reminders if reminder[1:] not in self._sent]
+            heapq.heapify(reminders)
+            self._heap = reminders
+            self._due = {task_id: due_date for _, task_id, due_date, _ in reminders}
+            self._loaded_until = end
+            self._loaded_from, self._loaded_at, self._sent = self._sent_until, now, set()
+            tracked, self._loading = self._loading, None
+            for change in tracked:
+                self._track(*change)
+            self._condition.notify()
+
+    def _send(self, db: Session, reminders: list[Reminder]) -> int:
+        """Sends the reminders whose tasks are still open and due when they were scheduled for."""
+        sent = 0
+        for start in range(0, len(reminders), _SEND_BATCH_SIZE):
+            batch = reminders[start:start + _SEND_BATCH_SIZE]
+            statement = (
+                select(Task.id, Task.project_id, Task.title, Task.status, Task.assignee_id, Task.due_date)
+                .where(Task.id.in_({task_id for _, task_id, _, _ in batch}))
+            )
+            tasks = {}
+            with get_shard_map().shard_sessions(db) as sessions:
+                for session in sessions:
+                    tasks.update((row.id, row) for row in session.exec(statement).all())
+            for _, task_id, due_date, lead in batch:
+                task = tasks.get(task_id)
+                if task is None or task.status not in OPEN_STATUSES or task.due_date != due_date:
+                    continue
+                self.emit(task.project_id, "task.reminder", {
+                    "id": task.id,
+                    "title": task.title,
+                    "assignee_id": task.assignee_id,
+                    "due_date": due_date.isoformat(),
+                    "minutes_before_due": int(lead.total_seconds() // 60),
+                })
+                sent += 1
+        return sent
+
+    def run_pending(self, db: Session) -> int:
+        """
+        Sends the reminders due by `clock()`, loading the first or next horizon
+        when it is reached or `refresh` has passed; returns how many were sent.
+        Reminders that were due before the scheduler first loaded are not sent.
+        """
+        now = self.clock()
+        if self._loaded_until is None or now >= self._loaded_at + self.refresh:
+            self.load(db, now)
+        sent = 0
+        while True:
+            with self._condition:
+                reached = min(now, self._loaded_until)
+                due = []
+                while self._heap and self._heap[0][0] <= reached:
+                    reminder = heapq.heappop(self._heap)
+                    if self._due.get(reminder[1]) == reminder[2]:
+                        due.append(reminder)
+                        self._sent.add(reminder[1:])
+                self._sent_until = max(self._sent_until, reached)
+                exhausted = now >= self._loaded_until
+            sent += self._send(db, due)
+            if not exhausted:
+                return sent
+            self.load(db, now)
+
+    def _seconds_to_next(self) -> float:
+        if self._loaded_until is None:
+            return _MAX_SLEEP_SECONDS
+        next_at = min(self._loaded_until, self._loaded_at + self.refresh)
+        if self._heap:
+            next_at = min(next_at, self._heap[0][0])
+        return min(max(0.0, (next_at - self.clock()).total_seconds()), _MAX_SLEEP_SECONDS)
+
+    def _run(self, engine: Engine) -> None:
+        while True:
+            try:
+                with Session(engine) as db:
+                    sent = self.run_pending(db)
+            except Exception:
+                logger.exception("Sending task reminders failed")
+            else:
+                if sent:
+                    logger.debug("Sent %d task reminders", sent)
+            with self._condition:
+                if self._stopping:
+                    return
+                self._condition.wait(self._seconds_to_next())
+                if self._stopping:
+                    return
+
+    def start(self, engine: Engine) -> None:
+        """Starts the thread; the first horizon is loaded on it, so startup doesn't wait."""
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, args=(engine,), name="task-reminders", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stops the thread and drops the heap; reminders already sent are not sent again on restart."""
+        if self._thread is None:
+            return
+        with self._condition:
+            self._stopping = True
+            self._condition.notify()
+        self._thread.join()
+        self._thread = None
+        with self._condition:
+            self._heap, self._due = [], {}
+            self._loaded_until = None
+
+
+reminder_scheduler = ReminderScheduler(
+    leads=[timedelta(minutes=minutes) for minutes in settings.TASK_REMINDER_LEAD_MINUTES],
+    horizon=timedelta(hours=settings.TASK_REMINDER_HORIZON_HOURS),
+    max_pending=settings.TASK_REMINDER_MAX_PENDING,
+    refresh=timedelta(seconds=settings.TASK_REMINDER_REFRESH_SECONDS),
+)
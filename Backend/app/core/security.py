@@ -1,30 +1,131 @@
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Any
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Callable
 
 from jose import jwt
-from passlib.context import CryptContext
 import bcrypt
 from app.core.config import settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+if TYPE_CHECKING:
+    from passlib.context import CryptContext
+
+
+@lru_cache
+def _crypt_context(rounds: int) -> "CryptContext":
+    # passlib is imported and the context built on first use rather than at
+    # startup. Pinning min/max to the configured cost makes hashes made with
+    # any other cost report `needs_update`, which drives rehash-on-login
+    from passlib.context import CryptContext
+
+    return CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__default_rounds=rounds,
+        bcrypt__min_rounds=rounds,
+        bcrypt__max_rounds=rounds,
+    )
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verifies a plain text password against a hashed one."""
-    return pwd_context.verify(plain_password, hashed_password)
+    return _crypt_context(settings.BCRYPT_ROUNDS).verify(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
     """Hashes a plain text password."""
-    return pwd_context.hash(password)
+    return _crypt_context(settings.BCRYPT_ROUNDS).hash(password)
+
+
+# Worker-side entry points. They take the cost explicitly so they behave the
+# same in a process pool worker as in this process.
+
+def _hash_in_worker(password: str, rounds: int) -> str:
+    return _crypt_context(rounds).hash(password)
+
+def _verify_and_update_in_worker(password: str, hashed_password: str, rounds: int) -> tuple[bool, str | None]:
+    return _crypt_context(rounds).verify_and_update(password, hashed_password)
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when the password hashing queue is full; maps to 503 with Retry-After."""
+
+    def __init__(self, retry_after: int):
+        super().__init__("Password hashing is at capacity")
+        self.retry_after = retry_after
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt in a dedicated process pool with bounded admission.
+
+    bcrypt costs hundreds of milliseconds of CPU per call. Running it in a
+    separate pool keeps a burst of logins from starving the request threads of
+    every other endpoint. At most `workers + queue_size` calls are admitted at
+    once; beyond that `PasswordHasherBusy` is raised immediately instead of
+    letting requests pile up. With `workers=0` calls run on the default
+    thread pool instead, which is handy for tests and single-process tools.
+    """
+
+    def __init__(self, workers: int, queue_size: int, retry_after: int):
+        self.workers = workers
+        self.retry_after = retry_after
+        self._slots = threading.BoundedSemaphore(max(workers, 1) + queue_size)
+        self._executor: ProcessPoolExecutor | None = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._executor
+
+    async def _run(self, fn: Callable, *args):
+        if not self._slots.acquire(blocking=False):
+            raise PasswordHasherBusy(self.retry_after)
+        try:
+            if self.workers == 0:
+                return await asyncio.to_thread(fn, *args)
+            return await asyncio.wrap_future(self._get_executor().submit(fn, *args))
+        finally:
+            self._slots.release()
+
+    async def hash(self, password: str) -> str:
+        return await self._run(_hash_in_worker, password, settings.BCRYPT_ROUNDS)
+
+    async def verify_and_update(self, password: str, hashed_password: str) -> tuple[bool, str | None]:
+        """Verifies a password; also returns a new hash if the stored one uses an outdated cost."""
+        return await self._run(_verify_and_update_in_worker, password, hashed_password, settings.BCRYPT_ROUNDS)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+password_hasher = PasswordHasher(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    queue_size=settings.PASSWORD_HASH_QUEUE_SIZE,
+    retry_after=settings.PASSWORD_HASH_RETRY_AFTER_SECONDS,
+)
 
 
 
-def create_access_token(subject: str | Any, expires_delta: timedelta | None = None) -> str:
-    """Creates a JWT access token."""
+def create_access_token(
+        subject: str | Any, expires_delta: timedelta | None = None, user_id: int | None = None
+) -> str:
+    """Creates a JWT access token. `user_id` is carried as the stable `uid` claim."""
     if expires_delta:
         expire = datetime.now(timezone.utc) + expires_delta
     else:
         expire = datetime.now(timezone.utc) + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
 
     to_encode = {"exp": expire, "sub": str(subject)}
+    if user_id is not None:
+        to_encode["uid"] = user_id
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
\ No newline at end of file
@@ -0,0 +1,74 @@
+from typing import Any, Iterable, Mapping, get_args
+
+from pydantic import BaseModel
+
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.engine import Result
+
+
+def result_rows(result: Result) -> list[dict[str, Any]]:
+    """Turns the rows of a column-only query into plain dicts keyed by column label."""
+    keys = list(result.keys())
+    return [dict(zip(keys, row)) for row in result]
+
+
+def json_rows_response(rows: Iterable[Mapping[str, Any]], *, headers: Mapping[str, str] | None = None) -> ORJSONResponse:
+    """
+    Encodes already-shaped rows straight to JSON with orjson.
+
+    Endpoints on this path keep their `response_model` for the OpenAPI schema,
+    but FastAPI skips validating and re-encoding a returned Response, so the
+    query must select exactly the schema's fields, in its field order, with
+    JSON-compatible values (enums and datetimes are handled by orjson the same
+    way pydantic dumps them).
+    """
+    return ORJSONResponse(content=rows if isinstance(rows, list) else list(rows), headers=headers)
+
+
+
+def _list_item_model(annotation: Any) -> type[BaseModel] | None:
+    """The model of a `List[Model]` field, else None."""
+    for arg in get_args(annotation):
+        if isinstance(arg, type) and issubclass(arg, BaseModel):
+            return arg
+    return None
+
+
+def parse_fields(fields: str | None, schema: type[BaseModel]) -> dict[str, tuple[str, ...] | None] | None:
+    """
+    Parses a `?fields=` projection, a comma-separated list of `schema`'s field
+    names, into {field: None}. A list-of-models field can be narrowed with
+    dotted names, e.g. `tasks.id,tasks.title`, which map to {"tasks": ("id",
+    "title")}. Both levels come out in the schema's field order, as
+    `json_rows_response` needs. None (no projection) for a missing or empty
+    value; ValueError naming the first unknown field.
+    """
+    if not fields:
+        return None
+    selected: dict[str, set[str] | None] = {}
+    for name in filter(None, (name.strip() for name in fields.split(","))):
+        field, _, sub_field = name.partition(".")
+        if field not in schema.model_fields:
+            raise ValueError(name)
+        if not sub_field:
+            selected[field] = None
+            continue
+        item_model = _list_item_model(schema.model_fields[field].annotation)
+        if item_model is None or sub_field not in item_model.model_fields:
+            raise ValueError(name)
+        if field not in selected:
+            selected[field] = set()
+        if selected[field] is not None:
+            selected[field].add(sub_field)
+    if not selected:
+        return None
+    projection = {}
+    for field, field_info in schema.model_fields.items():
+        if field not in selected:
+            continue
+        sub_fields = selected[field]
+        if sub_fields is not None:
+            item_model = _list_item_model(field_info.annotation)
+            sub_fields = tuple(name for name in item_model.model_fields if name in sub_fields)
+        projection[field] = sub_fields
+    return projection
@@ -0,0 +1,241 @@
+import re
+import sys
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from datetime import datetime, timedelta
+from typing import Iterable, Iterator
+
+from sqlmodel import Session, select
+
+from app.models.user_models import User
+
+_SPLIT = re.compile(r"[\s._+\-@]+")
+# Upper bound of characters, used to turn a prefix into a bisect range
+_PREFIX_END = "\U0010ffff"
+# How far before the previous sync each sync reads `updated_at` from, so
+# writes that commit a while after taking their timestamp are still seen
+_SYNC_OVERLAP = timedelta(seconds=60)
+
+
+def _tokens(email: str, full_name: str) -> set[str]:
+    """Words a user can be found by: name words, email local-part pieces and the domain."""
+    local, _, domain = email.lower().partition("@")
+    tokens = {word for word in _SPLIT.split(f"{full_name} {local}".lower()) if word}
+    tokens.add(local)
+    if domain:
+        tokens.add(domain)
+    return {sys.intern(token) for token in tokens}
+
+
+class _SortedKeys:
+    """Parallel sorted `keys`/`ids` arrays supporting prefix range scans."""
+
+    def __init__(self):
+        self.keys: list[str] = []
+        self.ids = array("q")
+
+    def load(self, pairs: Iterable[tuple[str, int]]) -> None:
+        ordered = sorted(pairs)
+        self.keys = [key for key, _ in ordered]
+        self.ids = array("q", (user_id for _, user_id in ordered))
+
+    def add(self, key: str, user_id: int) -> None:
+        i = bisect_left(self.keys, key)
+        while i < len(self.keys) and self.keys[i] == key and self.ids[i] < user_id:
+            i += 1
+        self.keys.insert(i, key)
+        self.ids.insert(i, user_id)
+
+    def remove(self, key: str, user_id: int) -> None:
+        i = bisect_left(self.keys, key)
+        while i < len(self.keys) and self.keys[i] == key:
+            if self.ids[i] == user_id:
+                del self.keys[i]
+                del self.ids[i]
+                return
+            i += 1
+
+    def prefix_range(self, prefix: str) -> range:
+        start = bisect_left(self.keys, prefix)
+        return range(start, bisect_left(self.keys, prefix + _PREFIX_END, lo=start))
+
+    def prefix(self, prefix: str) -> Iterator[int]:
+        for i in self.prefix_range(prefix):
+            yield self.ids[i]
+
+
+class UserSearchIndex:
+    """
+    In-process ranked prefix index over user emails and names.
+
+    `LIKE '%x%'` can't use an index, so instead the index keeps two sorted
+    arrays: full emails, and the individual words of names and emails. A query
+    is answered with binary searches plus a walk over just the matching range,
+    so its cost depends on the page size rather than the number of users.
+
+    Results are ranked: email prefix matches first, then word prefix matches,
+    both in alphabetical order of the matched key, so a key equal to the query
+    comes first. With several query words, every word must prefix-match one of
+    the user's words; the word with the narrowest range drives the walk and the
+    others are checked per candidate.
+
+    The index is built in a background thread on first use, since that takes
+    seconds for millions of users; until it is ready `search` returns None and
+    callers fall back to an indexed email prefix query. `crud_user` keeps it in
+    sync for writes made by this process, and `sync` periodically picks up
+    users created or changed by other workers through the `updated_at` index.
+    Deleted users are dropped through `remove` once a search finds them missing.
+    """
+
+    # Upper bound on candidates inspected per query, so very short queries
+    # with several words can't degrade into a full walk of the index; a page
+    # left short by it is reported as truncated
+    max_scan = 5_000
+
+    def __init__(self, sync_interval: float = 5.0):
+        self.sync_interval = sync_interval
+        self._lock = threading.RLock()
+        self._emails = _SortedKeys()
+        self._words = _SortedKeys()
+        self._users: dict[int, tuple[str, str]] = {}
+        self._synced_at: datetime | None = None
+        self._loaded = False
+        self._loading = False
+        self._last_sync = 0.0
+
+    def load(self, rows: Iterable[tuple[int, str, str]], *, as_of: datetime | None = None) -> None:
+        """
+        Replaces the index contents with `(id, email, full_name)` rows, read
+        at `as_of` (naive UTC, default now); `sync` fetches changes after it.
+        """
+        users = {user_id: (email, full_name) for user_id, email, full_name in rows}
+        emails = _SortedKeys()
+        emails.load((email.lower(), user_id) for user_id, (email, _) in users.items())
+        words = _SortedKeys()
+        words.load(
+            (token, user_id)
+            for user_id, (email, full_name) in users.items()
+            for token in _tokens(email, full_name)
+        )
+        with self._lock:
+            self._users, self._emails, self._words = users, emails, words
+            self._synced_at = as_of or datetime.utcnow()
+            self._loaded = True
+            self._last_sync = time.monotonic()
+
+    def sync(self, db: Session) -> None:
+        """
+        Starts loading the index on first use, then fetches the users updated
+        since the previous sync. Pass a session on the primary: a lagging
+        replica could hold back writes for longer than the overlap.
+        """
+        if not self._loaded:
+            with self._lock:
+                if self._loading:
+                    return
+                self._loading = True
+            threading.Thread(
+                target=self._load_from_database, args=(db.get_bind(),), name="user-search-index", daemon=True
+            ).start()
+            return
+        if time.monotonic() - self._last_sync < self.sync_interval:
+            return
+        started = datetime.utcnow()
+        statement = (
+            select(User.id, User.email, User.full_name)
+            .where(User.updated_at > self._synced_at - _SYNC_OVERLAP)
+        )
+        for user_id, email, full_name in db.exec(statement).all():
+            self.add(user_id, email, full_name)
+        self._synced_at = started
+        self._last_sync = time.monotonic()
+
+    def _load_from_database(self, bind) -> None:
+        try:
+            with Session(bind) as db:
+                started = datetime.utcnow()
+                self.load(db.exec(select(User.id, User.email, User.full_name)).all(), as_of=started)
+        finally:
+            self._loading = False
+
+    @property
+    def ready(self) -> bool:
+        return self._loaded
+
+    def add(self, user_id: int, email: str, full_name: str) -> None:
+        with self._lock:
+            if not self._loaded:
+                return
+            if user_id in self._users:
+                self._remove(user_id)
+            self._users[user_id] = (email, full_name)
+            self._emails.add(email.lower(), user_id)
+            for token in _tokens(email, full_name):
+                self._words.add(token, user_id)
+
+    def remove(self, user_id: int) -> None:
+        with self._lock:
+            if user_id in self._users:
+                self._remove(user_id)
+
+    def clear(self) -> None:
+        """Drops the index contents; the next `sync` loads it again."""
+        with self._lock:
+            self._emails, self._words, self._users = _SortedKeys(), _SortedKeys(), {}
+            self._synced_at = None
+            self._loaded = False
+
+    def _remove(self, user_id: int) -> None:
+        email, full_name = self._users.pop(user_id)
+        self._emails.remove(email.lower(), user_id)
+        for token in _tokens(email, full_name):
+            self._words.remove(token, user_id)
+
+    def search(self, query: str, *, offset: int = 0, limit: int = 10) -> tuple[list[int], bool] | None:
+        """
+        Returns the ids of the matching users, best matches first, and whether
+        the page was cut short by `max_scan` (so later pages are empty though
+        more users may match); None while the index is loading.
+        """
+        if not self._loaded:
+            return None
+        terms = [term for term in _SPLIT.split(query.lower()) if term]
+        if not terms:
+            return [], False
+        query = query.strip().lower()
+
+        with self._lock:
+            driver = min(terms, key=lambda term: len(self._words.prefix_range(term)))
+            rest = [term for term in terms if term != driver]
+
+            def candidates() -> Iterator[int]:
+                if " " not in query:
+                    yield from self._emails.prefix(query)
+                yield from self._words.prefix(driver)
+
+            seen: set[int] = set()
+            matches: list[int] = []
+            truncated = False
+            for scanned, user_id in enumerate(candidates()):
+                if len(matches) >= offset + limit:
+                    break
+                if scanned >= self.max_scan:
+                    truncated = True
+                    break
+                if user_id in seen:
+                    continue
+                seen.add(user_id)
+                if rest:
+                    tokens = _tokens(*self._users[user_id])
+                    if not all(any(token.startswith(term) for token in tokens) for term in rest):
+                        continue
+                matches.append(user_id)
+        return matches[offset:offset + limit], truncated
+
+    def __len__(self) -> int:
+        return len(self._users)
+
+
+user_search_index = UserSearchIndex()
@@ -0,0 +1,46 @@
+from datetime import datetime
+
+from sqlalchemy import tuple_
+from sqlalchemy.orm import selectinload
+from sqlmodel import Session, select
+
+from app.core.events import change_hub
+from app.models.project_models import Comment
+from app.schemas.comment_schemas import CommentCreate, CommentRead
+
+
+def create_comment(db: Session, *, comment_in: CommentCreate, project_id: int, author_id: int) -> Comment:
+    db_comment = Comment.model_validate(comment_in, update={"project_id": project_id, "author_id": author_id})
+    db.add(db_comment)
+    db.commit()
+    db.refresh(db_comment)
+    change_hub.publish(
+        project_id, "comment.created", CommentRead.model_validate(db_comment).model_dump(mode="json")
+    )
+    return db_comment
+
+
+def get_comments_by_project(
+        db: Session,
+        *,
+        project_id: int,
+        before: tuple[datetime, int] | None = None,
+        limit: int = 50,
+) -> list[Comment]:
+    """
+    Returns a project's comments newest first, with their authors.
+
+    Pagination is keyset-based: pass the (created_at, id) of the last comment
+    of the previous page as `before`, so every page is a range scan of the
+    (project_id, created_at, id) index. Authors are loaded for the whole page
+    in one IN query.
+    """
+    statement = select(Comment).where(Comment.project_id == project_id)
+    if before is not None:
+        statement = statement.where(tuple_(Comment.created_at, Comment.id) < tuple_(*before))
+    statement = (
+        statement.order_by(Comment.created_at.desc(), Comment.id.desc())
+        .limit(limit)
+        .options(selectinload(Comment.author))
+    )
+    return db.exec(statement).all()
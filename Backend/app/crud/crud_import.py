@@ -0,0 +1,208 @@
+import codecs
+import csv
+import time
+from datetime import datetime
+from typing import Any, Callable, Iterable, Iterator
+
+import orjson
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy import insert, or_
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.core.events import change_hub
+from app.core.reminders import reminder_scheduler
+from app.crud.crud_project import bump_task_version
+from app.crud.crud_stats import apply_task_changes
+from app.models.project_models import Task
+from app.models.user_models import ProjectMemberLink, User
+from app.schemas.task_schemas import TaskImportError, TaskImportReport, TaskImportRow
+
+IMPORT_FORMATS = ("csv", "ndjson")
+
+# Validates straight through pydantic-core, skipping SQLModel's per-call
+# model_validate overhead, which dominates at import volumes
+_row_adapter = TypeAdapter(TaskImportRow)
+
+
+def iter_lines(chunks: Iterable[bytes]) -> Iterator[str]:
+    """Splits a stream of UTF-8 byte chunks into lines, keeping their line endings."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    for chunk in chunks:
+        pending += decoder.decode(chunk)
+        lines = pending.split("\n")
+        pending = lines.pop()
+        for line in lines:
+            yield line + "\n"
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
+
+
+def parse_records(lines: Iterable[str], format: str) -> Iterator[tuple[int, dict[str, Any] | str]]:
+    """
+    Yields (line number, record) for each row of a CSV or NDJSON stream.
+
+    CSV needs a header row; empty cells become missing values. A row that can't
+    be parsed is yielded as an error message instead of a dict.
+    """
+    if format == "csv":
+        reader = csv.DictReader(lines)
+        for record in reader:
+            if None in record:
+                yield reader.line_num, "Too many columns"
+                continue
+            yield reader.line_num, {key: value for key, value in record.items() if value not in ("", None)}
+        return
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = orjson.loads(line)
+        except orjson.JSONDecodeError as exc:
+            yield line_number, f"Invalid JSON: {exc}"
+            continue
+        yield line_number, record if isinstance(record, dict) else "Expected a JSON object"
+
+
+def _validation_message(exc: ValidationError) -> str:
+    error = exc.errors()[0]
+    location = ".".join(str(part) for part in error["loc"])
+    return f"{location}: {error['msg']}" if location else error["msg"]
+
+
+class TaskImporter:
+    """
+    Loads a stream of task rows into one project, a chunk at a time.
+
+    Each chunk of `chunk_size` rows is validated against `TaskImportRow`, its
+    assignees are resolved with one query for the ids and emails not seen in
+    earlier chunks, and the valid rows go in as one multi-row INSERT together
+    with the task counters and task version, then are committed. Rejected
+    rows are collected for the report instead of failing the import; chunks
+    already committed stay committed if a later one fails.
+    """
+
+    def __init__(
+            self,
+            db: Session,
+            *,
+            project_id: int,
+            chunk_size: int = settings.IMPORT_CHUNK_SIZE,
+            max_reported_errors: int = settings.IMPORT_MAX_REPORTED_ERRORS,
+            progress: Callable[[int, int], None] | None = None,
+    ):
+        self.db = db
+        self.project_id = project_id
+        self.chunk_size = chunk_size
+        self.max_reported_errors = max_reported_errors
+        self.progress = progress
+        self.imported = 0
+        self.rejected = 0
+        self.chunks = 0
+        self.errors: list[TaskImportError] = []
+        # Assignee lookups carried over between chunks: member ids and emails
+        # resolved to member ids, plus the ones known not to be members
+        self._member_ids: set[int] = set()
+        self._member_emails: dict[str, int] = {}
+        self._non_member_ids: set[int] = set()
+        self._non_member_emails: set[str] = set()
+
+    def run(self, records: Iterable[tuple[int, dict[str, Any] | str]]) -> TaskImportReport:
+        started = time.perf_counter()
+        chunk: list[tuple[int, dict[str, Any] | str]] = []
+        for record in records:
+            chunk.append(record)
+            if len(chunk) >= self.chunk_size:
+                self._write_chunk(chunk)
+                chunk = []
+        if chunk:
+            self._write_chunk(chunk)
+        if self.imported:
+            # Rows go in without their ids coming back, so they aren't tracked one by one
+            reminder_scheduler.reload()
+        elapsed = time.perf_counter() - started
+        return TaskImportReport(
+            imported=self.imported,
+            rejected=self.rejected,
+            chunks=self.chunks,
+            elapsed_s=elapsed,
+            rows_per_s=self.imported / elapsed if elapsed else 0.0,
+            errors=self.errors,
+        )
+
+    def _reject(self, line: int, error: str) -> None:
+        self.rejected += 1
+        if len(self.errors) < self.max_reported_errors:
+            self.errors.append(TaskImportError(line=line, error=error))
+
+    def _resolve_assignees(self, rows: list[tuple[int, TaskImportRow]]) -> None:
+        ids = {row.assignee_id for _, row in rows if row.assignee_id is not None}
+        ids -= self._member_ids | self._non_member_ids
+        emails = {row.assignee_email.lower() for _, row in rows if row.assignee_email is not None}
+        emails -= self._member_emails.keys() | self._non_member_emails
+        if not ids and not emails:
+            return
+        statement = (
+            select(User.id, User.email)
+            .join(ProjectMemberLink, ProjectMemberLink.user_id == User.id)
+            .where(ProjectMemberLink.project_id == self.project_id)
+            .where(or_(User.id.in_(ids), User.email.in_(emails)))
+        )
+        for user_id, email in self.db.exec(statement).all():
+            self._member_ids.add(user_id)
+            self._member_emails[email.lower()] = user_id
+        self._non_member_ids |= ids - self._member_ids
+        self._non_member_emails |= emails - self._member_emails.keys()
+
+    def _write_chunk(self, chunk: list[tuple[int, dict[str, Any] | str]]) -> None:
+        rows: list[tuple[int, TaskImportRow]] = []
+        for line, record in chunk:
+            if isinstance(record, str):
+                self._reject(line, record)
+                continue
+            try:
+                rows.append((line, _row_adapter.validate_python(record)))
+            except ValidationError as exc:
+                self._reject(line, _validation_message(exc))
+        self._resolve_assignees(rows)
+
+        now = datetime.utcnow()
+        values = []
+        for line, row in rows:
+            assignee_id = row.assignee_id
+            if row.assignee_email is not None:
+                assignee_id = self._member_emails.get(row.assignee_email.lower())
+                if assignee_id is None:
+                    self._reject(line, f"Assignee {row.assignee_email} is not a member of this project")
+                    continue
+            elif assignee_id is not None and assignee_id not in self._member_ids:
+                self._reject(line, f"Assignee {assignee_id} is not a member of this project")
+                continue
+            values.append({
+                "title": row.title,
+                "description": row.description,
+                "status": row.status,
+                "created_at": now,
+                "updated_at": now,
+                "due_date": row.due_date,
+                "project_id": self.project_id,
+                "assignee_id": assignee_id,
+            })
+
+        self.chunks += 1
+        if values:
+            # Core insert against the table: one executemany, no ORM bulk-insert grouping by None columns
+            self.db.execute(insert(Task.__table__), values)
+            apply_task_changes(self.db, [
+                (None, (self.project_id, value["status"], value["assignee_id"], value["due_date"]))
+                for value in values
+            ])
+            bump_task_version(self.db, project_id=self.project_id)
+            self.db.commit()
+            self.imported += len(values)
+            # One event per chunk rather than per task; subscribers refetch
+            change_hub.publish(self.project_id, "task.imported", {"count": len(values), "total": self.imported})
+        if self.progress is not None:
+            self.progress(self.imported, self.rejected)
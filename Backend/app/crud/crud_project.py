@@ -1,50 +1,268 @@
+import importlib
+from datetime import datetime
+from functools import lru_cache
 from typing import List
 
+from sqlalchemy import bindparam, delete, insert, update
+from sqlalchemy.orm import selectinload
 from sqlmodel import select, Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.models.project_models import Project
+from app.core.access import project_access
+from app.core.events import change_hub
+from app.core.serialization import result_rows
+from app.db.database import get_shard_map
+from app.db.unit_of_work import commit, insert_returning, update_returning
+from app.models.project_models import Project, ProjectShard, ProjectTaskVersion, SyncTombstone, Task
 from app.models.user_models import ProjectMemberLink, User
 from app.schemas.project_schemas import ProjectCreate, ProjectUpdate
+from app.schemas.task_schemas import TaskRead
+from app.schemas.user_schemas import UserPublic
 
 
 def get_project_by_id(db:Session,project_id:int) -> Project|None:
     return db.get(Project, project_id)
 
 
+# Dialects with INSERT ... ON CONFLICT, as in crud_stats
+_ON_CONFLICT_DIALECTS = {"sqlite", "postgresql"}
+
+
+def get_project_detail(db:Session,*,project_id:int) -> Project|None:
+    """Loads a project with its members and tasks, each in one extra IN query."""
+    statement = (
+        select(Project)
+        .where(Project.id == project_id)
+        .options(selectinload(Project.members), selectinload(Project.tasks))
+    )
+    return db.exec(statement).first()
+
+
+def get_project_detail_rows(db:Session,*,project_id:int,fields:dict[str, tuple[str, ...] | None]) -> dict|None:
+    """
+    A ProjectDetail-shaped dict of just `fields`, as parsed by `parse_fields`,
+    plus the project's `version`. Only the requested columns are selected, and
+    members and tasks are each queried only when asked for.
+    """
+    columns = [getattr(Project, name) for name in ("name", "description") if name in fields]
+    project = db.execute(select(Project.version, *columns).where(Project.id == project_id)).first()
+    if project is None:
+        return None
+    detail = dict(project._mapping)
+    if "members" in fields:
+        names = fields["members"] or tuple(UserPublic.model_fields)
+        statement = (
+            select(*(getattr(User, name) for name in names))
+            .join(ProjectMemberLink)
+            .where(ProjectMemberLink.project_id == project_id)
+            .order_by(User.id)
+        )
+        detail["members"] = result_rows(db.execute(statement))
+    if "tasks" in fields:
+        names = fields["tasks"] or tuple(TaskRead.model_fields)
+        statement = select(*(getattr(Task, name) for name in names)).where(Task.project_id == project_id).order_by(Task.id)
+        detail["tasks"] = result_rows(db.execute(statement))
+    return detail
+
+
+def get_project_version(db:Session,*,project_id:int) -> int|None:
+    return db.exec(select(Project.version).where(Project.id == project_id)).first()
+
+
+def bump_project_version(db:Session,*,project_id:int) -> None:
+    """
+    Advances the project's version in the caller's transaction.
+
+    Every write that changes the project's own fields or members in what
+    `get_project_detail` returns must call this (or
+    `bump_member_project_versions`) before committing; task writes call
+    `bump_task_version` instead.
+    """
+    db.exec(update(Project).where(Project.id == project_id).values(version=Project.version + 1))
+
+
+def get_task_version(db:Session,*,project_id:int) -> int:
+    version = db.exec(select(ProjectTaskVersion.version).where(ProjectTaskVersion.project_id == project_id)).first()
+    return version or 0
+
+
+@lru_cache
+def _bump_task_version_statements(dialect: str) -> tuple:
+    """
+    An upsert advancing a project's task version, or where the dialect has
+    none, an (update, insert) pair for the insert to run when the update
+    finds no row. Both take the project id as `project`.
+    """
+    table = ProjectTaskVersion.__table__
+    if dialect in _ON_CONFLICT_DIALECTS:
+        statement = importlib.import_module(f"sqlalchemy.dialects.{dialect}").insert(table)
+        statement = statement.values(project_id=bindparam("project"), version=1)
+        return (statement.on_conflict_do_update(index_elements=["project_id"], set_={"version": table.c.version + 1}),)
+    return (
+        update(table).where(table.c.project_id == bindparam("project")).values(version=table.c.version + 1),
+        insert(table).values(project_id=bindparam("project"), version=1),
+    )
+
+
+def bump_task_version(db:Session,*,project_id:int) -> None:
+    """
+    Advances the version of the project's tasks in the caller's transaction,
+    which also locks the project's task writes against each other. Every
+    write to a project's tasks must call this before committing.
+
+    The row lives next to the tasks, on the project's shard, so task writes
+    never touch the project row on the global database.
+    """
+    statements = _bump_task_version_statements(db.get_bind(ProjectTaskVersion).dialect.name)
+    if db.execute(statements[0], {"project": project_id}).rowcount == 0:
+        db.execute(statements[1], {"project": project_id})
+
+
+def bump_member_project_versions(db:Session,*,user_id:int) -> None:
+    """Advances the version of every project the user belongs to, e.g. after a profile change."""
+    project_ids = select(ProjectMemberLink.project_id).where(ProjectMemberLink.user_id == user_id)
+    db.exec(update(Project).where(Project.id.in_(project_ids)).values(version=Project.version + 1))
+
+
 def get_project_by_user(db:Session,user_id:int) -> List[Project]:
     statement = select(Project).join(ProjectMemberLink).where(ProjectMemberLink.user_id == user_id)
     return db.exec(statement).all()
 
 
+def get_member_ids(db:Session,*,project_id:int,user_ids:set[int]) -> set[int]:
+    """Returns which of `user_ids` are members of the project, in a single query."""
+    if not user_ids:
+        return set()
+    statement = select(ProjectMemberLink.user_id).where(
+        ProjectMemberLink.project_id == project_id, ProjectMemberLink.user_id.in_(user_ids)
+    )
+    return set(db.exec(statement).all())
+
+
+def _placement_statement(project_id:int):
+    """Records the shard of a new project when sharded; None otherwise."""
+    shard_map = get_shard_map()
+    if not shard_map.sharded:
+        return None
+    return insert(ProjectShard).values(project_id=project_id, shard=shard_map.place(project_id))
+
+
 def create_project_with_owner(db:Session,*,project_in:ProjectCreate,owner_id:int) -> Project:
-    db_project = Project.model_validate(project_in, update={"owner_id": owner_id})
-    owner=db.get(User,owner_id)
-    if not owner:
+    """Creates a project with its owner as the first member; returns it as read back by the INSERT, detached."""
+    if not db.get(User, owner_id):
         raise ValueError("Owner not found")
 
-    db_project.members.append(owner)
-    db.add(db_project)
-    db.commit()
-    db.refresh(db_project)
-
+    db_project = insert_returning(db, Project.model_validate(project_in, update={"owner_id": owner_id}))
+    db.execute(insert(ProjectMemberLink.__table__).values(
+        user_id=owner_id, project_id=db_project.id, joined_at=datetime.utcnow()
+    ))
+    placement = _placement_statement(db_project.id)
+    if placement is not None:
+        db.execute(placement)
+    commit(db, after=lambda: project_access.invalidate(user_id=owner_id, project_id=db_project.id))
     return db_project
 
 
+def _publish_project_updated(project: Project) -> None:
+    change_hub.publish(project.id, "project.updated", {"name": project.name, "description": project.description})
+
+
 def update_project(
         db: Session, *, db_project: Project, project_in: ProjectUpdate) -> Project:
-    update_data = project_in.model_dump(exclude_unset=True)
+    """Updates a project's fields; returns it as read back by the UPDATE, a detached copy, rather than `db_project`."""
+    values = {
+        **project_in.model_dump(exclude_unset=True),
+        "updated_at": datetime.utcnow(),
+        # The version bump of `bump_project_version`, in the same statement
+        "version": Project.version + 1,
+    }
+    project = update_returning(db, Project, id=db_project.id, values=values)
+    commit(db, after=lambda: _publish_project_updated(project))
+    return project
+
+
+@lru_cache
+def _insert_member_statement(dialect: str):
+    table = ProjectMemberLink.__table__
+    if dialect in _ON_CONFLICT_DIALECTS:
+        return importlib.import_module(f"sqlalchemy.dialects.{dialect}").insert(table).on_conflict_do_nothing()
+    return insert(table)
+
+
+def add_member_to_project(db:Session,*,project:Project,user:User) -> bool:
+    """
+    Adds the user to the project; returns False if they already were a member.
+
+    The link row is inserted directly, ignoring a conflict with an existing
+    one, so two concurrent adds of the same user can't both try to insert it.
+    """
+    # Read up front: the commit expires both objects
+    user_id, project_id = user.id, project.id
+    statement = _insert_member_statement(db.get_bind().dialect.name)
+    added = db.execute(statement, {"user_id": user_id, "project_id": project_id, "joined_at": datetime.utcnow()})
+    if added.rowcount == 0:
+        return False
+    bump_project_version(db, project_id=project_id)
+
+    def after_commit() -> None:
+        project_access.invalidate(user_id=user_id, project_id=project_id)
+        change_hub.publish(project_id, "member.added", {"user_id": user_id})
+
+    commit(db, after=after_commit)
+    return True
+
 
-    db_project.sqlmodel_update(update_data)
+def remove_member_from_project(db:Session,*,project_id:int,user_id:int) -> bool:
+    """
+    Removes the user from the project; returns False if they weren't a member.
 
+    The project is tombstoned for the user's delta sync. When sharded, the
+    tombstone is on the project's shard and commits right after the link
+    deletion, not atomically with it.
+    """
+    removed = db.execute(
+        delete(ProjectMemberLink)
+        .where(ProjectMemberLink.user_id == user_id)
+        .where(ProjectMemberLink.project_id == project_id)
+    )
+    if removed.rowcount == 0:
+        return False
+    db.add(SyncTombstone(entity="project", entity_id=project_id, project_id=project_id, user_id=user_id))
+    bump_project_version(db, project_id=project_id)
+
+    def after_commit() -> None:
+        project_access.invalidate(user_id=user_id, project_id=project_id)
+        change_hub.publish(project_id, "member.removed", {"user_id": user_id})
+
+    commit(db, after=after_commit)
+    return True
+
+
+# Async variants, for endpoints running on `get_async_session`
+
+async def get_project_rows_by_user_async(db:AsyncSession,*,user_id:int) -> list[dict]:
+    """ProjectRead-shaped dicts of the user's projects, read straight from the columns."""
+    statement = (
+        select(Project.name, Project.description, Project.id, Project.owner_id)
+        .join(ProjectMemberLink)
+        .where(ProjectMemberLink.user_id == user_id)
+    )
+    return result_rows(await db.execute(statement))
+
+
+async def create_project_with_owner_async(db:AsyncSession,*,project_in:ProjectCreate,owner_id:int) -> Project:
+    owner = await db.get(User, owner_id)
+    if not owner:
+        raise ValueError("Owner not found")
+
+    db_project = Project.model_validate(project_in, update={"owner_id": owner_id})
     db.add(db_project)
-    db.commit()
-    db.refresh(db_project)
+    await db.flush()
+    # Insert the link row directly; appending to `members` would lazy-load it
+    db.add(ProjectMemberLink(user_id=owner_id, project_id=db_project.id))
+    placement = _placement_statement(db_project.id)
+    if placement is not None:
+        await db.execute(placement)
+    await db.commit()
+    project_access.invalidate(user_id=owner_id, project_id=db_project.id)
     return db_project
-
-def add_member_to_project(db:Session,*,project:Project,user:User) -> Project:
-    if user not in project.members:
-        project.members.append(user)
-        db.add(project)
-        db.commit()
-        db.refresh(project)
-    return project
\ No newline at end of file
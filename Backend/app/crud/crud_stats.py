@@ -0,0 +1,220 @@
+import importlib
+from collections import Counter
+from datetime import date, datetime, time
+from functools import lru_cache
+from typing import Iterable
+
+from sqlalchemy import delete, func, insert, union_all, update
+from sqlmodel import Session, select
+
+from app.models.project_models import ArchivedTask, ProjectDueCounter, ProjectTaskCounter, Task, TaskStatus
+
+# What a task contributes to the counters: (project_id, status, assignee_id, due_date)
+TaskState = tuple[int, TaskStatus, int | None, datetime | None]
+
+# Dialects with INSERT ... ON CONFLICT; their modules are imported on first use,
+# since importing the postgresql dialect pulls in all of its drivers' modules
+_UPSERT_DIALECTS = {"sqlite", "postgresql"}
+
+
+def task_state(task: Task) -> TaskState:
+    return (task.project_id, TaskStatus(task.status), task.assignee_id, task.due_date)
+
+
+def _deltas(changes: Iterable[tuple[TaskState | None, TaskState | None]]):
+    """Folds (before, after) task states into net per-row counter changes."""
+    task_deltas: Counter = Counter()
+    due_deltas: Counter = Counter()
+    for before, after in changes:
+        for state, sign in ((before, -1), (after, 1)):
+            if state is None:
+                continue
+            project_id, status, assignee_id, due_date = state
+            task_deltas[(project_id, status, assignee_id or 0)] += sign
+            if due_date is not None and status != TaskStatus.DONE:
+                due_deltas[(project_id, due_date.date())] += sign
+    return (
+        sorted((key, delta) for key, delta in task_deltas.items() if delta),
+        sorted((key, delta) for key, delta in due_deltas.items() if delta),
+    )
+
+
+_COUNTERS = (
+    (ProjectTaskCounter, ("project_id", "status", "assignee_id")),
+    (ProjectDueCounter, ("project_id", "due_day")),
+)
+
+
+@lru_cache(maxsize=None)
+def _upsert_statement(dialect: str, model) -> object:
+    """`INSERT ... ON CONFLICT DO UPDATE count = count + excluded.count`, built once per counter table."""
+    table = model.__table__
+    keys = [column.name for column in table.primary_key.columns]
+    statement = importlib.import_module(f"sqlalchemy.dialects.{dialect}").insert(table)
+    return statement.on_conflict_do_update(
+        index_elements=keys, set_={"count": table.c.count + statement.excluded.count}
+    )
+
+
+def _delta_statements(dialect: str, changes):
+    """
+    Builds the counter updates for a set of task changes.
+
+    Upserts go out as one executemany per counter table, with the rows in key
+    order so concurrent transactions lock them in the same order. On dialects
+    without an upsert, returns (update, insert) pairs for the callers to fall
+    back to, one per row.
+    """
+    statements = []
+    for (model, keys), deltas in zip(_COUNTERS, _deltas(changes)):
+        if not deltas:
+            continue
+        if dialect in _UPSERT_DIALECTS:
+            params = [{**dict(zip(keys, key)), "count": delta} for key, delta in deltas]
+            statements.append((_upsert_statement(dialect, model), params))
+            continue
+        table = model.__table__
+        for key, delta in deltas:
+            values = dict(zip(keys, key))
+            condition = [table.c[name] == value for name, value in values.items()]
+            statements.append((
+                update(table).where(*condition).values(count=table.c.count + delta),
+                insert(table).values(**values, count=delta),
+            ))
+    return statements
+
+
+def apply_task_changes(db: Session, changes: Iterable[tuple[TaskState | None, TaskState | None]]) -> None:
+    """
+    Updates the project task counters in the caller's transaction.
+
+    Every write that creates, deletes or changes the status, assignee or due
+    date of a task must call this with its (before, after) states, None for a
+    task that didn't or no longer exists.
+    """
+    for statement, params in _delta_statements(db.get_bind().dialect.name, changes):
+        if isinstance(params, list):
+            db.execute(statement, params)
+        elif db.execute(statement).rowcount == 0:
+            db.execute(params)
+
+
+def get_project_stats(db: Session, *, project_id: int, now: datetime | None = None) -> dict:
+    """
+    Task counts of a project by status and by assignee, plus its overdue count.
+
+    Reads the counter rows instead of the tasks, so the cost doesn't grow with
+    the project. Overdue tasks are summed from the per-day counters before
+    today, plus an index range over the tasks due earlier today.
+    """
+    now = now or datetime.utcnow()
+    start_of_day = datetime.combine(now.date(), time.min)
+
+    by_status = {status: 0 for status in TaskStatus}
+    assignees: dict[int | None, dict[TaskStatus, int]] = {}
+    rows = db.exec(
+        select(ProjectTaskCounter.status, ProjectTaskCounter.assignee_id, ProjectTaskCounter.count)
+        .where(ProjectTaskCounter.project_id == project_id, ProjectTaskCounter.count != 0)
+    ).all()
+    for status, assignee_id, count in rows:
+        by_status[status] += count
+        assignee = assignees.setdefault(assignee_id or None, {status: 0 for status in TaskStatus})
+        assignee[status] += count
+
+    overdue_before_today = db.exec(
+        select(func.coalesce(func.sum(ProjectDueCounter.count), 0))
+        .where(ProjectDueCounter.project_id == project_id, ProjectDueCounter.due_day < now.date())
+    ).one()
+    overdue_today = db.exec(
+        select(func.count()).select_from(Task).where(
+            Task.project_id == project_id,
+            Task.due_date >= start_of_day,
+            Task.due_date < now,
+            Task.status != TaskStatus.DONE,
+        )
+    ).one()
+
+    return {
+        "project_id": project_id,
+        "total": sum(by_status.values()),
+        "by_status": by_status,
+        "overdue": overdue_before_today + overdue_today,
+        "assignees": [
+            {"assignee_id": assignee_id, "total": sum(counts.values()), "by_status": counts}
+            for assignee_id, counts in sorted(assignees.items(), key=lambda item: item[0] or 0)
+        ],
+    }
+
+
+def _counted_tasks(project_id: int | None):
+    """What the counters count: the tasks, plus the archived ones that weren't deleted."""
+    columns = ("project_id", "status", "assignee_id", "due_date")
+    hot = select(*(getattr(Task, column) for column in columns))
+    archived = select(*(getattr(ArchivedTask, column) for column in columns)).where(ArchivedTask.deleted.is_(False))
+    if project_id is not None:
+        hot = hot.where(Task.project_id == project_id)
+        archived = archived.where(ArchivedTask.project_id == project_id)
+    return union_all(hot, archived).subquery("counted_task")
+
+
+def _counter_sources(project_id: int | None):
+    """SELECTs computing the counter rows from the tasks themselves."""
+    tasks = _counted_tasks(project_id)
+    # Labelled so GROUP BY repeats the name rather than a second bound parameter
+    assignee_id = func.coalesce(tasks.c.assignee_id, 0).label("counter_assignee_id")
+    task_counts = select(
+        tasks.c.project_id, tasks.c.status, assignee_id, func.count()
+    ).group_by(tasks.c.project_id, tasks.c.status, assignee_id)
+    due_day = func.date(tasks.c.due_date).label("counter_due_day")
+    due_counts = (
+        select(tasks.c.project_id, due_day, func.count())
+        .where(tasks.c.due_date.is_not(None), tasks.c.status != TaskStatus.DONE)
+        .group_by(tasks.c.project_id, due_day)
+    )
+    return task_counts, due_counts
+
+
+def _as_date(value) -> date:
+    # SQLite's date() returns text
+    return date.fromisoformat(value) if isinstance(value, str) else value
+
+
+def verify_task_stats(db: Session, *, project_id: int | None = None) -> list[str]:
+    """Compares the counters with the tasks, for one project or all; returns a line per drifted row."""
+    task_counts, due_counts = _counter_sources(project_id)
+    expected_tasks = {(p, TaskStatus(s), a): c for p, s, a, c in db.exec(task_counts).all()}
+    expected_due = {(p, _as_date(d)): c for p, d, c in db.exec(due_counts).all()}
+
+    stored_tasks_query = select(
+        ProjectTaskCounter.project_id, ProjectTaskCounter.status, ProjectTaskCounter.assignee_id, ProjectTaskCounter.count
+    ).where(ProjectTaskCounter.count != 0)
+    stored_due_query = select(
+        ProjectDueCounter.project_id, ProjectDueCounter.due_day, ProjectDueCounter.count
+    ).where(ProjectDueCounter.count != 0)
+    if project_id is not None:
+        stored_tasks_query = stored_tasks_query.where(ProjectTaskCounter.project_id == project_id)
+        stored_due_query = stored_due_query.where(ProjectDueCounter.project_id == project_id)
+    stored_tasks = {(p, s, a): c for p, s, a, c in db.exec(stored_tasks_query).all()}
+    stored_due = {(p, d): c for p, d, c in db.exec(stored_due_query).all()}
+
+    drift = []
+    for name, expected, stored in (("tasks", expected_tasks, stored_tasks), ("due", expected_due, stored_due)):
+        for key in sorted(expected.keys() | stored.keys(), key=str):
+            if expected.get(key, 0) != stored.get(key, 0):
+                drift.append(f"{name} {key}: stored {stored.get(key, 0)}, actual {expected.get(key, 0)}")
+    return drift
+
+
+def rebuild_task_stats(db: Session, *, project_id: int | None = None) -> None:
+    """Recomputes the counters from the tasks, for one project or all, and commits."""
+    task_counts, due_counts = _counter_sources(project_id)
+    clear_tasks = delete(ProjectTaskCounter)
+    clear_due = delete(ProjectDueCounter)
+    if project_id is not None:
+        clear_tasks = clear_tasks.where(ProjectTaskCounter.project_id == project_id)
+        clear_due = clear_due.where(ProjectDueCounter.project_id == project_id)
+    db.execute(clear_tasks)
+    db.execute(clear_due)
+    db.execute(insert(ProjectTaskCounter).from_select(["project_id", "status", "assignee_id", "count"], task_counts))
+    db.execute(insert(ProjectDueCounter).from_select(["project_id", "due_day", "count"], due_counts))
+    db.commit()
@@ -0,0 +1,108 @@
+from datetime import datetime
+
+from sqlalchemy import delete, or_, tuple_
+from sqlmodel import Session, select
+
+from app.core.serialization import result_rows
+from app.crud.crud_task import TASK_READ_COLUMNS
+from app.db.database import get_shard_map
+from app.models.project_models import Project, SyncTombstone, Task
+from app.models.user_models import ProjectMemberLink
+
+
+def get_changes(
+        db: Session,
+        *,
+        user_id: int,
+        since: datetime | None,
+        after: tuple | None = None,
+        limit: int,
+) -> tuple[dict, tuple | None]:
+    """
+    What changed in the user's projects after `since`, or everything if it is None.
+
+    Returns ProjectRead- and TaskRead-shaped rows of the projects and tasks
+    created or updated since then, plus the ids of deleted tasks and of
+    projects the user lost access to. Projects the user joined since then are
+    sent whole, tasks included. Tasks come in (updated_at, id) order, or
+    (project_id, id) for a full snapshot so it is read straight off the index,
+    at most `limit` of them; if there are more, the second value is the
+    position to pass back as `after` (with the same `since`) for the rest.
+
+    Sharded, tasks and tombstones are read from each shard holding some of
+    the user's projects and merged; project tombstones from every shard.
+    """
+    shard_map = get_shard_map()
+    member_project_ids = select(ProjectMemberLink.project_id).where(ProjectMemberLink.user_id == user_id)
+    if shard_map.sharded:
+        member_project_ids = db.exec(member_project_ids).all()
+    joined: list[int] = []
+    if since is not None:
+        joined = db.exec(
+            select(ProjectMemberLink.project_id)
+            .where(ProjectMemberLink.user_id == user_id, ProjectMemberLink.joined_at > since)
+        ).all()
+
+    projects = select(Project.name, Project.description, Project.id, Project.owner_id).where(
+        Project.id.in_(member_project_ids)
+    )
+    tasks = select(*TASK_READ_COLUMNS, Task.updated_at)
+    if since is not None:
+        projects = projects.where(or_(Project.updated_at > since, Project.id.in_(joined)))
+        changed = Task.updated_at > since
+        tasks = tasks.where(or_(changed, Task.project_id.in_(joined)) if joined else changed)
+    order = (Task.project_id, Task.id) if since is None else (Task.updated_at, Task.id)
+    if after is not None:
+        tasks = tasks.where(tuple_(*order) > tuple_(*after))
+    tasks = tasks.order_by(*order).limit(limit + 1)
+
+    task_rows: list[dict] = []
+    deleted_task_ids: list[int] = []
+    with shard_map.sessions_for(db, member_project_ids) as groups:
+        for session, project_ids in groups:
+            task_rows += result_rows(session.execute(tasks.where(Task.project_id.in_(project_ids))))
+            if since is not None:
+                deleted_task_ids += session.exec(
+                    select(SyncTombstone.entity_id).where(
+                        SyncTombstone.entity == "task",
+                        SyncTombstone.project_id.in_(project_ids),
+                        SyncTombstone.deleted_at > since,
+                    )
+                ).all()
+    if len(groups) > 1:
+        task_rows.sort(key=lambda row: tuple(row[column.key] for column in order))
+
+    next_after = None
+    if len(task_rows) > limit:
+        task_rows = task_rows[:limit]
+        next_after = tuple(task_rows[-1][column.key] for column in order)
+    for row in task_rows:
+        del row["updated_at"]
+
+    deleted_project_ids: list[int] = []
+    if since is not None:
+        # Projects the user was removed from and re-added to since are sent again in full instead
+        statement = select(SyncTombstone.project_id.distinct()).where(
+            SyncTombstone.entity == "project",
+            SyncTombstone.user_id == user_id,
+            SyncTombstone.deleted_at > since,
+            SyncTombstone.project_id.not_in(member_project_ids),
+        )
+        with shard_map.shard_sessions(db) as sessions:
+            for session in sessions:
+                deleted_project_ids += session.exec(statement).all()
+
+    changes = {
+        "projects": result_rows(db.execute(projects.order_by(Project.id))),
+        "tasks": task_rows,
+        "deleted_project_ids": deleted_project_ids,
+        "deleted_task_ids": deleted_task_ids,
+    }
+    return changes, next_after
+
+
+def purge_tombstones(db: Session, *, before: datetime) -> int:
+    """Deletes the tombstones recorded before `before` and commits; returns how many. Run it on each shard."""
+    deleted = db.exec(delete(SyncTombstone).where(SyncTombstone.deleted_at < before)).rowcount
+    db.commit()
+    return deleted
@@ -1,39 +1,499 @@
+from collections import defaultdict
+from datetime import datetime
+from functools import lru_cache
+from typing import Callable, Iterator
+
+from sqlalchemy import bindparam, delete, insert, literal, tuple_, union_all
 from sqlmodel import Session, select
 
-from app.models.project_models import Task
-from app.schemas.task_schemas import TaskCreate, TaskUpdate
+from app.core.events import change_hub
+from app.core.reminders import reminder_scheduler
+from app.core.serialization import result_rows
+from app.crud.crud_project import bump_task_version
+from app.crud.crud_stats import apply_task_changes, task_state
+from app.db.database import get_shard_map
+from app.db.unit_of_work import commit, insert_returning, rollback, update_returning
+from app.models.project_models import ArchivedTask, SyncTombstone, Task, TaskStatus
+from app.models.user_models import ProjectMemberLink
+from app.schemas.task_schemas import TaskCreate, TaskRead, TaskUpdate, TaskBatchUpdateItem
+
+
+def _publish_task(kind: str, task: Task) -> None:
+    """Emits a task change to the project's subscribers and reminder scheduler; call after the commit."""
+    change_hub.publish(task.project_id, kind, TaskRead.model_validate(task).model_dump(mode="json"))
+    reminder_scheduler.track(task.id, status=task.status, due_date=task.due_date)
 
 
 def get_task(db: Session, task_id:int) -> Task | None:
     return db.get(Task, task_id)
 
-def get_tasks_by_project(db: Session,*, project_id:int) -> list[Task]:
-    statement=select(Task).where(Task.project_id == project_id)
+# TaskRead's fields, in its field order, for the column-only fast path
+TASK_READ_COLUMNS = (
+    Task.title, Task.description, Task.due_date, Task.id, Task.status, Task.project_id, Task.assignee_id,
+)
+
+def _tasks_by_project_statement(
+        *,
+        project_id: int,
+        model: type[Task] | type[ArchivedTask] = Task,
+        columns: tuple | None = None,
+        status: TaskStatus | None = None,
+        assignee_id: int | None = None,
+        due_after: datetime | None = None,
+        due_before: datetime | None = None,
+        after_id: int | None = None,
+        limit: int | None = None,
+):
+    # `columns` are Task's; they are taken from `model` by name
+    statement = select(*(getattr(model, column.key) for column in columns)) if columns else select(model)
+    statement = statement.where(model.project_id == project_id)
+    if model is ArchivedTask:
+        statement = statement.where(ArchivedTask.deleted.is_(False))
+    if status is not None:
+        statement = statement.where(model.status == status)
+    if assignee_id is not None:
+        statement = statement.where(model.assignee_id == assignee_id)
+    if due_after is not None:
+        statement = statement.where(model.due_date >= due_after)
+    if due_before is not None:
+        statement = statement.where(model.due_date < due_before)
+    if after_id is not None:
+        statement = statement.where(model.id > after_id)
+    statement = statement.order_by(model.id)
+    if limit is not None:
+        statement = statement.limit(limit)
+    return statement
+
+def get_tasks_by_project(db: Session,*, project_id:int, **filters) -> list[Task]:
+    """
+    Returns a project's tasks ordered by id, optionally filtered by status,
+    assignee_id and a due_after/due_before range.
+
+    Pagination is keyset-based: pass the last id of the previous page as
+    `after_id`, so every page is an index range scan of the same cost.
+    """
+    statement=_tasks_by_project_statement(project_id=project_id, **filters)
     tasks=db.exec(statement).all()
     return tasks
 
+def task_read_columns(fields: tuple[str, ...] | None) -> tuple:
+    """The TASK_READ_COLUMNS of the given TaskRead fields, in field order; all of them for None."""
+    if fields is None:
+        return TASK_READ_COLUMNS
+    return tuple(column for column in TASK_READ_COLUMNS if column.key in fields)
+
+def get_task_rows_by_project(
+        db: Session,
+        *,
+        project_id: int,
+        include_archived: bool = False,
+        fields: tuple[str, ...] | None = None,
+        **filters,
+) -> list[dict]:
+    """
+    Same as `get_tasks_by_project`, but returns TaskRead-shaped dicts read
+    straight from the columns, without building ORM objects.
+
+    `fields` narrows the rows to those TaskRead fields (plus `id`, which
+    orders them), and only their columns are selected.
+
+    With `include_archived`, the project's archived tasks (but not deleted
+    ones) are merged in by id, each table read as its own index range.
+    """
+    columns = task_read_columns(None if fields is None else (*fields, "id"))
+    statement = _tasks_by_project_statement(project_id=project_id, columns=columns, **filters)
+    if include_archived:
+        archived = _tasks_by_project_statement(
+            project_id=project_id, model=ArchivedTask, columns=columns, **filters
+        )
+        merged = union_all(select(statement.subquery()), select(archived.subquery())).subquery()
+        statement = select(merged).order_by(merged.c.id)
+        if filters.get("limit") is not None:
+            statement = statement.limit(filters["limit"])
+    return result_rows(db.execute(statement))
+
+def iter_task_rows_by_project(db: Session, *, project_id: int, batch_size: int = 1000) -> Iterator[list[dict]]:
+    """
+    Streams all of a project's TaskRead-shaped rows in id order, `batch_size` at a time.
+
+    Uses `yield_per`, so the driver fetches rows incrementally (a server-side
+    cursor on PostgreSQL) and only one batch is in memory at a time.
+    """
+    statement = _tasks_by_project_statement(project_id=project_id, columns=TASK_READ_COLUMNS)
+    result = db.execute(statement.execution_options(yield_per=batch_size))
+    keys = list(result.keys())
+    for partition in result.partitions():
+        yield [dict(zip(keys, row)) for row in partition]
+
+# The orders of a user's task queue, by the TaskRead fields that make up a
+# keyset position. Sorting by status follows the workflow, To-Do first
+ASSIGNED_TASK_SORTS = {
+    "due_date": ("due_date", "id"),
+    "status": ("status", "due_date", "id"),
+}
+
+def _assignee_is_member(sharded: bool):
+    """
+    Whether the task's project has the assignee_id parameter as a member;
+    sharded, whether it is one of the project_ids parameter instead, since
+    memberships are on another database.
+    """
+    if sharded:
+        return Task.project_id.in_(bindparam("project_ids", expanding=True))
+    # A correlated EXISTS rather than `project_id IN (...)`, which planners
+    # turn into one probe of the project indexes per membership
+    return select(ProjectMemberLink.project_id).where(
+        ProjectMemberLink.user_id == bindparam("assignee_id"), ProjectMemberLink.project_id == Task.project_id
+    ).exists()
+
+def _read_member_tasks(db: Session, statement, params: dict, *, user_id: int, key: Callable, limit: int) -> list[dict]:
+    """
+    Runs a query of the tasks in the user's projects on `db`, or when
+    sharded, on each shard with its projects as the project_ids parameter,
+    merging the rows by `key` up to `limit`.
+    """
+    shard_map = get_shard_map()
+    if not shard_map.sharded:
+        return result_rows(db.execute(statement, params))
+    member_project_ids = select(ProjectMemberLink.project_id).where(ProjectMemberLink.user_id == user_id)
+    rows = []
+    with shard_map.sessions_for(db, member_project_ids) as groups:
+        for session, project_ids in groups:
+            rows += result_rows(session.execute(statement, {**params, "project_ids": project_ids}))
+    rows.sort(key=key)
+    return rows[:limit]
+
+@lru_cache
+def _assigned_tasks_statement(
+        sort: str, status: TaskStatus | None, after_status: TaskStatus | None, after_dated: bool | None, sharded: bool,
+):
+    """
+    The query of `get_task_rows_by_assignee` for one shape of arguments, built
+    once; `after_dated` is None without a position, else whether it has a due
+    date. The values go in the assignee_id, after_due_date, after_id and limit
+    parameters, plus project_ids when `sharded`.
+    """
+    statuses = list(TaskStatus) if status is None else [status]
+    is_member = _assignee_is_member(sharded)
+    ranges = []
+    for rank, range_status in enumerate(statuses):
+        range_after_dated = after_dated
+        if sort == "status" and after_dated is not None and range_status != after_status:
+            if rank < statuses.index(after_status):
+                continue
+            range_after_dated = None
+        for dated in (True, False):
+            statement = select(*TASK_READ_COLUMNS, literal(rank).label("status_rank")).where(
+                Task.assignee_id == bindparam("assignee_id"),
+                Task.status == range_status,
+                Task.due_date.is_not(None) if dated else Task.due_date.is_(None),
+                is_member,
+            )
+            if range_after_dated is False:
+                if dated:
+                    continue
+                statement = statement.where(Task.id > bindparam("after_id"))
+            elif range_after_dated and dated:
+                # Typed, so the datetime is bound the way the column stores it
+                after_due_date = bindparam("after_due_date", type_=Task.due_date.type)
+                statement = statement.where(tuple_(Task.due_date, Task.id) > tuple_(after_due_date, bindparam("after_id")))
+            ranges.append(statement.order_by(Task.due_date, Task.id).limit(bindparam("limit")))
+    if not ranges:
+        return None
+
+    merged = union_all(*(select(statement.subquery()) for statement in ranges)).subquery()
+    order = [merged.c.due_date.is_(None), merged.c.due_date, merged.c.id]
+    if sort == "status":
+        order.insert(0, merged.c.status_rank)
+    return select(merged).order_by(*order).limit(bindparam("limit"))
+
+def get_task_rows_by_assignee(
+        db: Session,
+        *,
+        assignee_id: int,
+        sort: str = "due_date",
+        status: TaskStatus | None = None,
+        after: dict | None = None,
+        limit: int,
+) -> list[dict]:
+    """
+    TaskRead-shaped rows of the tasks assigned to a user, across the projects
+    they are a member of, in one query.
+
+    `sort` is a key of ASSIGNED_TASK_SORTS; tasks without a due date come last.
+    Pagination is keyset-based: pass those fields of the last row of the
+    previous page as `after`.
+
+    The query reads the dated and the undated tasks of each status as ordered
+    ranges of the (assignee_id, status, due_date, id) index, each starting at
+    `after` and at most `limit` rows long, and merges them. A page costs the
+    same however many tasks the user has. Sharded, each shard holding some
+    of the user's projects runs it, and the pages are merged.
+    """
+    after = after or {}
+    sharded = get_shard_map().sharded
+    statement = _assigned_tasks_statement(
+        sort, status, after.get("status"), None if not after else after["due_date"] is not None, sharded
+    )
+    if statement is None:
+        return []
+    params = {
+        "assignee_id": assignee_id, "after_due_date": after.get("due_date"), "after_id": after.get("id"), "limit": limit,
+    }
+
+    def key(row: dict) -> tuple:
+        due_date = row["due_date"]
+        order = (due_date is None, due_date or datetime.min, row["id"])
+        return (row["status_rank"], *order) if sort == "status" else order
+
+    rows = _read_member_tasks(db, statement, params, user_id=assignee_id, key=key, limit=limit)
+    for row in rows:
+        del row["status_rank"]
+    return rows
+
+@lru_cache
+def _due_tasks_statement(after: bool, sharded: bool):
+    """
+    The query of `get_due_task_rows_by_assignee`, with or without a position;
+    the values go in the assignee_id, due_before, after_due_date, after_id
+    and limit parameters, plus project_ids when `sharded`.
+    """
+    is_member = _assignee_is_member(sharded)
+    # Typed, so the datetimes are bound the way the column stores them
+    due_before = bindparam("due_before", type_=Task.due_date.type)
+    after_due_date = bindparam("after_due_date", type_=Task.due_date.type)
+    ranges = []
+    for status in TaskStatus:
+        if status == TaskStatus.DONE:
+            continue
+        statement = select(*TASK_READ_COLUMNS).where(
+            Task.assignee_id == bindparam("assignee_id"), Task.status == status, Task.due_date < due_before, is_member
+        )
+        if after:
+            statement = statement.where(tuple_(Task.due_date, Task.id) > tuple_(after_due_date, bindparam("after_id")))
+        ranges.append(statement.order_by(Task.due_date, Task.id).limit(bindparam("limit")))
+    merged = union_all(*(select(statement.subquery()) for statement in ranges)).subquery()
+    return select(merged).order_by(merged.c.due_date, merged.c.id).limit(bindparam("limit"))
+
+def get_due_task_rows_by_assignee(
+        db: Session,
+        *,
+        assignee_id: int,
+        due_before: datetime,
+        after: dict | None = None,
+        limit: int,
+) -> list[dict]:
+    """
+    TaskRead-shaped rows of the open tasks assigned to a user, across the
+    projects they are a member of, that are due before `due_before`: overdue
+    and soon-due tasks, soonest due first. Pass the due_date and id of the
+    last row of the previous page as `after`.
+
+    Like `get_task_rows_by_assignee`, reads one range of the (assignee_id,
+    status, due_date, id) index per open status, each ending at `due_before`.
+    """
+    after = after or {}
+    params = {
+        "assignee_id": assignee_id, "due_before": due_before,
+        "after_due_date": after.get("due_date"), "after_id": after.get("id"), "limit": limit,
+    }
+    statement = _due_tasks_statement(bool(after), get_shard_map().sharded)
+    return _read_member_tasks(
+        db, statement, params, user_id=assignee_id, key=lambda row: (row["due_date"], row["id"]), limit=limit
+    )
+
 def create_task(db: Session,*, task_in:TaskCreate,project_id:int) -> Task:
-    db_task = Task.model_validate(task_in,update={"project_id":project_id})
-    db.add(db_task)
-    db.commit()
-    db.refresh(db_task)
+    """Creates a task; returns it as read back by the INSERT, detached from the session."""
+    db_task = insert_returning(db, Task.model_validate(task_in,update={"project_id":project_id}))
+    apply_task_changes(db, [(None, task_state(db_task))])
+    bump_task_version(db, project_id=project_id)
+    commit(db, after=lambda: _publish_task("task.created", db_task))
     return db_task
 
 
-def update_task(db: Session, *, db_task: Task, task_in: TaskUpdate) -> Task:
-    task_data=task_in.model_dump(exclude_unset=True)
-    for key,value in task_data.items():
-        setattr(db_task, key, value)
+def get_tasks_by_ids(db: Session, *, project_id: int, task_ids: set[int]) -> dict[int, Task]:
+    if not task_ids:
+        return {}
+    statement = select(Task).where(Task.project_id == project_id, Task.id.in_(task_ids))
+    return {task.id: task for task in db.exec(statement).all()}
 
-    db.add(db_task)
+
+def create_tasks(db: Session, *, tasks_in: list[TaskCreate], project_id: int) -> list[Task]:
+    """
+    Creates many tasks in one transaction.
+
+    The rows go out as a single batched INSERT on flush, and one SELECT after the
+    commit reloads them all instead of refreshing each task separately.
+    """
+    db_tasks = [Task.model_validate(task_in, update={"project_id": project_id}) for task_in in tasks_in]
+    db.add_all(db_tasks)
+    db.flush()
+    task_ids = {db_task.id for db_task in db_tasks}
+    apply_task_changes(db, [(None, task_state(db_task)) for db_task in db_tasks])
+    bump_task_version(db, project_id=project_id)
     db.commit()
-    db.refresh(db_task)
-    return db_task
+    get_tasks_by_ids(db, project_id=project_id, task_ids=task_ids)
+    for db_task in db_tasks:
+        _publish_task("task.created", db_task)
+    return db_tasks
+
+
+def _lock_tasks(db: Session, *, project_id: int, task_ids: set[int]) -> dict[int, Task]:
+    """
+    Bumps the project's task version, then reloads the tasks about to change.
+
+    The bump takes the version's row lock (the database write lock on SQLite)
+    before the tasks are read, so their before-states can't be overtaken by a
+    concurrent write to the same tasks, which would make the counter deltas
+    count that change twice. Tasks deleted in the meantime are missing.
+    """
+    bump_task_version(db, project_id=project_id)
+    statement = (
+        select(Task).where(Task.id.in_(task_ids))
+        .with_for_update()
+        .execution_options(populate_existing=True)
+    )
+    return {task.id: task for task in db.exec(statement).all()}
+
+
+def update_tasks(db: Session, *, updates: list[tuple[Task, TaskBatchUpdateItem]], project_id: int) -> list[Task | None]:
+    """
+    Applies many task updates in one transaction; see `create_tasks`.
+
+    Returns the updated tasks in order, None for tasks deleted concurrently.
+    """
+    locked = _lock_tasks(db, project_id=project_id, task_ids={db_task.id for db_task, _ in updates})
+    changes = []
+    updated = []
+    for db_task, task_in in updates:
+        if db_task.id not in locked:
+            updated.append(None)
+            continue
+        before = task_state(db_task)
+        task_data = task_in.model_dump(exclude_unset=True, exclude={"id"})
+        for key, value in task_data.items():
+            setattr(db_task, key, value)
+        db.add(db_task)
+        changes.append((before, task_state(db_task)))
+        updated.append(db_task)
+    apply_task_changes(db, changes)
+    db.commit()
+    get_tasks_by_ids(db, project_id=project_id, task_ids=locked.keys())
+    for db_task in updated:
+        if db_task is not None:
+            _publish_task("task.updated", db_task)
+    return updated
+
+
+def update_task(db: Session, *, db_task: Task, task_in: TaskUpdate) -> Task | None:
+    """
+    Updates a task; returns None if it was deleted concurrently. Returns the
+    task as read back by the UPDATE, a detached copy, rather than `db_task`.
+    """
+    if db_task.id not in _lock_tasks(db, project_id=db_task.project_id, task_ids={db_task.id}):
+        rollback(db)
+        return None
+    before = task_state(db_task)
+    updated = update_returning(db, Task, id=db_task.id, values=task_in.model_dump(exclude_unset=True))
+    apply_task_changes(db, [(before, task_state(updated))])
+    commit(db, after=lambda: _publish_task("task.updated", updated))
+    return updated
+
 
+def record_task_tombstones(db: Session, *, project_id: int, task_ids: list[int]) -> None:
+    """Remembers deleted tasks for delta sync clients, in the caller's transaction."""
+    # One executemany, rather than an ORM object per task, for archival batches
+    db.execute(insert(SyncTombstone.__table__), [
+        {"entity": "task", "entity_id": task_id, "project_id": project_id} for task_id in task_ids
+    ])
 
-def delete_task(db: Session, *, task_id: Task) -> Task|None:
+
+# Task columns copied into the archive
+_ARCHIVED_FIELDS = tuple(column.key for column in Task.__table__.columns)
+
+def archive_tasks(db: Session, *, tasks: list[Task], deleted: bool) -> None:
+    """
+    Moves locked tasks to the archive table, in the caller's transaction. The
+    objects are detached from the session, keeping their loaded fields.
+    """
+    archived_at = datetime.utcnow()
+    db.execute(insert(ArchivedTask.__table__), [
+        {**{field: getattr(task, field) for field in _ARCHIVED_FIELDS}, "archived_at": archived_at, "deleted": deleted}
+        for task in tasks
+    ])
+    db.execute(delete(Task.__table__).where(Task.__table__.c.id.in_([task.id for task in tasks])))
+    for task in tasks:
+        db.expunge(task)
+
+
+def delete_task(db: Session, *, task_id: int) -> Task|None:
+    """
+    Deletes a task, keeping it in the archive table marked as deleted. Returns
+    the deleted task, or None if there was no such task to delete.
+    """
     db_task = db.get(Task, task_id)
-    if db_task:
-        db.delete(db_task)
+    if db_task and db_task.id in _lock_tasks(db, project_id=db_task.project_id, task_ids={db_task.id}):
+        project_id = db_task.project_id
+        apply_task_changes(db, [(task_state(db_task), None)])
+        archive_tasks(db, tasks=[db_task], deleted=True)
+        record_task_tombstones(db, project_id=project_id, task_ids=[task_id])
+
+        def after_commit() -> None:
+            change_hub.publish(project_id, "task.deleted", {"id": task_id})
+            reminder_scheduler.forget(task_id)
+
+        commit(db, after=after_commit)
+        return db_task
+    rollback(db)
+    return None
+
+
+def archive_done_tasks(
+        db: Session,
+        *,
+        done_before: datetime,
+        batch_size: int,
+        progress: Callable[[int], None] | None = None,
+) -> int:
+    """
+    Moves the tasks Done since before `done_before`, going by their last
+    update, to the archive table; returns how many moved.
+
+    Works through them oldest first, `batch_size` per transaction, so writers
+    to the same projects only ever wait for one batch. Each batch is locked
+    and checked again before it moves, so a task reopened in the meantime
+    stays. The task counters are left alone, since they count archived tasks
+    too; delta sync clients and event subscribers see the tasks go.
+    """
+    archived = 0
+    while True:
+        picked = db.exec(
+            select(Task.id, Task.project_id)
+            .where(Task.status == TaskStatus.DONE, Task.updated_at < done_before)
+            .order_by(Task.updated_at)
+            .limit(batch_size)
+        ).all()
+        task_ids_by_project: dict[int, set[int]] = defaultdict(set)
+        for task_id, project_id in picked:
+            task_ids_by_project[project_id].add(task_id)
+
+        moved: dict[int, list[int]] = {}
+        for project_id, task_ids in sorted(task_ids_by_project.items()):
+            tasks = [
+                task for task in _lock_tasks(db, project_id=project_id, task_ids=task_ids).values()
+                if task.status == TaskStatus.DONE and task.updated_at < done_before
+            ]
+            if tasks:
+                archive_tasks(db, tasks=tasks, deleted=False)
+                moved[project_id] = [task.id for task in tasks]
+                record_task_tombstones(db, project_id=project_id, task_ids=moved[project_id])
         db.commit()
-    return db_task
+
+        for project_id, task_ids in moved.items():
+            for task_id in task_ids:
+                change_hub.publish(project_id, "task.archived", {"id": task_id})
+        archived += sum(len(task_ids) for task_ids in moved.values())
+        if progress is not None:
+            progress(archived)
+        if len(picked) < batch_size:
+            return archived
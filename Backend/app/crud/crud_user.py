@@ -1,21 +1,81 @@
 from sqlmodel import SQLModel, select, Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.core.security import get_password_hash
+from app.core.principals import principal_cache
+from app.core.security import get_password_hash, password_hasher
+from app.core.user_search import user_search_index
+from app.crud.crud_project import bump_member_project_versions
+from app.db.unit_of_work import commit, insert_returning, update_returning
 from app.models.user_models import User
-from app.schemas.user_schemas import UserCreate
+from app.schemas.user_schemas import UserCreate, UserUpdate
 
 
 def get_user_by_email(db:Session,*,email:str) -> User|None:
     return db.exec(select(User).where(User.email == email)).first()
 
+def get_users_by_ids(db:Session,*,user_ids:list[int]) -> list[User]:
+    """Loads users in one query, returned in the order of `user_ids`."""
+    if not user_ids:
+        return []
+    users = {user.id: user for user in db.exec(select(User).where(User.id.in_(user_ids))).all()}
+    return [users[user_id] for user_id in user_ids if user_id in users]
+
+def search_users_by_email_prefix(db:Session,*,prefix:str,offset:int=0,limit:int=10) -> list[User]:
+    """Email prefix search written as a range, so the unique email index serves it."""
+    statement = (
+        select(User)
+        .where(User.email >= prefix, User.email < prefix + "\U0010ffff")
+        .order_by(User.email)
+        .offset(offset)
+        .limit(limit)
+    )
+    return db.exec(statement).all()
+
 def create_user(db:Session,*,user_in: UserCreate ) -> User:
     hashed_password = get_password_hash(user_in.password)
+    db_user = insert_returning(db, User(
+        full_name=user_in.full_name,
+        email=user_in.email,
+        hashed_password=hashed_password,
+    ))
+    commit(db, after=lambda: user_search_index.add(db_user.id, db_user.email, db_user.full_name))
+    return db_user
+
+
+def update_user(db:Session,*,db_user:User,user_in:UserUpdate) -> User:
+    """Returns the user as read back by the UPDATE, a detached copy, rather than `db_user`."""
+    user = update_returning(db, User, id=db_user.id, values=user_in.model_dump(exclude_unset=True))
+    # Member names and emails are part of every project detail they appear in
+    bump_member_project_versions(db, user_id=db_user.id)
+
+    def after_commit() -> None:
+        # Cached principals carry email and is_active, so drop the snapshot right away
+        principal_cache.invalidate(user_id=user.id)
+        user_search_index.add(user.id, user.email, user.full_name)
+
+    commit(db, after=after_commit)
+    return user
+
+
+# Async variants, for endpoints running on `get_async_session`
+
+async def get_user_by_email_async(db:AsyncSession,*,email:str) -> User|None:
+    return (await db.exec(select(User).where(User.email == email))).first()
+
+async def create_user_async(db:AsyncSession,*,user_in: UserCreate) -> User:
+    hashed_password = await password_hasher.hash(user_in.password)
     db_user = User(
         full_name=user_in.full_name,
         email=user_in.email,
         hashed_password=hashed_password,
     )
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
-    return db_user
\ No newline at end of file
+    await db.commit()
+    user_search_index.add(db_user.id, db_user.email, db_user.full_name)
+    return db_user
+
+async def update_password_hash_async(db:AsyncSession,*,db_user:User,hashed_password:str) -> User:
+    db_user.hashed_password = hashed_password
+    db.add(db_user)
+    await db.commit()
+    return db_user
@@ -1,14 +1,198 @@
 
-from sqlmodel import create_engine, SQLModel, Session
+from functools import lru_cache
+
+from fastapi import Request
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import create_engine, Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 from app.core.config import settings
+from app.db import instrumentation, migrations
+from app.db.replicas import RecentWriters, ReplicaPool, client_key
+from app.db.sharding import IdAllocator, ShardMap, prepare_shards
 from app.models.user_models import User, ProjectMemberLink
-from app.models.project_models import Project, Task, Comment
+from app.models.project_models import Project, Task, Comment, ProjectTaskCounter, ProjectDueCounter, SyncTombstone
+
+# Async drivers used when ASYNC_DATABASE_URL is not set explicitly
+_ASYNC_DRIVERS = {
+    "sqlite": "aiosqlite",
+    "postgresql": "asyncpg",
+}
+
+
+def _async_url(database_url: str) -> str:
+    url = make_url(database_url)
+    driver = _ASYNC_DRIVERS.get(url.get_backend_name())
+    if driver is None:
+        raise ValueError(f"No async driver known for {url.get_backend_name()!r}; set ASYNC_DATABASE_URL")
+    return url.set(drivername=f"{url.get_backend_name()}+{driver}").render_as_string(hide_password=False)
+
+
+def get_async_database_url() -> str:
+    """Derives the asyncio driver URL (aiosqlite/asyncpg) from DATABASE_URL unless one is configured."""
+    return settings.ASYNC_DATABASE_URL or _async_url(settings.DATABASE_URL)
+
+
+def _replica_engine_options(database_url: str) -> dict:
+    """
+    Pool settings for replica engines. Connections are pre-pinged, since
+    replicas are restarted and failed over independently of the primary, and
+    recycled before server-side idle timeouts close them.
+    """
+    options = {
+        "echo": settings.SQL_ECHO,
+        "pool_pre_ping": True,
+        "pool_recycle": settings.DATABASE_REPLICA_POOL_RECYCLE_SECONDS,
+    }
+    if make_url(database_url).database not in (None, "", ":memory:"):
+        # In-memory SQLite uses a single-connection pool that takes no sizing
+        options.update(
+            pool_size=settings.DATABASE_REPLICA_POOL_SIZE,
+            max_overflow=settings.DATABASE_REPLICA_MAX_OVERFLOW,
+            pool_timeout=settings.DATABASE_REPLICA_POOL_TIMEOUT_SECONDS,
+        )
+    return options
+
+
+instrumentation.install()
+
+# Engines are created on first use rather than at import, which keeps
+# importing the app (workers, CLI commands, tooling) free of driver setup.
+# `engine`, `async_engine`, `replicas` and `async_replicas` stay available as
+# module attributes through `__getattr__` below.
+
+@lru_cache(maxsize=None)
+def get_engine():
+    return create_engine(settings.DATABASE_URL,echo=settings.SQL_ECHO)
+
+@lru_cache(maxsize=None)
+def get_async_engine():
+    return create_async_engine(get_async_database_url(),echo=settings.SQL_ECHO)
+
+@lru_cache(maxsize=None)
+def get_replicas() -> ReplicaPool:
+    return ReplicaPool(
+        [create_engine(url, **_replica_engine_options(url)) for url in settings.DATABASE_REPLICA_URLS],
+        down_seconds=settings.DATABASE_REPLICA_DOWN_SECONDS,
+    )
 
-engine=create_engine(settings.DATABASE_URL,echo=True)
+@lru_cache(maxsize=None)
+def get_async_replicas() -> ReplicaPool:
+    return ReplicaPool(
+        [create_async_engine(_async_url(url), **_replica_engine_options(url)) for url in settings.DATABASE_REPLICA_URLS],
+        down_seconds=settings.DATABASE_REPLICA_DOWN_SECONDS,
+    )
+
+@lru_cache(maxsize=None)
+def get_shard_map() -> ShardMap:
+    engine = get_engine()
+    shard_map = ShardMap(
+        engine,
+        [
+            engine if url == settings.DATABASE_URL else create_engine(url, echo=settings.SQL_ECHO)
+            for url in settings.DATABASE_SHARD_URLS
+        ],
+        cache_size=settings.SHARD_MAP_CACHE_SIZE,
+    )
+    if shard_map.sharded:
+        IdAllocator(engine, block_size=settings.SHARD_ID_BLOCK_SIZE).install(shard_map.engines)
+    return shard_map
+
+_LAZY_ATTRIBUTES = {
+    "engine": get_engine,
+    "async_engine": get_async_engine,
+    "replicas": get_replicas,
+    "async_replicas": get_async_replicas,
+    "shard_map": get_shard_map,
+}
+
+def __getattr__(name: str):
+    try:
+        return _LAZY_ATTRIBUTES[name]()
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+
+recent_writers = RecentWriters(window=settings.READ_YOUR_WRITES_SECONDS, maxsize=100_000)
 
 def create_db_and_tables():
-    SQLModel.metadata.create_all(engine)
+    """Brings the schema up to date, shards included; what `manage.py migrate` runs, also used by the benchmarks."""
+    return migrations.migrate(get_engine()) + prepare_shards(get_shard_map())
+
+def _project_id(request: Request) -> int | None:
+    """The `project_id` path parameter of project routes; validation is left to the endpoint."""
+    try:
+        return int(request.path_params["project_id"])
+    except (KeyError, ValueError):
+        return None
+
+def get_session(request: Request):
+    """
+    Session for the request. When sharded, the tables of project routes
+    are bound to the project's shard (shard 0 elsewhere); see app/db/sharding.py.
+    """
+    with get_shard_map().session(_project_id(request)) as session:
+        yield session
+
+def _reads_from_replica(request: Request) -> bool:
+    return not recent_writers.is_recent(client_key(request.headers))
+
+
+def get_read_session(request: Request):
+    """
+    Session for read-only endpoints, on one of the replicas when any are configured.
+
+    Replicas are taken round-robin; one that can't hand out a connection is
+    marked down and the next is tried, falling back to the primary. Clients
+    that wrote within READ_YOUR_WRITES_SECONDS also read from the primary.
+    Replicas lag behind, so anything that caches what it reads (like access
+    checks) must keep using `get_session`. Replicas are of DATABASE_URL;
+    shards are always read from directly.
+    """
+    replicas = get_replicas()
+    if replicas and _reads_from_replica(request):
+        for replica in replicas.candidates():
+            session = get_shard_map().session(_project_id(request), bind=replica)
+            try:
+                session.connection()
+            except DBAPIError:
+                session.close()
+                replicas.mark_down(replica)
+                continue
+            with session:
+                yield session
+            return
+    with get_shard_map().session(_project_id(request)) as session:
+        yield session
+
+async def get_async_session():
+    """
+    Async counterpart of `get_session` for `async def` endpoints, on the
+    global database only; endpoints reading or writing sharded tables use
+    `get_session`.
+
+    Objects are not expired on commit, because reloading them would need an
+    awaited lazy load that can't happen during response serialization.
+    Relationships must be eager-loaded explicitly by the async CRUD helpers.
+    """
+    async with AsyncSession(get_async_engine(), expire_on_commit=False) as session:
+        yield session
+
 
-def get_session():
-    with Session(engine) as session:
-        yield session
\ No newline at end of file
+async def get_async_read_session(request: Request):
+    """Async counterpart of `get_read_session`."""
+    async_replicas = get_async_replicas()
+    if async_replicas and _reads_from_replica(request):
+        for replica in async_replicas.candidates():
+            session = AsyncSession(replica, expire_on_commit=False)
+            try:
+                await session.connection()
+            except DBAPIError:
+                await session.close()
+                async_replicas.mark_down(replica)
+                continue
+            async with session:
+                yield session
+            return
+    async with AsyncSession(get_async_engine(), expire_on_commit=False) as session:
+        yield session
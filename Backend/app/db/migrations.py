@@ -0,0 +1,169 @@
+"""
+Versioned schema changes, applied by `python manage.py migrate`.
+
+The database records the revision it has been migrated to in the one-row
+`schema_version` table. Workers only read that row at startup
+(`check_schema`) rather than creating or inspecting tables, so booting costs
+one query however large the schema gets.
+
+Revision 1 creates the current models' tables outright on a new database, so
+every later revision must be idempotent: it runs against both a database
+that revision 1 just created and one that predates the change.
+"""
+import logging
+from datetime import datetime
+from typing import Callable
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.schema import CreateTable
+from sqlmodel import Field, SQLModel
+
+# Imported for their tables, so the metadata is complete
+from app.models import project_models, user_models  # noqa: F401
+
+logger = logging.getLogger(__name__)
+
+
+class SchemaVersion(SQLModel, table=True):
+    __tablename__ = "schema_version"
+
+    id: int = Field(default=1, primary_key=True)
+    revision: int
+    migrated_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
+
+
+class SchemaOutOfDate(RuntimeError):
+    """The database is behind the revision this code needs; run `manage.py migrate`."""
+
+
+def _create_tables(conn: Connection) -> None:
+    SQLModel.metadata.create_all(conn)
+
+
+def _add_column(conn: Connection, table: str, column: str, *, backfill: str | None) -> None:
+    """
+    Adds a NOT NULL column of the model to an existing table, if missing. A
+    constant placeholder default satisfies existing rows (SQLite can't add a
+    NOT NULL column with a non-constant default), then `backfill` replaces it.
+    """
+    if column in {existing["name"] for existing in inspect(conn).get_columns(table)}:
+        return
+    column_type = SQLModel.metadata.tables[table].c[column].type.compile(dialect=conn.dialect)
+    # `user` is a reserved word in PostgreSQL
+    quoted = conn.dialect.identifier_preparer.quote(table)
+    conn.execute(text(
+        f"ALTER TABLE {quoted} ADD COLUMN {column} {column_type} NOT NULL DEFAULT '1970-01-01 00:00:00'"
+    ))
+    if backfill is not None:
+        conn.execute(text(f"UPDATE {quoted} SET {column} = {backfill}"))
+
+
+def _add_sync_columns(conn: Connection) -> None:
+    _add_column(conn, "task", "updated_at", backfill="created_at")
+    _add_column(conn, "project", "updated_at", backfill="created_at")
+    _add_column(conn, "projectmemberlink", "joined_at", backfill=None)
+
+
+def _add_user_updated_at(conn: Connection) -> None:
+    # Existing users keep the placeholder; the search index loads them all on startup anyway
+    _add_column(conn, "user", "updated_at", backfill=None)
+    _create_indexes(conn)
+
+
+def _create_indexes(conn: Connection) -> None:
+    """Indexes added to tables that already existed, which `create_all` skips."""
+    for table in SQLModel.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(conn, checkfirst=True)
+
+
+def _autoincrement_task_ids(conn: Connection) -> None:
+    """
+    Rebuilds an SQLite `task` table as AUTOINCREMENT, so the ids of archived
+    tasks are never handed out again. Its indexes are dropped with it and
+    recreated by `_create_indexes`.
+    """
+    if conn.dialect.name != "sqlite":
+        return
+    existing = conn.execute(text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'task'")).scalar()
+    if "AUTOINCREMENT" in existing.upper():
+        return
+    table = SQLModel.metadata.tables["task"]
+    create = str(CreateTable(table).compile(dialect=conn.dialect))
+    conn.execute(text(create.replace("CREATE TABLE task ", "CREATE TABLE task_rebuilt ", 1)))
+    columns = ", ".join(column.name for column in table.columns)
+    conn.execute(text(f"INSERT INTO task_rebuilt ({columns}) SELECT {columns} FROM task"))
+    conn.execute(text("DROP TABLE task"))
+    conn.execute(text("ALTER TABLE task_rebuilt RENAME TO task"))
+
+
+def _create_archive(conn: Connection) -> None:
+    _autoincrement_task_ids(conn)
+    _create_tables(conn)
+    _create_indexes(conn)
+
+
+# (revision, description, change), in order
+MIGRATIONS: list[tuple[int, str, Callable[[Connection], None]]] = [
+    (1, "create tables", _create_tables),
+    (2, "add updated_at and joined_at for delta sync", _add_sync_columns),
+    (3, "create indexes missing on existing tables", _create_indexes),
+    (4, "index tasks by assignee, status and due date", _create_indexes),
+    (5, "archive table for Done and deleted tasks", _create_archive),
+    (6, "index tasks by status and due date", _create_indexes),
+    (7, "task versions, shard placements and id blocks", _create_tables),
+    (8, "add user updated_at for the search index", _add_user_updated_at),
+]
+
+SCHEMA_REVISION = MIGRATIONS[-1][0]
+
+
+def current_revision(conn: Connection) -> int:
+    """The stored revision; 0 for a database that was never migrated."""
+    if not inspect(conn).has_table(SchemaVersion.__tablename__):
+        return 0
+    return conn.execute(text("SELECT revision FROM schema_version WHERE id = 1")).scalar() or 0
+
+
+def migrate(engine: Engine) -> list[str]:
+    """Applies the pending revisions, each in its own transaction; returns what was applied."""
+    applied = []
+    with engine.connect() as conn:
+        revision = current_revision(conn)
+    for number, description, change in MIGRATIONS:
+        if number <= revision:
+            continue
+        with engine.begin() as conn:
+            change(conn)
+            SchemaVersion.__table__.create(conn, checkfirst=True)
+            conn.execute(SchemaVersion.__table__.delete())
+            conn.execute(SchemaVersion.__table__.insert().values(id=1, revision=number, migrated_at=datetime.utcnow()))
+        applied.append(f"{number}: {description}")
+    return applied
+
+
+def check_schema(engine: Engine) -> int:
+    """
+    Verifies the database has been migrated to SCHEMA_REVISION, with a single
+    query. A newer revision is only logged, so workers of the previous release
+    keep running while a deploy rolls out after its migration.
+    """
+    with engine.connect() as conn:
+        try:
+            revision = conn.execute(text("SELECT revision FROM schema_version WHERE id = 1")).scalar() or 0
+        except DBAPIError:
+            # Only a never-migrated database is reported as such; anything else is a real error
+            conn.rollback()
+            if inspect(conn).has_table(SchemaVersion.__tablename__):
+                raise
+            revision = 0
+    if revision < SCHEMA_REVISION:
+        raise SchemaOutOfDate(
+            f"Database schema is at revision {revision}, this release needs {SCHEMA_REVISION}; "
+            f"run `python manage.py migrate`"
+        )
+    if revision > SCHEMA_REVISION:
+        logger.warning("Database schema is at revision %d, ahead of this release's %d", revision, SCHEMA_REVISION)
+    return revision
@@ -0,0 +1,100 @@
+import itertools
+import threading
+import time
+from typing import Generic, Hashable, TypeVar
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.cache import TTLCache
+
+E = TypeVar("E")
+
+_UNSAFE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+
+class ReplicaPool(Generic[E]):
+    """
+    Round-robin over read replica engines, sync or async.
+
+    A replica that fails to hand out a connection is marked down and skipped
+    for `down_seconds`, after which it gets traffic again (its pool pre-pings,
+    so stale connections from before the outage are replaced transparently).
+    """
+
+    def __init__(self, engines: list[E], *, down_seconds: float):
+        self.engines = engines
+        self.down_seconds = down_seconds
+        self._next = itertools.count()
+        self._down_until: dict[int, float] = {}
+        self._lock = threading.Lock()
+
+    def __bool__(self) -> bool:
+        return bool(self.engines)
+
+    def candidates(self) -> list[E]:
+        """Engines to try for the next session: the healthy ones, starting from the next in turn."""
+        now = time.monotonic()
+        with self._lock:
+            healthy = [engine for engine in self.engines if self._down_until.get(id(engine), 0.0) <= now]
+        if not healthy:
+            return []
+        # Rotating the healthy ones keeps the load even while one is down
+        start = next(self._next) % len(healthy)
+        return healthy[start:] + healthy[:start]
+
+    def mark_down(self, engine: E) -> None:
+        with self._lock:
+            self._down_until[id(engine)] = time.monotonic() + self.down_seconds
+
+
+class RecentWriters:
+    """
+    Clients that wrote within the last `window` seconds, keyed by credential.
+
+    Their reads go to the primary, so they see their own writes even while
+    the replicas are catching up. Only tracks writes handled by this process.
+    """
+
+    def __init__(self, window: float, maxsize: int):
+        self.window = window
+        self._cache = TTLCache(maxsize=maxsize, ttl=window)
+
+    def record(self, key: Hashable) -> None:
+        if self.window > 0:
+            self._cache.set(key, True)
+
+    def is_recent(self, key: Hashable) -> bool:
+        return self._cache.get(key) is not None
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+
+def client_key(headers) -> str | None:
+    """What identifies a client for read-your-writes: its Authorization header."""
+    return headers.get("authorization")
+
+
+class ReadYourWritesMiddleware:
+    """Records clients whose write requests succeeded, for `RecentWriters`."""
+
+    def __init__(self, app: ASGIApp, *, writers: RecentWriters):
+        self.app = app
+        self.writers = writers
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] not in _UNSAFE_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_recording(message: Message) -> None:
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                key = client_key({
+                    name.decode("latin-1"): value.decode("latin-1")
+                    for name, value in scope["headers"] if name == b"authorization"
+                })
+                if key is not None:
+                    self.writers.record(key)
+            await send(message)
+
+        await self.app(scope, receive, send_recording)
@@ -0,0 +1,403 @@
+"""
+Project-sharded storage, on when DATABASE_SHARD_URLS is set.
+
+Everything a project's task writes touch lives on the project's shard: its
+tasks, archived tasks, comments, task counters, task version and sync
+tombstones (`SHARDED_TABLES`). Users, projects and memberships stay on the
+global database (DATABASE_URL), along with the `ProjectShard` directory of
+which shard each project is on. Writers to projects on different shards then
+never wait for each other's locks or commits.
+
+Request sessions are Sessions whose sharded tables are bound to the shard of
+the route's project (see `database.get_session`), so the CRUD helpers run
+unchanged. What reads across projects (a user's task queue, delta sync,
+reminders, archival, the task counters' checks) reads each shard in turn
+through `sessions_for`/`shard_sessions`.
+
+New projects are placed by id over the shards; moving one is an offline job
+(`manage.py shards`), run with the app stopped since workers cache
+placements. Task and comment ids come from `IdAllocator`, so they stay
+unique when rows move. A write touching both a project's shard and the
+global database, such as removing a member, commits them one after the
+other rather than atomically.
+"""
+import logging
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, Callable, Iterable, Iterator
+
+from sqlalchemy import delete, event, func, insert, inspect, select, update
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.schema import CreateTable
+from sqlalchemy.sql import Insert, Select
+from sqlmodel import Session
+
+from app.core.cache import TTLCache
+from app.models.project_models import (
+    ArchivedTask, Comment, IdBlock, Project, ProjectDueCounter, ProjectShard, ProjectTaskCounter,
+    ProjectTaskVersion, SyncTombstone, Task,
+)
+
+logger = logging.getLogger(__name__)
+
+SHARDED_MODELS = (Task, ArchivedTask, Comment, ProjectTaskCounter, ProjectDueCounter, ProjectTaskVersion, SyncTombstone)
+SHARDED_TABLES = tuple(model.__table__ for model in SHARDED_MODELS)
+
+# Tables whose ids come from `IdAllocator` when sharded, by table name, with the
+# tables their ids also end up in
+ALLOCATED_IDS = {"task": (Task, ArchivedTask), "comment": (Comment,)}
+
+# Rows copied per statement when a project moves
+_MOVE_BATCH_SIZE = 5000
+
+
+class ShardMap:
+    """
+    The shard engines and the directory of project placements.
+
+    `engines` is empty when unsharded; the global engine then holds
+    everything as shard 0, and sessions are plain Sessions on it.
+    Placements are cached; only projects that exist are, so ids not yet
+    handed out are never cached on the wrong shard.
+    """
+
+    def __init__(self, global_engine: Engine, engines: list[Engine], *, cache_size: int):
+        self.global_engine = global_engine
+        self.sharded = bool(engines)
+        self.engines = engines or [global_engine]
+        self._placements = TTLCache(maxsize=cache_size, ttl=float("inf"))
+
+    def place(self, project_id: int) -> int:
+        """The shard a new project goes to."""
+        return project_id % len(self.engines)
+
+    def shards_of(self, project_ids: Iterable[int]) -> dict[int, list[int]]:
+        """The given projects grouped by shard, looking up those not cached in one query."""
+        groups: dict[int, list[int]] = defaultdict(list)
+        missing = []
+        for project_id in project_ids:
+            shard = self._placements.get(project_id) if self.sharded else 0
+            if shard is None:
+                missing.append(project_id)
+            else:
+                groups[shard].append(project_id)
+        if missing:
+            statement = (
+                select(Project.id, ProjectShard.shard)
+                .outerjoin(ProjectShard, ProjectShard.project_id == Project.id)
+                .where(Project.id.in_(missing))
+            )
+            with self.global_engine.connect() as conn:
+                found = dict(conn.execute(statement).all())
+            for project_id in missing:
+                shard = found.get(project_id) or 0
+                if project_id in found:
+                    self._placements.set(project_id, shard)
+                groups[shard].append(project_id)
+        return dict(groups)
+
+    def shard_of(self, project_id: int) -> int:
+        """The project's shard; 0 for projects that don't exist, which have nothing to find anywhere."""
+        if not self.sharded:
+            return 0
+        return next(iter(self.shards_of([project_id])))
+
+    def forget(self, project_id: int) -> None:
+        self._placements.delete(project_id)
+
+    def session(self, project_id: int | None = None, *, bind: Engine | None = None) -> Session:
+        """
+        A Session on `bind` (the global engine by default) with the sharded
+        tables bound to the project's shard, or shard 0 without a project.
+        """
+        shard = 0 if project_id is None else self.shard_of(project_id)
+        return self.shard_session(shard, bind=bind)
+
+    def shard_session(self, shard: int, *, bind: Engine | None = None) -> Session:
+        bind = bind or self.global_engine
+        if not self.sharded:
+            return Session(bind)
+        return Session(bind, binds={table: self.engines[shard] for table in SHARDED_TABLES})
+
+    @contextmanager
+    def sessions_for(self, db: Session, project_ids: Select | list[int]) -> Iterator[list[tuple[Session, Any]]]:
+        """
+        Sessions for reading the sharded tables of some projects, each with
+        the ids of those on its shard. Unsharded, that is just `db` with
+        `project_ids` as given, so a subquery stays one; sharded, a subquery
+        is run on `db` first.
+        """
+        if not self.sharded:
+            yield [(db, project_ids)]
+            return
+        if isinstance(project_ids, Select):
+            project_ids = db.exec(project_ids).all()
+        sessions = [
+            (self.shard_session(shard), ids) for shard, ids in sorted(self.shards_of(project_ids).items())
+        ]
+        try:
+            yield sessions
+        finally:
+            for session, _ in sessions:
+                session.close()
+
+    @contextmanager
+    def shard_sessions(self, db: Session | None = None) -> Iterator[list[Session]]:
+        """A session per shard, for work over all projects; unsharded, `db` itself when given."""
+        if not self.sharded and db is not None:
+            yield [db]
+            return
+        sessions = [self.shard_session(shard) for shard in range(len(self.engines))]
+        try:
+            yield sessions
+        finally:
+            for session in sessions:
+                session.close()
+
+
+class IdAllocator:
+    """
+    Hands out task and comment ids from blocks reserved on the global
+    database, filling them into the INSERTs run on the shards.
+
+    SQLite numbers new rows after the highest id in the table, so per-shard
+    sequences would run into each other's ids as soon as a project moved;
+    one counter per table keeps them unique everywhere. A process reserves
+    `block_size` ids with one short transaction and hands them out from
+    memory; the ids of blocks not used up are skipped, never reused.
+    """
+
+    def __init__(self, engine: Engine, *, block_size: int):
+        self._engine = engine
+        self.block_size = block_size
+        self._lock = threading.Lock()
+        self._blocks: dict[str, tuple[int, int]] = {}
+
+    def next_id(self, name: str) -> int:
+        with self._lock:
+            next_id, end = self._blocks.get(name, (0, 0))
+            if next_id >= end:
+                next_id = self._reserve(name)
+                end = next_id + self.block_size
+            self._blocks[name] = (next_id + 1, end)
+            return next_id
+
+    def _reserve(self, name: str) -> int:
+        statement = (
+            update(IdBlock).where(IdBlock.name == name)
+            .values(next_id=IdBlock.next_id + self.block_size)
+            .returning(IdBlock.next_id)
+        )
+        with self._engine.begin() as conn:
+            end = conn.execute(statement).scalar()
+        if end is None:
+            raise RuntimeError(f"No id block for {name!r}; run `python manage.py migrate`")
+        return end - self.block_size
+
+    def install(self, engines: Iterable[Engine]) -> None:
+        """
+        Listens to the statements run on `engines`, giving the rows inserted
+        into the allocated tables without an id the next one. Covers ORM
+        flushes and Core inserts alike, as long as the rows are passed as
+        parameters rather than with `Insert.values()`.
+        """
+        for engine in set(engines):
+            event.listen(engine, "before_execute", self._assign_ids, retval=True)
+
+    def _assign_ids(self, conn, statement, multiparams, params, execution_options):
+        if not isinstance(statement, Insert) or statement.table.name not in ALLOCATED_IDS:
+            return statement, multiparams, params
+        name = statement.table.name
+
+        def assign(row: dict) -> dict:
+            return row if row.get("id") is not None else {**row, "id": self.next_id(name)}
+
+        return statement, [assign(row) for row in multiparams], assign(params) if params else params
+
+
+def _create_shard_tables(conn: Connection) -> None:
+    """
+    Creates the sharded tables and their indexes where missing, without their
+    foreign keys, which point at global tables that aren't there.
+    """
+    existing = set(inspect(conn).get_table_names())
+    for table in SHARDED_TABLES:
+        if table.name not in existing:
+            conn.execute(CreateTable(table, include_foreign_key_constraints=()))
+        for index in table.indexes:
+            index.create(conn, checkfirst=True)
+
+
+def _seed_id_blocks(shard_map: ShardMap) -> None:
+    """Starts (or moves past) each allocated id counter after the highest id on any shard."""
+    highest: dict[str, int] = {}
+    for engine in shard_map.engines:
+        with engine.connect() as conn:
+            for name, models in ALLOCATED_IDS.items():
+                for model in models:
+                    value = conn.execute(select(func.max(model.id))).scalar() or 0
+                    highest[name] = max(highest.get(name, 0), value)
+    with shard_map.global_engine.begin() as conn:
+        for name, value in highest.items():
+            current = conn.execute(select(IdBlock.next_id).where(IdBlock.name == name)).scalar()
+            if current is None:
+                conn.execute(insert(IdBlock).values(name=name, next_id=value + 1))
+            elif current <= value:
+                conn.execute(update(IdBlock).where(IdBlock.name == name).values(next_id=value + 1))
+
+
+def prepare_shards(shard_map: ShardMap) -> list[str]:
+    """
+    Brings the shard databases' tables up to date and starts the id counters,
+    after the global database has been migrated; returns what was done.
+    Schema changes to sharded tables are applied here too, so they must be
+    idempotent like every migration.
+    """
+    if not shard_map.sharded:
+        return []
+    done = []
+    for shard, engine in enumerate(shard_map.engines):
+        if engine is shard_map.global_engine:
+            continue
+        with engine.begin() as conn:
+            _create_shard_tables(conn)
+        done.append(f"shard {shard}: tables")
+    _seed_id_blocks(shard_map)
+    done.append("id counters")
+    return done
+
+
+# Rebalancing
+
+def project_sizes(shard_map: ShardMap) -> dict[int, dict[int, int]]:
+    """Rows (tasks, archived tasks and comments) per project, per shard they are found on."""
+    sizes: dict[int, dict[int, int]] = defaultdict(dict)
+    for shard, engine in enumerate(shard_map.engines):
+        with engine.connect() as conn:
+            for model in (Task, ArchivedTask, Comment):
+                rows = conn.execute(select(model.project_id, func.count()).group_by(model.project_id)).all()
+                for project_id, count in rows:
+                    sizes[shard][project_id] = sizes[shard].get(project_id, 0) + count
+    return dict(sizes)
+
+
+def placements(shard_map: ShardMap) -> dict[int, int]:
+    """The shard of every project, read from the directory rather than the cache."""
+    statement = select(Project.id, ProjectShard.shard).outerjoin(ProjectShard, ProjectShard.project_id == Project.id)
+    with shard_map.global_engine.connect() as conn:
+        return {project_id: shard or 0 for project_id, shard in conn.execute(statement).all()}
+
+
+def shard_status(shard_map: ShardMap) -> list[dict]:
+    """
+    Per shard: projects placed on it, their rows, and the projects with rows
+    left on it that are placed elsewhere (by an interrupted move; moving the
+    project again clears them).
+    """
+    placed = placements(shard_map)
+    sizes = project_sizes(shard_map)
+    status = []
+    for shard in range(len(shard_map.engines)):
+        found = sizes.get(shard, {})
+        status.append({
+            "shard": shard,
+            "projects": sum(1 for placed_on in placed.values() if placed_on == shard),
+            "rows": sum(count for project_id, count in found.items() if placed.get(project_id) == shard),
+            "stray_projects": sorted(project_id for project_id in found if placed.get(project_id) != shard),
+        })
+    return status
+
+
+def plan_rebalance(sizes: dict[int, int], placed: dict[int, int], shards: int) -> list[tuple[int, int, int]]:
+    """
+    Moves, as (project_id, from_shard, to_shard), that even out the rows per
+    shard: the largest project of the fullest shard that narrows its gap to
+    the emptiest one goes there, until none does. Projects stay whole, so a
+    single project bigger than the gap stays put.
+    """
+    loads = [0] * shards
+    projects: dict[int, set[int]] = defaultdict(set)
+    for project_id, shard in placed.items():
+        size = sizes.get(project_id, 0)
+        if size and shard < shards:
+            loads[shard] += size
+            projects[shard].add(project_id)
+    moves = []
+    while True:
+        fullest = max(range(shards), key=loads.__getitem__)
+        emptiest = min(range(shards), key=loads.__getitem__)
+        gap = loads[fullest] - loads[emptiest]
+        candidates = [project_id for project_id in projects[fullest] if sizes[project_id] < gap]
+        if not candidates:
+            return moves
+        project_id = max(candidates, key=lambda candidate: (sizes[candidate], candidate))
+        projects[fullest].remove(project_id)
+        projects[emptiest].add(project_id)
+        loads[fullest] -= sizes[project_id]
+        loads[emptiest] += sizes[project_id]
+        moves.append((project_id, fullest, emptiest))
+
+
+def _copy_project(source: Connection, target: Connection, project_id: int) -> int:
+    """Copies a project's rows of every sharded table; tombstones get new ids on the target."""
+    copied = 0
+    for table in SHARDED_TABLES:
+        columns = [column for column in table.columns if not (table is SyncTombstone.__table__ and column.key == "id")]
+        target.execute(delete(table).where(table.c.project_id == project_id))
+        statement = select(*columns).where(table.c.project_id == project_id)
+        result = source.execute(statement.execution_options(yield_per=_MOVE_BATCH_SIZE))
+        for partition in result.partitions():
+            target.execute(insert(table), [dict(row._mapping) for row in partition])
+            copied += len(partition)
+    return copied
+
+
+def move_project(shard_map: ShardMap, *, project_id: int, shard: int) -> int:
+    """
+    Moves a project's rows to `shard`; returns how many were copied. Run it
+    with the app stopped.
+
+    The rows are copied and committed on the target first, then the
+    directory is switched, then the rows left anywhere else are deleted, so
+    every step can be retried: running the same move again after a failure
+    finishes it.
+    """
+    if not shard_map.sharded or not 0 <= shard < len(shard_map.engines):
+        raise ValueError(f"No shard {shard}")
+    current = placements(shard_map).get(project_id)
+    if current is None:
+        raise ValueError(f"No project {project_id}")
+    copied = 0
+    if current != shard:
+        with shard_map.engines[current].connect() as source, shard_map.engines[shard].begin() as target:
+            copied = _copy_project(source, target, project_id)
+        with shard_map.global_engine.begin() as conn:
+            conn.execute(delete(ProjectShard).where(ProjectShard.project_id == project_id))
+            conn.execute(insert(ProjectShard).values(project_id=project_id, shard=shard))
+        shard_map.forget(project_id)
+    for other, engine in enumerate(shard_map.engines):
+        if other == shard:
+            continue
+        with engine.begin() as conn:
+            for table in reversed(SHARDED_TABLES):
+                conn.execute(delete(table).where(table.c.project_id == project_id))
+    logger.info("Moved project %d from shard %d to %d, %d rows", project_id, current, shard, copied)
+    return copied
+
+
+def rebalance(shard_map: ShardMap, *, dry_run: bool = False, progress: Callable[[int, int, int], None] | None = None):
+    """Plans the moves of `plan_rebalance` and, unless `dry_run`, makes them; returns the plan."""
+    placed = placements(shard_map)
+    sizes: dict[int, int] = defaultdict(int)
+    for shard, found in project_sizes(shard_map).items():
+        for project_id, count in found.items():
+            if placed.get(project_id) == shard:
+                sizes[project_id] += count
+    moves = plan_rebalance(sizes, placed, len(shard_map.engines))
+    if not dry_run:
+        for project_id, _, shard in moves:
+            move_project(shard_map, project_id=project_id, shard=shard)
+            if progress is not None:
+                progress(project_id, shard, sizes[project_id])
+    return moves
@@ -0,0 +1,203 @@
+"""
+The write path of the CRUD helpers: statements with RETURNING instead of
+commit-then-refresh, and an opt-in group commit.
+
+`insert_returning`/`update_returning` write a row and build the model from
+what the statement returns, a detached copy that needs no refresh SELECT and
+isn't expired by the commit. Helpers end their transaction with `commit`,
+which runs their follow-up work (events, cache invalidation) only once the
+write is durable.
+
+With GROUP_COMMIT_WINDOW_MS set, endpoints hand their write to
+`group_committer` through `run_write`; the single-row writes of concurrent
+requests then share one transaction, and one commit.
+"""
+import concurrent.futures
+import logging
+import queue
+import threading
+import time
+from typing import Any, Callable, TypeVar
+
+from sqlalchemy import insert, update
+from sqlalchemy.engine import Engine
+from sqlmodel import Session, SQLModel
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+ModelT = TypeVar("ModelT", bound=SQLModel)
+T = TypeVar("T")
+
+# Session.info key of the list of callbacks waiting for a group's commit
+_GROUP_KEY = "commit_group"
+
+
+def insert_returning(db: Session, instance: ModelT) -> ModelT:
+    """
+    Inserts a new table model instance and returns a detached copy of the
+    row as stored, read back by INSERT ... RETURNING. `instance` itself is
+    not added to the session.
+    """
+    model = type(instance)
+    table = model.__table__
+    values = {
+        column.key: getattr(instance, column.key)
+        for column in table.columns
+        if not (column.primary_key and getattr(instance, column.key) is None)
+    }
+    # Values as parameters, where sharding's IdAllocator fills in allocated ids
+    row = db.execute(insert(table).returning(*table.columns), values).one()
+    return model.model_validate(row._mapping)
+
+
+def update_returning(db: Session, model: type[ModelT], *, id: int, values: dict[str, Any]) -> ModelT | None:
+    """
+    Updates a row by id with UPDATE ... RETURNING and returns a detached copy
+    of it as stored, None if there is no such row. Column `onupdate` values
+    are applied; objects already loaded in the session are left as they were.
+    """
+    table = model.__table__
+    row = db.execute(update(table).where(table.c.id == id).values(values).returning(*table.columns)).first()
+    return None if row is None else model.model_validate(row._mapping)
+
+
+def commit(db: Session, *, after: Callable[[], None] | None = None) -> None:
+    """
+    Commits the caller's transaction, then calls `after`. Inside a commit
+    group the transaction is the group's: the changes are only flushed here,
+    and `after` waits until the whole group has committed.
+    """
+    group = db.info.get(_GROUP_KEY)
+    if group is None:
+        db.commit()
+        if after is not None:
+            after()
+        return
+    db.flush()
+    if after is not None:
+        group.append(after)
+
+
+def rollback(db: Session) -> None:
+    """
+    Abandons the caller's transaction. Inside a commit group it carries on,
+    with what this write executed so far, since the group's other writes
+    share it; writes must only leave harmless changes behind (such as a
+    task version bump) when they give up.
+    """
+    if _GROUP_KEY not in db.info:
+        db.rollback()
+
+
+class GroupCommitter:
+    """
+    Commits the small writes of concurrent requests together.
+
+    Requests hand their write, a function of a Session, to `run` and wait. A
+    background thread collects the writes queued within `window` seconds of
+    the first one, at most `max_size`, runs them one after another in a
+    single session and commits once: N writes cost one commit (one fsync)
+    instead of N. A write that finds no other queued behind it is committed
+    at once, without waiting for the window, so a lone client only pays the
+    hand-off to the thread; under concurrency the writes that arrive during a
+    commit form the next group. If any write of a group raises, the group is
+    rolled back and its writes are retried one transaction each, so a failure
+    only reaches its own request.
+
+    Writes must end with `commit` rather than `db.commit()`, and return
+    values that don't need the session afterwards, such as the copies made by
+    `insert_returning`.
+    """
+
+    def __init__(self, *, window: float, max_size: int):
+        self.window = window
+        self.max_size = max_size
+        self._queue: queue.Queue = queue.Queue()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def run(self, write: Callable[[Session], T]) -> T:
+        """Queues `write` for the next group and returns its result once the group has committed."""
+        future: concurrent.futures.Future = concurrent.futures.Future()
+        self._queue.put((write, future))
+        return future.result()
+
+    def _commit_group(self, engine: Engine, group: list) -> None:
+        if len(group) > 1:
+            with Session(engine) as db:
+                callbacks = db.info[_GROUP_KEY] = []
+                try:
+                    results = [write(db) for write, _ in group]
+                    db.commit()
+                except Exception:
+                    logger.info("Commit group of %d writes failed, retrying them one by one", len(group), exc_info=True)
+                    db.rollback()
+                else:
+                    for callback in callbacks:
+                        try:
+                            callback()
+                        except Exception:
+                            logger.exception("Post-commit callback failed")
+                    for (_, future), result in zip(group, results):
+                        future.set_result(result)
+                    return
+        for write, future in group:
+            with Session(engine) as db:
+                try:
+                    future.set_result(write(db))
+                except Exception as exc:
+                    future.set_exception(exc)
+
+    def _run(self, engine: Engine) -> None:
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is None:
+                return
+            group = [item]
+            deadline = time.monotonic() + self.window
+            while len(group) < self.max_size:
+                # The window is only waited for once a second write was already queued
+                timeout = max(0.0, deadline - time.monotonic()) if len(group) > 1 else 0.0
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                group.append(item)
+            self._commit_group(engine, group)
+
+    def start(self, engine: Engine) -> None:
+        self._thread = threading.Thread(target=self._run, args=(engine,), name="group-commit", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Commits the writes already queued, then stops the thread."""
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+
+
+group_committer = GroupCommitter(
+    window=settings.GROUP_COMMIT_WINDOW_MS / 1000, max_size=settings.GROUP_COMMIT_MAX_SIZE
+)
+
+
+def run_write(db: Session, write: Callable[[Session], T]) -> T:
+    """
+    Runs an endpoint's write: through `group_committer` when it is running,
+    after closing the request's session so its connection isn't held while
+    the request waits, otherwise directly on `db`.
+    """
+    if not group_committer.running:
+        return write(db)
+    db.close()
+    return group_committer.run(write)
@@ -1,9 +1,10 @@
 
 
-from datetime import datetime
+from datetime import date, datetime
 from enum import Enum
 from typing import List, Optional
 
+from sqlalchemy import Index
 from sqlmodel import SQLModel, Field, Relationship
 from .user_models import ProjectMemberLink
 
@@ -18,6 +19,10 @@ class Project(SQLModel, table=True):
     description: str | None = None
     created_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
     owner_id: int = Field(foreign_key="user.id")
+    # Advanced on every project or member write; with ProjectTaskVersion, the detail ETag
+    version: int = Field(default=1, nullable=False)
+    # Last change to the project's own fields, for delta sync
+    updated_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
 
     # Use quotes for "User" and the link model name
     members: List["User"] = Relationship(back_populates="projects", link_model=ProjectMemberLink)
@@ -25,12 +30,34 @@ class Project(SQLModel, table=True):
     comments: List["Comment"] = Relationship(back_populates="project")
 
 class Task(SQLModel, table=True):
+    # Task listings are keyset-paginated on id within a project, optionally filtered
+    __table_args__ = (
+        Index("ix_task_project_id_id", "project_id", "id"),
+        Index("ix_task_project_status_id", "project_id", "status", "id"),
+        Index("ix_task_project_assignee_id", "project_id", "assignee_id", "id"),
+        Index("ix_task_project_due_date", "project_id", "due_date"),
+        # Delta sync reads a project's tasks changed after a point in time
+        Index("ix_task_project_updated_id", "project_id", "updated_at", "id"),
+        # A user's task queue across projects, by status then due date
+        Index("ix_task_assignee_status_due_id", "assignee_id", "status", "due_date", "id"),
+        # Archival picks the tasks Done since before a cutoff
+        Index("ix_task_status_updated", "status", "updated_at"),
+        # Due-date reminders read the open tasks due within a time range
+        Index("ix_task_status_due", "status", "due_date"),
+        # Ids are never reused (SQLite would otherwise reuse the highest one),
+        # since archived tasks keep theirs
+        {"sqlite_autoincrement": True},
+    )
+
     id: int | None = Field(default=None, primary_key=True)
     title: str
     description: str | None = None
     status: TaskStatus = Field(default=TaskStatus.TO_DO)
     created_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
     due_date: datetime | None = None
+    updated_at: datetime = Field(
+        default_factory=datetime.utcnow, nullable=False, sa_column_kwargs={"onupdate": datetime.utcnow}
+    )
 
     project_id: int = Field(foreign_key="project.id")
     assignee_id: int | None = Field(default=None, foreign_key="user.id")
@@ -38,7 +65,97 @@ class Task(SQLModel, table=True):
     project: "Project" = Relationship(back_populates="tasks")
     assignee: Optional["User"] = Relationship(back_populates="assigned_tasks")
 
+class ArchivedTask(SQLModel, table=True):
+    """
+    Tasks moved out of `task`, with their ids: Done for longer than
+    TASK_ARCHIVE_AFTER_DAYS, or deleted. Listings only include the archived
+    tasks that weren't deleted, and only when asked to; the task counters
+    still count those.
+    """
+    __tablename__ = "archived_task"
+    __table_args__ = (
+        Index("ix_archived_task_project_deleted_id", "project_id", "deleted", "id"),
+    )
+
+    id: int = Field(primary_key=True, sa_column_kwargs={"autoincrement": False})
+    title: str
+    description: str | None = None
+    status: TaskStatus
+    created_at: datetime
+    due_date: datetime | None = None
+    updated_at: datetime
+    project_id: int = Field(foreign_key="project.id")
+    assignee_id: int | None = Field(default=None, foreign_key="user.id")
+    archived_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
+    deleted: bool = Field(default=False, nullable=False)
+
+class ProjectTaskCounter(SQLModel, table=True):
+    """
+    Number of a project's tasks per (status, assignee), maintained by crud_task
+    in the same transaction as every task write. Unassigned tasks use
+    assignee_id 0, since primary key columns can't be NULL.
+    """
+    project_id: int = Field(foreign_key="project.id", primary_key=True)
+    status: TaskStatus = Field(primary_key=True)
+    assignee_id: int = Field(default=0, primary_key=True)
+    count: int = Field(default=0, nullable=False)
+
+class ProjectDueCounter(SQLModel, table=True):
+    """Number of a project's open (not Done) tasks per due day, for overdue counts."""
+    project_id: int = Field(foreign_key="project.id", primary_key=True)
+    due_day: date = Field(primary_key=True)
+    count: int = Field(default=0, nullable=False)
+
+class ProjectTaskVersion(SQLModel, table=True):
+    """
+    Advanced on every write to a project's tasks, next to them (on the
+    project's shard when sharded), so task writes never touch the project
+    row; no row yet counts as 0.
+    """
+    project_id: int = Field(foreign_key="project.id", primary_key=True)
+    version: int = Field(default=0, nullable=False)
+
+class ProjectShard(SQLModel, table=True):
+    """The shard a project's tasks and comments live on; projects without a row are on shard 0."""
+    project_id: int = Field(foreign_key="project.id", primary_key=True)
+    shard: int = Field(nullable=False)
+
+class IdBlock(SQLModel, table=True):
+    """
+    Next task or comment id to hand out when sharded; processes take blocks
+    of SHARD_ID_BLOCK_SIZE ids from it, so ids are unique across shards and
+    survive projects moving between them.
+    """
+    __tablename__ = "id_block"
+
+    name: str = Field(primary_key=True)
+    next_id: int = Field(nullable=False)
+
+class SyncTombstone(SQLModel, table=True):
+    """
+    Record of a deletion for delta sync clients: a deleted task (visible to the
+    project's members), or a project a user lost access to (visible to that
+    user only, `user_id` set). Kept for SYNC_TOMBSTONE_RETENTION_DAYS.
+    """
+    __table_args__ = (
+        Index("ix_synctombstone_project_deleted", "project_id", "deleted_at"),
+        Index("ix_synctombstone_user_deleted", "user_id", "deleted_at"),
+    )
+
+    id: int | None = Field(default=None, primary_key=True)
+    entity: str
+    entity_id: int
+    # No foreign keys: tombstones outlive what they point at
+    project_id: int
+    user_id: int | None = None
+    deleted_at: datetime = Field(default_factory=datetime.utcnow, nullable=False, index=True)
+
 class Comment(SQLModel, table=True):
+    # Threads are listed newest first, keyset-paginated on (created_at, id)
+    __table_args__ = (
+        Index("ix_comment_project_created_id", "project_id", "created_at", "id"),
+    )
+
     id: int | None = Field(default=None, primary_key=True)
     content: str
     created_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
@@ -1,3 +1,4 @@
+from datetime import datetime
 from typing import List
 
 from sqlmodel import SQLModel, Field, Relationship
@@ -5,6 +6,8 @@ from sqlmodel import SQLModel, Field, Relationship
 class ProjectMemberLink(SQLModel, table=True):
     user_id: int | None = Field(default=None, foreign_key="user.id", primary_key=True)
     project_id: int | None = Field(default=None, foreign_key="project.id", primary_key=True)
+    # When the user gained access; delta sync sends them the whole project after that
+    joined_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
 
 class User(SQLModel,table=True):
     id:int|None=Field(default=None,index=True,primary_key=True)
@@ -12,9 +15,14 @@ class User(SQLModel,table=True):
     email:str=Field(unique=True,index=True)
     hashed_password:str
     is_active:bool=Field(default=True)
+    # Indexed for the user search index, which re-reads the users changed since its last sync
+    updated_at:datetime=Field(
+        default_factory=datetime.utcnow, nullable=False, index=True, sa_column_kwargs={"onupdate": datetime.utcnow}
+    )
 
     projects: List["Project"] = Relationship(back_populates="members", link_model=ProjectMemberLink)
-    assigned_tasks: List["Task"] = Relationship(back_populates="assignee")
+    # Unbounded; page through them with crud_task.get_task_rows_by_assignee instead
+    assigned_tasks: List["Task"] = Relationship(back_populates="assignee", sa_relationship_kwargs={"lazy": "raise"})
     comments: List["Comment"] = Relationship(back_populates="author")
 
 
@@ -0,0 +1,17 @@
+from datetime import datetime
+
+from sqlmodel import SQLModel, Field
+
+from app.schemas.user_schemas import UserPublic
+
+
+class CommentCreate(SQLModel):
+    content: str = Field(min_length=1)
+
+class CommentRead(SQLModel):
+    id: int
+    content: str
+    created_at: datetime
+    project_id: int
+    author_id: int
+    author: UserPublic
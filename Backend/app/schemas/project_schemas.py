@@ -1,6 +1,7 @@
 from sqlmodel import SQLModel
-from typing import List, Optional
+from typing import Dict, List, Optional
 from app.schemas.user_schemas import UserPublic
+from app.models.project_models import TaskStatus
 from app.schemas.task_schemas import TaskRead
 
 
@@ -23,4 +24,18 @@ class ProjectDetail(ProjectBase):
 class ProjectUpdate(SQLModel):
     """Schema for updating a project's details."""
     name: Optional[str] = None
-    description: Optional[str] = None
\ No newline at end of file
+    description: Optional[str] = None
+
+
+class AssigneeTaskStats(SQLModel):
+    """Task counts of one assignee; assignee_id is None for unassigned tasks."""
+    assignee_id: int | None
+    total: int
+    by_status: Dict[TaskStatus, int]
+
+class ProjectStats(SQLModel):
+    project_id: int
+    total: int
+    by_status: Dict[TaskStatus, int]
+    overdue: int
+    assignees: List[AssigneeTaskStats] = []
@@ -0,0 +1,22 @@
+from typing import List
+
+from sqlmodel import SQLModel
+
+from app.schemas.project_schemas import ProjectRead
+from app.schemas.task_schemas import TaskRead
+
+
+class SyncRead(SQLModel):
+    """
+    Changes since the token a client sent. Deletions should be applied before
+    the projects and tasks; with `reset`, the response is a full snapshot that
+    replaces everything the client has stored.
+    """
+    projects: List[ProjectRead] = []
+    tasks: List[TaskRead] = []
+    deleted_project_ids: List[int] = []
+    deleted_task_ids: List[int] = []
+    # Token for the next sync; while `has_more`, call again right away for the rest
+    next: str
+    has_more: bool = False
+    reset: bool = False
@@ -1,4 +1,6 @@
 from datetime import datetime
+from typing import List
+from pydantic import field_validator
 from sqlmodel import SQLModel
 from app.models.project_models import TaskStatus
 
@@ -23,3 +25,56 @@ class TaskRead(Taskbase):
     status: TaskStatus
     project_id: int
     assignee_id: int|None
+
+
+class TaskBatchCreate(SQLModel):
+    tasks: List[TaskCreate]
+
+class TaskBatchUpdateItem(SQLModel):
+    """One item of a batch update; only the fields sent are changed."""
+    id: int
+    title: str|None = None
+    description: str|None = None
+    due_date: datetime|None = None
+    status: TaskStatus|None = None
+    assignee_id: int|None = None
+
+    @field_validator("title", "status")
+    @classmethod
+    def _not_null(cls, value):
+        # Omitting them leaves them unchanged, but the columns can't be cleared
+        if value is None:
+            raise ValueError("may be omitted but not null")
+        return value
+
+class TaskBatchUpdate(SQLModel):
+    tasks: List[TaskBatchUpdateItem]
+
+class TaskBatchResult(SQLModel):
+    """Outcome of one item of a batch request, in the order the items were sent."""
+    index: int
+    ok: bool
+    task: TaskRead|None = None
+    error: str|None = None
+
+class TaskImportRow(TaskCreate):
+    """One row of a task import; columns other than `title` are optional."""
+    description: str|None = None
+    due_date: datetime|None = None
+    assignee_id: int|None = None
+    # Alternative to assignee_id, resolved against the project's members
+    assignee_email: str|None = None
+    status: TaskStatus = TaskStatus.TO_DO
+
+class TaskImportError(SQLModel):
+    line: int
+    error: str
+
+class TaskImportReport(SQLModel):
+    imported: int
+    rejected: int
+    chunks: int
+    elapsed_s: float
+    rows_per_s: float
+    # Capped at IMPORT_MAX_REPORTED_ERRORS; `rejected` counts all of them
+    errors: List[TaskImportError] = []
@@ -6,4 +6,5 @@ class Token(BaseModel):
 
 class TokenData(BaseModel):
     email: str|None = None
+    user_id: int|None = None
 
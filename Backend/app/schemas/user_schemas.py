@@ -8,6 +8,11 @@ class UserBase(SQLModel):
 class UserCreate(UserBase):
     password: str
 
+class UserUpdate(SQLModel):
+    email: str | None = None
+    full_name: str | None = None
+    is_active: bool | None = None
+
 class UserRead(UserBase):
     id: int
 
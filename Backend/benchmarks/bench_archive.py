@@ -0,0 +1,127 @@
+"""
+Hot-path latency as Done tasks pile up, with and without archival.
+
+One project keeps `--hot` open tasks throughout. For each of the `--done`
+volumes, that many more long-Done tasks are added and the hot paths are
+measured with them still in `task`, then again after `archive_done_tasks` has
+moved everything Done to the archive table (so the archive keeps growing).
+The hot paths: the first page of the task list, the To-Do filter, the user's
+task queue, the project stats, a full export, and a cold delta sync walked
+through all its pages. Also reports archival throughput and checks the task
+counters still match the tasks.
+"""
+import argparse
+import time
+from datetime import datetime, timedelta
+
+from benchmarks.common import configure_environment, measure, report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--hot", type=int, default=2000, help="open tasks in the project")
+    parser.add_argument("--done", default="0,20000,100000", help="comma-separated Done volumes to add, in turn")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=30)
+    args = parser.parse_args()
+
+    configure_environment()
+
+    from fastapi.testclient import TestClient
+    from sqlalchemy import func, insert
+    from sqlmodel import Session, select
+
+    from app.core import security
+    from app.crud import crud_stats, crud_task
+    from app.db import database
+    from app.models.project_models import ArchivedTask, Project, Task, TaskStatus
+    from app.models.user_models import ProjectMemberLink, User
+    from main import app
+
+    database.create_db_and_tables()
+    now = datetime.utcnow()
+    long_ago = now - timedelta(days=365)
+    with Session(database.engine) as db:
+        db.add(User(id=1, full_name="Owner", email="owner@bench.test", hashed_password="x"))
+        db.add(Project(id=1, name="Long-lived", description=None, owner_id=1))
+        db.add(ProjectMemberLink(user_id=1, project_id=1))
+        db.flush()
+        db.execute(insert(Task.__table__), [
+            {
+                "title": f"Open task {i}", "description": None,
+                "status": (TaskStatus.TO_DO if i % 2 else TaskStatus.IN_PROGRESS).name,
+                "due_date": now + timedelta(hours=i), "project_id": 1, "assignee_id": 1,
+                "created_at": now, "updated_at": now,
+            }
+            for i in range(args.hot)
+        ])
+        db.commit()
+
+    headers = {"Authorization": f"Bearer {security.create_access_token(subject='owner@bench.test', user_id=1)}"}
+    results: dict = {"hot_tasks": args.hot, "volumes": []}
+    added = 0
+    with TestClient(app) as client:
+        def get(url: str, **params):
+            response = client.get(url, params=params, headers=headers)
+            assert response.status_code == 200, response.text
+            return response
+
+        def cold_sync() -> int:
+            token, size = None, 0
+            while True:
+                response = get("/api/sync/", limit=5000, **({"since": token} if token else {}))
+                body = response.json()
+                token, size = body["next"], size + len(response.content)
+                if not body["has_more"]:
+                    return size
+
+        hot_paths = {
+            "list_first_page": lambda: get("/api/projects/1/tasks/", limit=100),
+            "list_to_do": lambda: get("/api/projects/1/tasks/", limit=100, status="To-Do"),
+            "my_tasks": lambda: get("/api/users/me/tasks", limit=100),
+            "stats": lambda: get("/api/projects/1/stats"),
+            "export": lambda: get("/api/projects/1/tasks/export", format="ndjson"),
+            "cold_sync": cold_sync,
+        }
+
+        def measure_hot_paths() -> dict:
+            measured = {}
+            for name, call in hot_paths.items():
+                iterations = args.requests if name in ("export", "cold_sync") else args.requests * 5
+                measured[name] = round(measure(call, iterations)["p50_ms"], 2)
+            return measured
+
+        for volume in (int(value) for value in args.done.split(",")):
+            with Session(database.engine) as db:
+                for start in range(0, volume, 50_000):
+                    db.execute(insert(Task.__table__), [
+                        {
+                            "title": f"Finished task {added + i}", "description": "Done long ago",
+                            "status": TaskStatus.DONE.name, "due_date": long_ago, "project_id": 1,
+                            "assignee_id": 1, "created_at": long_ago, "updated_at": long_ago,
+                        }
+                        for i in range(start, min(volume, start + 50_000))
+                    ])
+                db.commit()
+                crud_stats.rebuild_task_stats(db)
+            added += volume
+
+            entry: dict = {"done_added": volume, "done_total": added}
+            entry["unarchived_p50_ms"] = measure_hot_paths()
+
+            with Session(database.engine) as db:
+                started = time.perf_counter()
+                archived = crud_task.archive_done_tasks(db, done_before=now - timedelta(days=90), batch_size=args.batch_size)
+                elapsed = time.perf_counter() - started
+                entry["archived"] = archived
+                entry["archive_rows_per_s"] = archived / elapsed if archived else None
+                entry["archive_table_rows"] = db.exec(select(func.count()).select_from(ArchivedTask)).one()
+                entry["stats_drift"] = len(crud_stats.verify_task_stats(db))
+            entry["archived_p50_ms"] = measure_hot_paths()
+            results["volumes"].append(entry)
+
+    report("archive", results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Tail latency under mixed concurrent load, blocking vs. async database access.
+
+Runs `--concurrency` workers that mix project listings and project creations
+while a probe repeatedly hits the DB-free `GET /` route. The "blocking" mode
+registers benchmark-only routes that use the synchronous Session inside
+`async def` (what `create_project`/`get_projects` used to do), so every query
+stalls the event loop; the "async" mode uses the real endpoints on AsyncSession.
+The probe's p99 shows how much the event loop was blocked.
+
+Keep `--concurrency` below the sync engine's pool size (5 + 10 overflow): in
+blocking mode a pool checkout that has to wait blocks the very event loop that
+would release the other connections, and the run stalls until the pool timeout.
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.common import configure_environment, percentiles, report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--write-ratio", type=float, default=0.2)
+    args = parser.parse_args()
+
+    configure_environment()
+
+    import httpx
+    from fastapi import Depends
+    from sqlmodel import Session
+
+    from app.api.dependencies import get_current_active_user
+    from app.core import security
+    from app.crud import crud_project
+    from app.db import database
+    from app.models.user_models import User
+    from app.schemas.project_schemas import ProjectCreate
+    from main import app
+
+    database.engine.echo = False
+    database.create_db_and_tables()
+
+    @app.get("/bench/blocking/projects")
+    async def blocking_list(db: Session = Depends(database.get_session), user: User = Depends(get_current_active_user)):
+        return crud_project.get_project_by_user(db, user_id=user.id)
+
+    @app.post("/bench/blocking/projects")
+    async def blocking_create(project_in: ProjectCreate, db: Session = Depends(database.get_session), user: User = Depends(get_current_active_user)):
+        return crud_project.create_project_with_owner(db, project_in=project_in, owner_id=user.id)
+
+    with Session(database.engine) as db:
+        user = User(full_name="Bench", email="bench@bench.test", hashed_password=security.get_password_hash("x"))
+        db.add(user)
+        db.commit()
+        for i in range(200):
+            crud_project.create_project_with_owner(
+                db, project_in=ProjectCreate(name=f"seed {i}", description=None), owner_id=user.id
+            )
+        headers = {"Authorization": f"Bearer {security.create_access_token(subject=user.email, user_id=user.id)}"}
+
+    async def run(list_path: str, create_path: str) -> dict:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            remaining = iter(range(args.requests))
+            samples: dict[str, list[float]] = {"list": [], "create": [], "probe": []}
+            done = asyncio.Event()
+            write_every = max(1, round(1 / args.write_ratio)) if args.write_ratio else 0
+
+            async def worker() -> None:
+                for i in remaining:
+                    is_write = write_every and i % write_every == 0
+                    t0 = time.perf_counter()
+                    if is_write:
+                        await client.post(create_path, json={"name": f"p{i}", "description": None}, headers=headers)
+                    else:
+                        await client.get(list_path, headers=headers)
+                    samples["create" if is_write else "list"].append(time.perf_counter() - t0)
+
+            async def probe() -> None:
+                while not done.is_set():
+                    t0 = time.perf_counter()
+                    await client.get("/")
+                    samples["probe"].append(time.perf_counter() - t0)
+                    await asyncio.sleep(0.005)
+
+            probe_task = asyncio.create_task(probe())
+            started = time.perf_counter()
+            await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+            elapsed = time.perf_counter() - started
+            done.set()
+            await probe_task
+        return {
+            "throughput_per_s": args.requests / elapsed,
+            **{name: percentiles(values) for name, values in samples.items()},
+        }
+
+    results = {
+        "blocking": asyncio.run(run("/bench/blocking/projects", "/bench/blocking/projects")),
+        "async": asyncio.run(run("/api/projects/", "/api/projects/")),
+    }
+    report("async_concurrency", results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Comment listing latency on a project with a long discussion thread.
+
+Seeds `--comments` comments on one project (from `--authors` users), then
+times the newest page and a page deep into the thread reached by keyset
+cursor, through the API and at the CRUD level, next to the same deep page
+fetched with OFFSET for comparison. Also prints the SQLite plan of the keyset
+query to show it is served by the (project_id, created_at, id) index.
+"""
+import argparse
+from datetime import datetime, timedelta
+
+from benchmarks.common import configure_environment, measure, report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--comments", type=int, default=100_000)
+    parser.add_argument("--authors", type=int, default=200)
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=500)
+    args = parser.parse_args()
+
+    configure_environment()
+
+    from fastapi.testclient import TestClient
+    from sqlalchemy import insert, tuple_
+    from sqlmodel import Session, select
+
+    from app.core import security
+    from app.crud import crud_comment
+    from app.db import database
+    from app.models.project_models import Comment, Project
+    from app.models.user_models import ProjectMemberLink, User
+    from main import app
+
+    database.create_db_and_tables()
+    now = datetime.utcnow()
+    with Session(database.engine) as db:
+        db.execute(insert(User), [
+            {"id": i, "full_name": f"Author {i}", "email": f"author{i}@bench.test", "hashed_password": "x", "is_active": True}
+            for i in range(1, args.authors + 1)
+        ])
+        db.add(Project(id=1, name="Discussion", description=None, owner_id=1))
+        db.add(ProjectMemberLink(user_id=1, project_id=1))
+        # A second, busier project so the index has to discriminate on project_id
+        db.add(Project(id=2, name="Other", description=None, owner_id=1))
+        for project_id in (1, 2):
+            db.execute(insert(Comment), [
+                {
+                    "content": f"Comment {i} " + "lorem ipsum " * (i % 8),
+                    "created_at": now - timedelta(seconds=args.comments - i),
+                    "project_id": project_id,
+                    "author_id": i % args.authors + 1,
+                }
+                for i in range(args.comments)
+            ])
+        db.commit()
+        headers = {"Authorization": f"Bearer {security.create_access_token(subject='author1@bench.test', user_id=1)}"}
+
+        keyset = (
+            select(Comment).where(Comment.project_id == 1)
+            .order_by(Comment.created_at.desc(), Comment.id.desc()).limit(args.page_size)
+        )
+        plan = None
+        if database.engine.dialect.name == "sqlite":
+            cursor_query = keyset.where(tuple_(Comment.created_at, Comment.id) < tuple_(now, 1))
+            compiled = cursor_query.compile(dialect=database.engine.dialect)
+            params = tuple(compiled.params[name] for name in compiled.positiontup)
+            plan = [
+                row[-1] for row in
+                db.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", params).all()
+            ]
+
+    results = {"comments": args.comments, "page_size": args.page_size, "plan": plan}
+    deep_page = args.comments // args.page_size // 2
+    with TestClient(app) as client:
+        url = f"/api/projects/1/comments/?limit={args.page_size}"
+
+        def latest_page() -> None:
+            response = client.get(url, headers=headers)
+            assert response.status_code == 200 and len(response.json()) == args.page_size, response.text
+
+        results["api_latest_page"] = measure(latest_page, args.requests)
+
+        # Walk the cursor chain to the middle of the thread
+        cursor = None
+        for _ in range(deep_page):
+            cursor = client.get(url + (f"&cursor={cursor}" if cursor else ""), headers=headers).headers["X-Next-Cursor"]
+
+        def cursor_page() -> None:
+            response = client.get(f"{url}&cursor={cursor}", headers=headers)
+            assert response.status_code == 200 and len(response.json()) == args.page_size, response.text
+
+        results[f"api_page_{deep_page}_by_cursor"] = measure(cursor_page, args.requests)
+
+    with Session(database.engine) as db:
+        results["crud_latest_page"] = measure(
+            lambda: crud_comment.get_comments_by_project(db, project_id=1, limit=args.page_size), args.requests
+        )
+        offset_statement = keyset.offset(deep_page * args.page_size)
+        results[f"offset_page_{deep_page}"] = measure(lambda: db.exec(offset_statement).all(), args.requests // 5)
+
+    report("comments", results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+Peak memory of the streaming task export as the project grows.
+
+Seeds one project per `--rows` size, then drives `GET
+/api/projects/{id}/tasks/export` through the ASGI app directly, discarding
+body chunks as they are sent, and records the tracemalloc peak of each
+export. For contrast it also records the peak of materializing the largest
+project the old way (all rows in a list, then one JSON document).
+
+Exits with status 1 if the largest export's peak exceeds the smallest's by
+more than `--max-growth` (a ratio), i.e. if memory isn't flat.
+"""
+import argparse
+import asyncio
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from benchmarks.common import configure_environment, report
+
+
+async def _drive(app, path: str, query: str, headers: list[tuple[bytes, bytes]]) -> tuple[int, int]:
+    """Runs one GET through the ASGI app; returns (status, body bytes) without keeping the body."""
+    done = asyncio.Event()
+    requested = False
+    status = 0
+    size = 0
+
+    async def receive():
+        # The request has no body; after it, the client "disconnects" once the response is complete
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal status, size
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            size += len(message.get("body", b""))
+            if not message.get("more_body", False):
+                done.set()
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0", "spec_version": "2.3"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "",
+        "query_string": query.encode(), "headers": headers, "client": ("bench", 0), "server": ("bench", 80),
+    }
+    await app(scope, receive, send)
+    return status, size
+
+
+def _seed(rows: list[int]) -> None:
+    """Creates the schema, an owner (user 1) and one project per size, numbered from 1, with that many tasks."""
+    from sqlalchemy import insert
+    from sqlmodel import Session
+
+    from app.db import database
+    from app.models.project_models import Project, Task, TaskStatus
+    from app.models.user_models import ProjectMemberLink, User
+
+    database.create_db_and_tables()
+    statuses = list(TaskStatus)
+    now = datetime.utcnow()
+    with Session(database.engine) as db:
+        db.add(User(id=1, full_name="Owner", email="owner@bench.test", hashed_password="x"))
+        for project_id, count in enumerate(rows, start=1):
+            db.add(Project(id=project_id, name=f"Project {count}", description=None, owner_id=1))
+            db.add(ProjectMemberLink(user_id=1, project_id=project_id))
+            for start in range(0, count, 50_000):
+                db.execute(insert(Task), [
+                    {
+                        "title": f"Task {i}",
+                        "description": "Exported task, with a comma" if i % 3 else None,
+                        "status": statuses[i % 3],
+                        "created_at": now,
+                        "due_date": now + timedelta(hours=i) if i % 2 else None,
+                        "project_id": project_id,
+                        "assignee_id": 1 if i % 4 else None,
+                    }
+                    for i in range(start, min(count, start + 50_000))
+                ])
+        db.commit()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 400_000])
+    parser.add_argument("--max-growth", type=float, default=1.5)
+    args = parser.parse_args()
+
+    configure_environment()
+
+    import orjson
+    from sqlmodel import Session
+
+    from app.core import security
+    from app.crud import crud_task
+    from app.db import database
+    from main import app
+
+    _seed(args.rows)
+
+    token = security.create_access_token(subject="owner@bench.test", user_id=1)
+    headers = [(b"authorization", f"Bearer {token}".encode())]
+
+    results = {}
+    tracemalloc.start()
+    for fmt, gzip in (("ndjson", False), ("csv", False), ("ndjson", True)):
+        name = f"{fmt}{'_gzip' if gzip else ''}"
+        # Warm up imports, caches and the connection pool outside the measurement
+        asyncio.run(_drive(app, "/api/projects/1/tasks/export", f"format={fmt}&gzip={gzip}", headers))
+        runs = {}
+        for project_id, count in enumerate(args.rows, start=1):
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+            started = time.perf_counter()
+            status, size = asyncio.run(
+                _drive(app, f"/api/projects/{project_id}/tasks/export", f"format={fmt}&gzip={gzip}", headers)
+            )
+            elapsed = time.perf_counter() - started
+            assert status == 200, status
+            runs[count] = {
+                "peak_mb": (tracemalloc.get_traced_memory()[1] - baseline) / 2**20,
+                "body_mb": size / 2**20,
+                "rows_per_s": count / elapsed,
+            }
+        results[name] = runs
+
+    largest_project = len(args.rows)
+    tracemalloc.reset_peak()
+    baseline = tracemalloc.get_traced_memory()[0]
+    with Session(database.engine) as db:
+        body = orjson.dumps(crud_task.get_task_rows_by_project(db, project_id=largest_project))
+    results["materialized_largest"] = {
+        "rows": args.rows[-1],
+        "peak_mb": (tracemalloc.get_traced_memory()[1] - baseline) / 2**20,
+        "body_mb": len(body) / 2**20,
+    }
+    del body
+    tracemalloc.stop()
+
+    failures = []
+    for name, runs in results.items():
+        if name == "materialized_largest":
+            continue
+        smallest, largest = runs[args.rows[0]]["peak_mb"], runs[args.rows[-1]]["peak_mb"]
+        growth = largest / smallest if smallest else float("inf")
+        runs["growth"] = growth
+        if growth > args.max_growth:
+            failures.append(f"{name}: peak grew {growth:.2f}x from {args.rows[0]} to {args.rows[-1]} rows")
+
+    report("export_memory", results)
+    if failures:
+        print("\n".join(failures), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Write throughput under concurrency, each request committing on its own vs.
+group commit.
+
+Seeds `--projects` projects with some tasks, then sends `--writes` single-task
+writes (half creations, half updates of random tasks) through the API from
+`--concurrency` concurrent clients, in turn with every request committing its
+own transaction and with `group_committer` running with a `--window-ms`
+window. Reports writes/s and latency per concurrency level, plus SQL
+statements and commits per write, and checks the task counters still match
+the tasks afterwards. Commits are fsyncs here; run it against the database's
+real disk (`--database-url`) rather than tmpfs to see their cost.
+"""
+import argparse
+import asyncio
+import random
+import time
+
+from benchmarks.common import configure_environment, percentiles, report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--database-url")
+    parser.add_argument("--projects", type=int, default=20)
+    parser.add_argument("--tasks", type=int, default=200, help="tasks per project")
+    parser.add_argument("--writes", type=int, default=1000, help="writes per run")
+    parser.add_argument("--concurrency", default="1,8,32", help="comma-separated client counts")
+    parser.add_argument("--window-ms", type=float, default=2.0)
+    parser.add_argument("--max-size", type=int, default=64)
+    args = parser.parse_args()
+
+    configure_environment(args.database_url)
+
+    import httpx
+    from sqlalchemy import event, insert
+    from sqlmodel import Session, select
+
+    from app.core import security
+    from app.crud import crud_stats
+    from app.db import database, unit_of_work
+    from app.models.project_models import Project, Task, TaskStatus
+    from app.models.user_models import ProjectMemberLink, User
+    from main import app
+
+    database.create_db_and_tables()
+    with Session(database.engine) as db:
+        db.add(User(id=1, full_name="Writer", email="writer@bench.test", hashed_password="x"))
+        for project_id in range(1, args.projects + 1):
+            db.add(Project(id=project_id, name=f"Project {project_id}", description=None, owner_id=1))
+            db.add(ProjectMemberLink(user_id=1, project_id=project_id))
+        db.flush()
+        db.execute(insert(Task.__table__), [
+            {"title": f"Task {i}", "description": None, "status": TaskStatus.TO_DO.name, "project_id": project_id,
+             "assignee_id": 1, "due_date": None}
+            for project_id in range(1, args.projects + 1)
+            for i in range(args.tasks)
+        ])
+        db.commit()
+        crud_stats.rebuild_task_stats(db)
+        task_ids = {
+            project_id: db.exec(select(Task.id).where(Task.project_id == project_id)).all()
+            for project_id in range(1, args.projects + 1)
+        }
+
+    headers = {"Authorization": f"Bearer {security.create_access_token(subject='writer@bench.test', user_id=1)}"}
+    counts = {"statements": 0, "commits": 0}
+    event.listen(database.engine, "before_cursor_execute", lambda *_: counts.__setitem__("statements", counts["statements"] + 1))
+    event.listen(database.engine, "commit", lambda *_: counts.__setitem__("commits", counts["commits"] + 1))
+
+    async def run(concurrency: int) -> dict:
+        rng = random.Random(concurrency)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            remaining = iter(range(args.writes))
+            samples: list[float] = []
+            failures = 0
+
+            async def worker() -> None:
+                nonlocal failures
+                for i in remaining:
+                    project_id = rng.randint(1, args.projects)
+                    body = {"title": f"Write {i}", "description": None, "due_date": None, "assignee_id": 1}
+                    t0 = time.perf_counter()
+                    if i % 2:
+                        response = await client.post(f"/api/projects/{project_id}/tasks/", json=body, headers=headers)
+                    else:
+                        task_id = rng.choice(task_ids[project_id])
+                        status = rng.choice(list(TaskStatus)).value
+                        response = await client.put(
+                            f"/api/projects/{project_id}/tasks/{task_id}", json={**body, "status": status}, headers=headers
+                        )
+                    samples.append(time.perf_counter() - t0)
+                    failures += response.status_code not in (200, 201)
+
+            counts.update(statements=0, commits=0)
+            started = time.perf_counter()
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+            elapsed = time.perf_counter() - started
+        return {
+            "writes_per_s": args.writes / elapsed,
+            "failures": failures,
+            "statements_per_write": counts["statements"] / args.writes,
+            "commits_per_write": counts["commits"] / args.writes,
+            **percentiles(samples),
+        }
+
+    results: dict = {"database": database.engine.dialect.name, "window_ms": args.window_ms, "max_size": args.max_size}
+    committer = unit_of_work.group_committer
+    committer.window, committer.max_size = args.window_ms / 1000, args.max_size
+    for mode in ("per_request", "group_commit"):
+        if mode == "group_commit":
+            committer.start(database.engine)
+        results[mode] = {
+            f"concurrency_{concurrency}": asyncio.run(run(concurrency))
+            for concurrency in (int(value) for value in args.concurrency.split(","))
+        }
+        committer.stop()
+        with Session(database.engine) as db:
+            results[mode]["stats_drift"] = len(crud_stats.verify_task_stats(db))
+
+    report("group_commit", results)
+
+
+if __name__ == "__main__":
+    main()
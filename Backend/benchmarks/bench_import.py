@@ -0,0 +1,133 @@
+"""
+Bulk task import throughput.
+
+Generates `--rows` task rows as CSV and NDJSON, a mix of assignees given by id,
+by email and unassigned, with `--invalid-every` rows deliberately invalid, and
+loads each into its own project through `TaskImporter` (the path shared by the
+import endpoint and `manage.py import-tasks`). A smaller file also goes through
+the HTTP endpoint. Reports rows/s and checks the imported and rejected counts.
+"""
+import argparse
+import csv
+import io
+import json
+import time
+from datetime import datetime, timedelta
+
+from benchmarks.common import configure_environment, report
+
+
+def generate(rows: int, members: int, invalid_every: int) -> list[dict]:
+    start = datetime(2026, 1, 1)
+    records = []
+    for i in range(rows):
+        record = {
+            "title": f"Imported task {i}",
+            "description": "Migrated from the old tracker" if i % 2 else "",
+            "status": ("To-Do", "In Progress", "Done")[i % 3],
+            "due_date": (start + timedelta(hours=i)).isoformat() if i % 4 else "",
+        }
+        if i % 3 == 0:
+            record["assignee_id"] = i % members + 1
+        elif i % 3 == 1:
+            record["assignee_email"] = f"member{i % members + 1}@bench.test"
+        if invalid_every and i % invalid_every == invalid_every - 1:
+            record["status"] = "Someday"
+        records.append(record)
+    return records
+
+
+def to_csv(records: list[dict]) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(
+        buffer, fieldnames=["title", "description", "status", "due_date", "assignee_id", "assignee_email"]
+    )
+    writer.writeheader()
+    writer.writerows(records)
+    return buffer.getvalue().encode()
+
+
+def to_ndjson(records: list[dict]) -> bytes:
+    return "".join(json.dumps({k: v for k, v in r.items() if v != ""}) + "\n" for r in records).encode()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--http-rows", type=int, default=50_000)
+    parser.add_argument("--members", type=int, default=50)
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("--invalid-every", type=int, default=1000)
+    args = parser.parse_args()
+
+    configure_environment()
+
+    from fastapi.testclient import TestClient
+    from sqlalchemy import insert
+    from sqlmodel import Session
+
+    from app.core import security
+    from app.crud import crud_import, crud_stats
+    from app.db import database
+    from app.models.project_models import Project
+    from app.models.user_models import ProjectMemberLink, User
+    from main import app
+
+    database.create_db_and_tables()
+    with Session(database.engine) as db:
+        db.execute(insert(User), [
+            {"id": i, "full_name": f"Member {i}", "email": f"member{i}@bench.test", "hashed_password": "x", "is_active": True}
+            for i in range(1, args.members + 1)
+        ])
+        for project_id in (1, 2, 3):
+            db.add(Project(id=project_id, name=f"Import {project_id}", description=None, owner_id=1))
+            db.execute(insert(ProjectMemberLink), [
+                {"user_id": i, "project_id": project_id} for i in range(1, args.members + 1)
+            ])
+        db.commit()
+
+    records = generate(args.rows, args.members, args.invalid_every)
+    expected_rejected = args.rows // args.invalid_every if args.invalid_every else 0
+    files = {"csv": to_csv(records), "ndjson": to_ndjson(records)}
+
+    results = {"rows": args.rows, "chunk_size": args.chunk_size}
+    for project_id, (format, data) in enumerate(files.items(), start=1):
+        chunks = (data[i:i + (1 << 16)] for i in range(0, len(data), 1 << 16))
+        started = time.perf_counter()
+        with Session(database.engine) as db:
+            importer = crud_import.TaskImporter(db, project_id=project_id, chunk_size=args.chunk_size)
+            outcome = importer.run(crud_import.parse_records(crud_import.iter_lines(chunks), format))
+        elapsed = time.perf_counter() - started
+        assert outcome.imported == args.rows - expected_rejected, outcome
+        assert outcome.rejected == expected_rejected, outcome
+        results[format] = {
+            "rows_per_s": args.rows / elapsed,
+            "elapsed_s": elapsed,
+            "imported": outcome.imported,
+            "rejected": outcome.rejected,
+            "input_mb": len(data) / 2**20,
+        }
+
+    http_data = to_csv(records[:args.http_rows])
+    token = security.create_access_token(subject="member1@bench.test", user_id=1)
+    with TestClient(app) as client:
+        started = time.perf_counter()
+        response = client.post(
+            f"/api/projects/3/tasks/import?format=csv&chunk_size={args.chunk_size}",
+            content=http_data,
+            headers={"Authorization": f"Bearer {token}", "Content-Type": "text/csv"},
+        )
+        elapsed = time.perf_counter() - started
+        assert response.status_code == 200, response.text
+        results["http_csv"] = {"rows": args.http_rows, "rows_per_s": args.http_rows / elapsed, **{
+            key: response.json()[key] for key in ("imported", "rejected")
+        }, "first_error": (response.json()["errors"] or [None])[0]}
+
+    with Session(database.engine) as db:
+        results["stats_drift"] = len(crud_stats.verify_task_stats(db))
+
+    report("import", results)
+
+
+if __name__ == "__main__":
+    main()
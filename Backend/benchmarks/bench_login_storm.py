@@ -0,0 +1,105 @@
+"""
+Non-auth endpoint latency during a login storm.
+
+Fires `--logins` concurrent logins while a probe keeps calling the
+authenticated `GET /api/users/me` endpoint. In "inline" mode logins go through
+a benchmark-only sync route that runs bcrypt in the request thread pool (the
+previous behaviour); in "pool" mode they use the real endpoint, which offloads
+bcrypt to the process pool with admission control. Rejected (503) logins are
+counted separately.
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.common import configure_environment, percentiles, report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--queue-size", type=int, default=32)
+    args = parser.parse_args()
+
+    configure_environment(
+        PASSWORD_HASH_WORKERS=args.workers, PASSWORD_HASH_QUEUE_SIZE=args.queue_size
+    )
+
+    import httpx
+    from fastapi import Depends, HTTPException
+    from fastapi.security import OAuth2PasswordRequestForm
+    from sqlmodel import Session
+
+    from app.core import security
+    from app.crud import crud_user
+    from app.db import database
+    from app.models.user_models import User
+    from main import app
+
+    database.create_db_and_tables()
+
+    @app.post("/bench/inline-login")
+    def inline_login(db: Session = Depends(database.get_session), form_data: OAuth2PasswordRequestForm = Depends()):
+        user = crud_user.get_user_by_email(db, email=form_data.username)
+        # Release the connection so the run measures CPU contention, not pool exhaustion
+        db.commit()
+        if not user or not security.verify_password(form_data.password, user.hashed_password):
+            raise HTTPException(status_code=401)
+        return {"access_token": security.create_access_token(subject=user.email, user_id=user.id)}
+
+    with Session(database.engine) as db:
+        user = User(full_name="Bench", email="bench@bench.test", hashed_password=security.get_password_hash("secret"))
+        db.add(user)
+        db.commit()
+        headers = {"Authorization": f"Bearer {security.create_access_token(subject=user.email, user_id=user.id)}"}
+
+    async def storm(login_path: str) -> dict:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=600) as client:
+            probe_samples: list[float] = []
+            login_samples: list[float] = []
+            statuses: dict[str, int] = {}
+            done = asyncio.Event()
+
+            async def login() -> None:
+                t0 = time.perf_counter()
+                try:
+                    response = await client.post(login_path, data={"username": "bench@bench.test", "password": "secret"})
+                    outcome = str(response.status_code)
+                except Exception as exc:
+                    # e.g. connection pool timeouts while request threads are busy hashing
+                    outcome = type(exc).__name__
+                login_samples.append(time.perf_counter() - t0)
+                statuses[outcome] = statuses.get(outcome, 0) + 1
+
+            async def probe() -> None:
+                while not done.is_set():
+                    t0 = time.perf_counter()
+                    await client.get("/api/users/me", headers=headers)
+                    probe_samples.append(time.perf_counter() - t0)
+                    await asyncio.sleep(0.01)
+
+            probe_task = asyncio.create_task(probe())
+            started = time.perf_counter()
+            await asyncio.gather(*(login() for _ in range(args.logins)))
+            elapsed = time.perf_counter() - started
+            done.set()
+            await probe_task
+        return {
+            "elapsed_s": elapsed,
+            "login_statuses": statuses,
+            "login": percentiles(login_samples),
+            "probe_users_me": percentiles(probe_samples),
+        }
+
+    results = {
+        "inline": asyncio.run(storm("/bench/inline-login")),
+        "pool": asyncio.run(storm("/api/auth/login")),
+    }
+    security.password_hasher.shutdown()
+    report("login_storm", results)
+
+
+if __name__ == "__main__":
+    main()
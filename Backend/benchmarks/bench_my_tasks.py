@@ -0,0 +1,146 @@
+"""
+The "my work" queue compared with collecting it project by project.
+
+Seeds `--projects` projects of `--tasks` tasks each, with the benchmark user
+a member of all of them and assigned every `--assigned-every`th task. A client
+without `GET /users/me/tasks` lists the projects and then the user's tasks in
+each, one request per project; that is timed against walking the new endpoint
+page by page, for both sort orders. Reports latency, HTTP requests, SQL
+statements and whether both ways return the same tasks in the expected order,
+plus the SQLite plan of the queue query.
+"""
+import argparse
+import random
+from datetime import datetime, timedelta
+
+from benchmarks.common import configure_environment, measure, report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--projects", type=int, default=50)
+    parser.add_argument("--tasks", type=int, default=2000, help="tasks per project")
+    parser.add_argument("--assigned-every", type=int, default=10)
+    parser.add_argument("--page-size", type=int, default=500)
+    parser.add_argument("--requests", type=int, default=30)
+    args = parser.parse_args()
+
+    # DEBUG adds the X-DB-Query-Count header
+    configure_environment(DEBUG="true")
+
+    from fastapi.testclient import TestClient
+    from sqlalchemy import event, insert
+    from sqlmodel import Session
+
+    from app.core import security
+    from app.crud import crud_task
+    from app.db import database
+    from app.models.project_models import Project, Task, TaskStatus
+    from app.models.user_models import ProjectMemberLink, User
+    from main import app
+
+    database.create_db_and_tables()
+    rng = random.Random(7)
+    start = datetime(2026, 1, 1)
+    statuses = list(TaskStatus)
+    with Session(database.engine) as db:
+        db.add(User(id=1, full_name="Worker", email="worker@bench.test", hashed_password="x"))
+        db.add(User(id=2, full_name="Colleague", email="colleague@bench.test", hashed_password="x"))
+        for project_id in range(1, args.projects + 1):
+            db.add(Project(id=project_id, name=f"Project {project_id}", description=None, owner_id=2))
+            db.add(ProjectMemberLink(user_id=1, project_id=project_id))
+            db.add(ProjectMemberLink(user_id=2, project_id=project_id))
+        db.flush()
+        for project_id in range(1, args.projects + 1):
+            db.execute(insert(Task.__table__), [
+                {
+                    "title": f"Task {i}", "description": None, "status": rng.choice(statuses).name,
+                    "due_date": start + timedelta(hours=rng.randrange(2000)) if rng.random() < 0.8 else None,
+                    "project_id": project_id, "assignee_id": 1 if i % args.assigned_every == 0 else 2,
+                }
+                for i in range(args.tasks)
+            ])
+        db.commit()
+
+    headers = {"Authorization": f"Bearer {security.create_access_token(subject='worker@bench.test', user_id=1)}"}
+    results: dict = {"projects": args.projects, "tasks": args.projects * args.tasks}
+    with TestClient(app) as client:
+        def per_project() -> tuple[list[dict], int, int]:
+            requests, statements = 1, 0
+            response = client.get("/api/projects/", headers=headers)
+            statements += int(response.headers["X-DB-Query-Count"])
+            tasks = []
+            for project in response.json():
+                cursor = None
+                while True:
+                    params = {"assignee_id": 1, "limit": 1000, **({"cursor": cursor} if cursor else {})}
+                    response = client.get(f"/api/projects/{project['id']}/tasks/", params=params, headers=headers)
+                    assert response.status_code == 200, response.text
+                    requests, statements = requests + 1, statements + int(response.headers["X-DB-Query-Count"])
+                    tasks.extend(response.json())
+                    cursor = response.headers.get("X-Next-Cursor")
+                    if cursor is None:
+                        break
+            return tasks, requests, statements
+
+        def queue(sort: str) -> tuple[list[dict], int, int]:
+            tasks, requests, statements, cursor = [], 0, 0, None
+            while True:
+                params = {"sort": sort, "limit": args.page_size, **({"cursor": cursor} if cursor else {})}
+                response = client.get("/api/users/me/tasks", params=params, headers=headers)
+                assert response.status_code == 200, response.text
+                requests, statements = requests + 1, statements + int(response.headers["X-DB-Query-Count"])
+                tasks.extend(response.json())
+                cursor = response.headers.get("X-Next-Cursor")
+                if cursor is None:
+                    return tasks, requests, statements
+
+        expected, requests, statements = per_project()
+        results["per_project"] = {
+            "assigned": len(expected), "http_requests": requests, "statements": statements,
+            **measure(per_project, args.requests),
+        }
+
+        def undated_last(task: dict) -> tuple:
+            return (task["due_date"] is None, task["due_date"] or "", task["id"])
+
+        status_rank = {status.value: rank for rank, status in enumerate(sorted(statuses, key=lambda s: s.name, reverse=True))}
+        expected_orders = {
+            "due_date": sorted(expected, key=undated_last),
+            "status": sorted(expected, key=lambda task: (status_rank[task["status"]], *undated_last(task))),
+        }
+        for sort, ordered in expected_orders.items():
+            tasks, requests, statements = queue(sort)
+            results[f"my_tasks_by_{sort}"] = {
+                "assigned": len(tasks), "http_requests": requests, "statements": statements,
+                "matches_per_project": [task["id"] for task in tasks] == [task["id"] for task in ordered],
+                **measure(lambda: queue(sort), args.requests),
+            }
+
+        results["first_page"] = measure(
+            lambda: client.get("/api/users/me/tasks", params={"limit": 50}, headers=headers), args.requests * 10
+        )
+
+    if database.engine.dialect.name == "sqlite":
+        captured = []
+
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            captured.append((statement, parameters))
+
+        results["plan"] = {}
+        with Session(database.engine) as db:
+            connection = db.connection()
+            for status in (None, TaskStatus.TO_DO):
+                event.listen(connection, "before_cursor_execute", capture)
+                crud_task.get_task_rows_by_assignee(db, assignee_id=1, status=status, limit=50)
+                event.remove(connection, "before_cursor_execute", capture)
+                statement, parameters = captured[-1]
+                results["plan"][status.name if status else "all"] = [
+                    row[-1] for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+                ]
+
+    report("my_tasks", results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Authenticated-request throughput with the principal cache on and off.
+
+Drives `GET /api/users/me` for a pool of users; with the cache disabled every
+request pays for the user lookup, with it enabled only the first one per user does.
+"""
+import argparse
+
+from benchmarks.common import configure_environment, measure, report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=5000)
+    args = parser.parse_args()
+
+    configure_environment()
+
+    from fastapi.testclient import TestClient
+    from sqlmodel import Session
+
+    from app.core import security
+    from app.core.principals import principal_cache
+    from app.db import database
+    from app.models.user_models import User
+    from main import app
+
+    database.engine.echo = False
+    database.create_db_and_tables()
+
+    hashed_password = security.get_password_hash("benchmark")
+    with Session(database.engine) as db:
+        users = [
+            User(full_name=f"User {i}", email=f"user{i}@bench.test", hashed_password=hashed_password)
+            for i in range(args.users)
+        ]
+        db.add_all(users)
+        db.commit()
+        headers = [
+            {"Authorization": f"Bearer {security.create_access_token(subject=u.email, user_id=u.id)}"}
+            for u in users
+        ]
+
+    results = {}
+    with TestClient(app) as client:
+        for enabled in (False, True):
+            principal_cache.enabled = enabled
+            principal_cache.clear()
+            counter = iter(range(args.requests))
+
+            def call() -> None:
+                i = next(counter)
+                response = client.get("/api/users/me", headers=headers[i % len(headers)])
+                assert response.status_code == 200, response.text
+
+            results["cache_on" if enabled else "cache_off"] = measure(call, args.requests)
+        results["principal_cache"] = principal_cache.stats()
+
+    report("principal_cache", results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Bytes on the wire and server CPU of the task list and project detail, with
+and without a `?fields=` projection and response compression.
+
+Seeds one project with `--tasks` tasks carrying realistic descriptions. Each
+variant is a (projection, Accept-Encoding) pair: the full TaskRead/ProjectDetail
+against the board projection (id, title, status, assignee_id), each sent
+uncompressed, gzipped and, when the `brotli` package is installed, as brotli.
+Requests go straight to the ASGI app, so the reported bytes are exactly what
+the server sends and the CPU time (process time, all threads) excludes any
+client-side decoding. Project detail is measured both from its body cache
+and with the cache emptied before every request.
+"""
+import argparse
+import asyncio
+import random
+import time
+from urllib.parse import urlencode
+
+from benchmarks.common import configure_environment, report
+
+BOARD_TASK_FIELDS = "id,title,status,assignee_id"
+BOARD_DETAIL_FIELDS = "name,tasks.id,tasks.title,tasks.status,tasks.assignee_id"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tasks", type=int, default=2000)
+    parser.add_argument("--page-size", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=50)
+    args = parser.parse_args()
+
+    configure_environment()
+
+    from datetime import datetime, timedelta
+
+    from sqlalchemy import insert
+    from sqlmodel import Session
+
+    from app.api import middleware
+    from app.api.endpoints import projects
+    from app.core import security
+    from app.db import database
+    from app.models.project_models import Project, Task, TaskStatus
+    from app.models.user_models import ProjectMemberLink, User
+    from main import app
+
+    database.create_db_and_tables()
+    now = datetime.utcnow()
+    statuses = list(TaskStatus)
+    # Descriptions of 20-80 words drawn from a made-up vocabulary, so they compress about like prose
+    rng = random.Random(7)
+    letters = "etaoinshrdlcumwfgypbvk"
+    vocabulary = ["".join(rng.choice(letters) for _ in range(rng.randint(2, 9))) for _ in range(2000)]
+    with Session(database.engine) as db:
+        for user_id in range(1, 11):
+            db.add(User(id=user_id, full_name=f"Member {user_id}", email=f"member{user_id}@bench.test", hashed_password="x"))
+        db.add(Project(id=1, name="Board", description="A busy project", owner_id=1))
+        for user_id in range(1, 11):
+            db.add(ProjectMemberLink(user_id=user_id, project_id=1))
+        db.flush()
+        db.execute(insert(Task.__table__), [
+            {
+                "title": f"Task {i}: follow up on item {i * 7 % 997}",
+                "description": " ".join(rng.choices(vocabulary, k=rng.randint(20, 80))),
+                "status": statuses[i % 3].name, "due_date": now + timedelta(hours=i) if i % 2 else None,
+                "project_id": 1, "assignee_id": 1 + i % 10, "created_at": now, "updated_at": now,
+            }
+            for i in range(args.tasks)
+        ])
+        db.commit()
+
+    authorization = f"Bearer {security.create_access_token(subject='member1@bench.test', user_id=1)}".encode()
+
+    async def call(path: str, params: dict, accept_encoding: str) -> tuple[int, bytes]:
+        messages = []
+
+        async def receive():
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        async def send(message):
+            messages.append(message)
+
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+            "path": path, "raw_path": path.encode(), "root_path": "", "query_string": urlencode(params).encode(),
+            "headers": [(b"authorization", authorization), (b"accept-encoding", accept_encoding.encode())],
+            "client": ("127.0.0.1", 50000), "server": ("testserver", 80),
+        }
+        await app(scope, receive, send)
+        status = next(message["status"] for message in messages if message["type"] == "http.response.start")
+        return status, b"".join(message.get("body", b"") for message in messages if message["type"] == "http.response.body")
+
+    encodings = ["identity", "gzip"] + (["br"] if middleware.brotli is not None else [])
+    endpoints = {
+        "task_list": ("/api/projects/1/tasks/", {"limit": args.page_size}, {"fields": BOARD_TASK_FIELDS}),
+        "project_detail": ("/api/projects/1", {}, {"fields": BOARD_DETAIL_FIELDS}),
+        "project_detail_uncached": ("/api/projects/1", {}, {"fields": BOARD_DETAIL_FIELDS}),
+    }
+
+    async def run() -> dict:
+        results: dict = {"tasks": args.tasks, "page_size": args.page_size, "encodings": encodings}
+        for name, (path, params, board) in endpoints.items():
+            clear_cache = name.endswith("_uncached")
+            results[name] = {}
+            for projection, extra in (("full", {}), ("board", board)):
+                for encoding in encodings:
+                    query = {**params, **extra}
+                    status, body = await call(path, query, encoding)
+                    assert status == 200, body
+                    cpu, wall = [], []
+                    for _ in range(args.requests):
+                        if clear_cache:
+                            projects.project_detail_cache.clear()
+                        cpu_started, started = time.process_time(), time.perf_counter()
+                        await call(path, query, encoding)
+                        cpu.append(time.process_time() - cpu_started)
+                        wall.append(time.perf_counter() - started)
+                    cpu.sort()
+                    wall.sort()
+                    results[name][f"{projection}_{encoding}"] = {
+                        "bytes": len(body),
+                        "cpu_ms_p50": cpu[len(cpu) // 2] * 1000,
+                        "cpu_ms_mean": sum(cpu) / len(cpu) * 1000,
+                        "wall_ms_p50": wall[len(wall) // 2] * 1000,
+                    }
+            baseline = results[name]["full_identity"]["bytes"]
+            for variant in results[name].values():
+                variant["bytes_vs_full_identity"] = round(variant["bytes"] / baseline, 3)
+        return results
+
+    report("projection", asyncio.run(run()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+Due-date reminders from the in-process scheduler, against polling for them.
+
+Seeds `--tasks` tasks spread over `--projects` projects, a third of them
+Done, with due dates over the next `--days` days. A `ReminderScheduler` on a
+simulated clock then walks through `--simulate-hours` of time, in steps of
+`--step-seconds`: it reports the time and memory taken by each horizon load
+(the horizon is also read again every `--refresh-seconds`),
+the cost per `track` call, and how many reminders it sent. The same walk is
+timed as a poller would do it, querying for the tasks falling due in each
+step, and both must find the same reminders. Finally `GET
+/users/me/tasks/due` is timed for a user assigned every `--assigned-every`th
+task.
+"""
+import argparse
+import random
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from benchmarks.common import configure_environment, measure, report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tasks", type=int, default=500_000)
+    parser.add_argument("--projects", type=int, default=100)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--horizon-hours", type=float, default=24.0)
+    parser.add_argument("--max-pending", type=int, default=200_000)
+    parser.add_argument("--simulate-hours", type=float, default=72.0)
+    parser.add_argument("--step-seconds", type=float, default=60.0)
+    parser.add_argument("--refresh-seconds", type=float, default=3600.0)
+    parser.add_argument("--assigned-every", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    configure_environment()
+
+    from fastapi.testclient import TestClient
+    from sqlalchemy import insert
+    from sqlmodel import Session, select
+
+    from app.core import security
+    from app.core.reminders import OPEN_STATUSES, ReminderScheduler
+    from app.db import database
+    from app.models.project_models import Project, Task, TaskStatus
+    from app.models.user_models import ProjectMemberLink, User
+    from main import app
+
+    database.create_db_and_tables()
+    rng = random.Random(7)
+    start = datetime.utcnow().replace(microsecond=0)
+    statuses = [TaskStatus.TO_DO, TaskStatus.IN_PROGRESS, TaskStatus.DONE]
+    with Session(database.engine) as db:
+        db.add(User(id=1, full_name="Worker", email="worker@bench.test", hashed_password="x"))
+        db.add(User(id=2, full_name="Colleague", email="colleague@bench.test", hashed_password="x"))
+        for project_id in range(1, args.projects + 1):
+            db.add(Project(id=project_id, name=f"Project {project_id}", description=None, owner_id=2))
+            db.add(ProjectMemberLink(user_id=1, project_id=project_id))
+            db.add(ProjectMemberLink(user_id=2, project_id=project_id))
+        db.flush()
+        for offset in range(0, args.tasks, 50_000):
+            db.execute(insert(Task.__table__), [
+                {
+                    "title": f"Task {i}", "description": None, "status": rng.choice(statuses).name,
+                    "due_date": start + timedelta(seconds=rng.randrange(args.days * 86400)),
+                    "project_id": 1 + i % args.projects, "assignee_id": 1 if i % args.assigned_every == 0 else 2,
+                    "created_at": start, "updated_at": start,
+                }
+                for i in range(offset, min(args.tasks, offset + 50_000))
+            ])
+        db.commit()
+
+    leads = [timedelta(hours=1), timedelta(0)]
+    step = timedelta(seconds=args.step_seconds)
+    steps = int(args.simulate_hours * 3600 / args.step_seconds)
+    results: dict = {"tasks": args.tasks, "simulated_hours": args.simulate_hours, "step_seconds": args.step_seconds}
+
+    # The scheduler, on a clock advanced one step at a time
+    now = [start]
+    sent: list[tuple[int, int]] = []
+    scheduler = ReminderScheduler(
+        leads=leads, horizon=timedelta(hours=args.horizon_hours), max_pending=args.max_pending,
+        refresh=timedelta(seconds=args.refresh_seconds), clock=lambda: now[0], emit=lambda project_id, kind, data: sent.append((data["id"], data["minutes_before_due"])),
+    )
+    loads = []
+    original_load = scheduler.load
+
+    def timed_load(db, at):
+        tracemalloc.start()
+        started = time.perf_counter()
+        original_load(db, at)
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        loads.append({"ms": round(elapsed * 1000, 1), "peak_mb": round(peak / 2**20, 1), "pending": scheduler.pending()})
+
+    scheduler.load = timed_load
+    with Session(database.engine) as db:
+        started = time.perf_counter()
+        scheduler.run_pending(db)
+        for _ in range(steps):
+            now[0] += step
+            scheduler.run_pending(db)
+        scheduler_elapsed = time.perf_counter() - started
+    results["scheduler"] = {
+        "total_ms": round(scheduler_elapsed * 1000, 1),
+        "reminders_sent": len(sent),
+        "horizon_loads": loads,
+    }
+
+    # `track` as called after each task write, rescheduling tasks within the horizon
+    with Session(database.engine) as db:
+        task_ids = db.exec(select(Task.id).where(Task.status.in_(OPEN_STATUSES)).limit(10_000)).all()
+    track_rng = random.Random(11)
+    calls = iter(range(len(task_ids)))
+
+    def track() -> None:
+        task_id = task_ids[next(calls)]
+        scheduler.track(
+            task_id, status=TaskStatus.TO_DO, due_date=now[0] + timedelta(seconds=track_rng.randrange(1, 86400))
+        )
+
+    results["scheduler"]["track"] = measure(track, len(task_ids))
+
+    # Polling: one query per step for the reminders falling due in it
+    polled: list[tuple[int, int]] = []
+    with Session(database.engine) as db:
+        samples = []
+        at = start
+        for _ in range(steps):
+            until = at + step
+            t0 = time.perf_counter()
+            for lead in leads:
+                rows = db.exec(
+                    select(Task.id)
+                    .where(Task.status.in_(OPEN_STATUSES), Task.due_date > at + lead, Task.due_date <= until + lead)
+                ).all()
+                polled += [(task_id, int(lead.total_seconds() // 60)) for task_id in rows]
+            samples.append(time.perf_counter() - t0)
+            at = until
+    results["polling"] = {
+        "total_ms": round(sum(samples) * 1000, 1),
+        "queries": steps * len(leads),
+        "per_step_ms": round(sum(samples) / len(samples) * 1000, 3),
+        "reminders_found": len(polled),
+    }
+    results["same_reminders"] = sorted(sent) == sorted(polled)
+
+    headers = {"Authorization": f"Bearer {security.create_access_token(subject='worker@bench.test', user_id=1)}"}
+    with TestClient(app) as client:
+        def due(within: str):
+            response = client.get("/api/users/me/tasks/due", params={"within": within, "limit": 100}, headers=headers)
+            assert response.status_code == 200, response.text
+
+        results["due_endpoint"] = {
+            window: measure(lambda: due(window), args.requests) for window in ("PT24H", "P7D", "P30D")
+        }
+
+    report("reminders", results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Read routing across replicas, with SQLite files standing in for them.
+
+The primary is seeded and copied to `--replicas` files, which then stop
+receiving changes, so a read served by a replica is recognisable by what it
+is missing. One more replica URL points at a path that can't be opened, to
+exercise failover. Reports how the task list reads were spread over the
+engines, whether a client reads its own write right after making it (from
+the primary) and only stale replica data once READ_YOUR_WRITES_SECONDS have
+passed, and the latency of the task list and the (async) project list.
+"""
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+from collections import Counter
+
+from benchmarks.common import configure_environment, measure, report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--replicas", type=int, default=2)
+    parser.add_argument("--tasks", type=int, default=500, help="fewer than 1000, so a page holds them all")
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--window", type=float, default=1.0, help="READ_YOUR_WRITES_SECONDS")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="synergysphere-bench-")
+    primary = os.path.join(directory, "primary.db")
+    replica_paths = [os.path.join(directory, f"replica{i}.db") for i in range(args.replicas)]
+    unreachable = os.path.join(directory, "missing", "replica.db")
+    configure_environment(
+        f"sqlite:///{primary}",
+        DATABASE_REPLICA_URLS=json.dumps([f"sqlite:///{path}" for path in replica_paths + [unreachable]]),
+        READ_YOUR_WRITES_SECONDS=args.window,
+    )
+
+    from fastapi.testclient import TestClient
+    from sqlalchemy import event, insert
+    from sqlmodel import Session
+
+    from app.core import security
+    from app.db import database
+    from app.models.project_models import Project, Task
+    from app.models.user_models import ProjectMemberLink, User
+    from main import app
+
+    database.create_db_and_tables()
+    with Session(database.engine) as db:
+        db.add(User(id=1, full_name="Reader", email="reader@bench.test", hashed_password="x"))
+        db.add(Project(id=1, name="Replicated", description=None, owner_id=1))
+        db.add(ProjectMemberLink(user_id=1, project_id=1))
+        db.flush()
+        db.execute(insert(Task.__table__), [
+            {"title": f"Task {i}", "description": None, "status": "TO_DO", "project_id": 1} for i in range(args.tasks)
+        ])
+        db.commit()
+    database.engine.dispose()
+    for path in replica_paths:
+        shutil.copyfile(primary, path)
+
+    task_reads: Counter = Counter()
+    names = {database.engine: "primary"}
+    names.update({engine: f"replica{i}" for i, engine in enumerate(database.replicas.engines[:-1])})
+    for engine, name in names.items():
+        def count(conn, cursor, statement, parameters, context, executemany, name=name):
+            if statement.lstrip().upper().startswith("SELECT") and "FROM task" in statement:
+                task_reads[name] += 1
+        event.listen(engine, "before_cursor_execute", count)
+
+    headers = {"Authorization": f"Bearer {security.create_access_token(subject='reader@bench.test', user_id=1)}"}
+    results: dict = {"replicas": args.replicas, "unreachable_replicas": 1, "tasks": args.tasks}
+    with TestClient(app) as client:
+        url = "/api/projects/1/tasks/?limit=1000"
+
+        def list_tasks() -> list[dict]:
+            response = client.get(url, headers=headers)
+            assert response.status_code == 200, response.text
+            return response.json()
+
+        results["list_tasks"] = measure(list_tasks, args.requests)
+
+        def list_projects() -> None:
+            response = client.get("/api/projects/", headers=headers)
+            assert response.status_code == 200 and len(response.json()) == 1, response.text
+
+        results["list_projects_async"] = measure(list_projects, args.requests)
+        results["task_reads_by_engine"] = dict(task_reads)
+        results["unreachable_replica_marked_down"] = database.replicas.engines[-1] not in database.replicas.candidates()
+
+        created = client.post(
+            "/api/projects/1/tasks/",
+            json={"title": "Fresh", "description": None, "due_date": None, "assignee_id": None},
+            headers=headers,
+        )
+        assert created.status_code == 201, created.text
+        fresh_id = created.json()["id"]
+        task_reads.clear()
+        results["sees_own_write_immediately"] = any(task["id"] == fresh_id for task in list_tasks())
+        results["reads_within_window"] = dict(task_reads)
+
+        time.sleep(args.window + 0.1)
+        task_reads.clear()
+        # The stand-in replicas never receive the write, so after the window it is gone again
+        results["sees_write_from_stale_replica_after_window"] = any(task["id"] == fresh_id for task in list_tasks())
+        results["reads_after_window"] = dict(task_reads)
+
+    shutil.rmtree(directory, ignore_errors=True)
+    report("replicas", results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Task list serialization: ORM objects + response_model validation vs column rows + orjson.
+
+For each row count, loads a project's tasks and encodes them the way FastAPI
+does for a `response_model=List[TaskRead]` endpoint returning ORM objects
+(validate, jsonable_encoder, json.dumps), and the way the fast path does
+(column-only SELECT into dicts, orjson). Both outputs are checked to decode to
+the same JSON. The API itself caps pages at 1000 rows; larger counts show how
+the per-row cost scales.
+"""
+import argparse
+import json
+from datetime import datetime, timedelta
+
+from benchmarks.common import configure_environment, measure, report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    configure_environment()
+
+    from typing import List
+
+    from fastapi.encoders import jsonable_encoder
+    from pydantic import TypeAdapter
+    from sqlalchemy import insert
+    from sqlmodel import Session
+
+    from app.core.serialization import json_rows_response
+    from app.crud import crud_task
+    from app.db import database
+    from app.models.project_models import Project, Task, TaskStatus
+    from app.models.user_models import User
+    from app.schemas.task_schemas import TaskRead
+
+    database.create_db_and_tables()
+    adapter = TypeAdapter(List[TaskRead])
+    statuses = list(TaskStatus)
+    now = datetime.utcnow()
+
+    with Session(database.engine) as db:
+        db.add(User(id=1, full_name="Owner", email="owner@bench.test", hashed_password="x"))
+        for project_id, count in enumerate(args.rows, start=1):
+            db.add(Project(id=project_id, name=f"Project {count}", description=None, owner_id=1))
+            db.execute(insert(Task), [
+                {
+                    "title": f"Task {i}",
+                    "description": "Benchmark task" if i % 3 else None,
+                    "status": statuses[i % 3],
+                    "created_at": now,
+                    "due_date": now + timedelta(hours=i) if i % 2 else None,
+                    "project_id": project_id,
+                    "assignee_id": 1 if i % 4 else None,
+                }
+                for i in range(count)
+            ])
+        db.commit()
+
+    def orm_path(project_id: int) -> bytes:
+        with Session(database.engine) as db:
+            tasks = crud_task.get_tasks_by_project(db, project_id=project_id)
+            validated = adapter.validate_python(tasks, from_attributes=True)
+            content = jsonable_encoder(validated)
+            return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode()
+
+    def fast_path(project_id: int) -> bytes:
+        with Session(database.engine) as db:
+            return json_rows_response(crud_task.get_task_rows_by_project(db, project_id=project_id)).body
+
+    results = {}
+    for project_id, count in enumerate(args.rows, start=1):
+        assert json.loads(orm_path(project_id)) == json.loads(fast_path(project_id))
+        repeat = max(3, args.repeat * 1_000 // count)
+        orm = measure(lambda: orm_path(project_id), repeat)
+        fast = measure(lambda: fast_path(project_id), repeat)
+        results[f"{count}_rows"] = {
+            "orm_validate_json": orm,
+            "columns_orjson": fast,
+            "speedup_p50": orm["p50_ms"] / fast["p50_ms"],
+            "body_bytes": len(fast_path(project_id)),
+        }
+
+    report("serialization", results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+"""
+Task write throughput from concurrent writer processes, by number of project
+shards, and the cost of moving projects between shards.
+
+For each count in `--shards`, a fresh interpreter (settings are read at
+import) sets up SQLite files in `--directory`: the global database plus that
+many shards, or for 1 the single unsharded database. It seeds `--projects`
+projects of `--tasks` tasks each, then `--writers` processes, started
+together, each make `--writes` task writes through the CRUD helpers (half
+creations, half updates of random tasks in random projects), as separate app
+workers would. Reports writes/s, latency and failed writes per shard count,
+with the speedup over the unsharded database, and checks the task counters
+afterwards.
+
+Each commit is an fsync and SQLite takes one write lock per file, so writers
+only run in parallel on different shards; run it on a real disk, with at
+least as many cores as writers, to see that. With fewer, the writes are
+bound by CPU whatever the shard count, and only the tail latency from lock
+waits drops.
+Sharded runs then plan a rebalance onto one more shard and time moving the
+planned projects, checking that no rows are lost.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.common import configure_environment, percentiles, report
+
+
+def _environment(directory: str, shards: int, extra_shard: bool = False) -> tuple[str, dict[str, str]]:
+    """DATABASE_URL and the shard settings of a run, all files under `directory`."""
+    database_url = f"sqlite:///{os.path.join(directory, 'global.db')}"
+    if shards == 1 and not extra_shard:
+        return database_url, {"DATABASE_SHARD_URLS": "[]"}
+    urls = [f"sqlite:///{os.path.join(directory, f'shard{shard}.db')}" for shard in range(shards + extra_shard)]
+    return database_url, {"DATABASE_SHARD_URLS": json.dumps(urls)}
+
+
+def _writer(job: tuple) -> tuple[list[float], int]:
+    """One writer process: waits for the start signal, then makes its writes; returns latencies and failures."""
+    seed, writes, task_ids, start = job
+    from app.crud import crud_task
+    from app.db import database
+    from app.models.project_models import Task, TaskStatus
+    from app.schemas.task_schemas import TaskCreate, TaskUpdate
+
+    rng = random.Random(seed)
+    project_ids = sorted(task_ids)
+    samples, failures = [], 0
+    start.wait()
+    for i in range(writes):
+        project_id = rng.choice(project_ids)
+        t0 = time.perf_counter()
+        try:
+            with database.shard_map.session(project_id) as db:
+                if i % 2:
+                    crud_task.create_task(
+                        db, task_in=TaskCreate(title=f"Write {i}", description=None, due_date=None, assignee_id=1),
+                        project_id=project_id,
+                    )
+                else:
+                    db_task = db.get(Task, rng.choice(task_ids[project_id]))
+                    task_in = TaskUpdate(
+                        title=f"Write {i}", description=None, due_date=None, status=rng.choice(list(TaskStatus)),
+                        assignee_id=1,
+                    )
+                    crud_task.update_task(db, db_task=db_task, task_in=task_in)
+        except Exception:
+            failures += 1
+        samples.append(time.perf_counter() - t0)
+    return samples, failures
+
+
+def run(args) -> dict:
+    """Runs in the child interpreter for one shard count; returns its results."""
+    directory = os.path.join(args.directory, f"shards-{args.run}")
+    os.makedirs(directory, exist_ok=True)
+    database_url, overrides = _environment(directory, args.run)
+    configure_environment(database_url, PASSWORD_HASH_WORKERS=0, **overrides)
+
+    from sqlalchemy import insert
+    from sqlmodel import Session, select
+
+    from app.crud import crud_project, crud_stats
+    from app.db import database
+    from app.models.project_models import Task, TaskStatus
+    from app.models.user_models import User
+    from app.schemas.project_schemas import ProjectCreate
+
+    database.create_db_and_tables()
+    shard_map = database.shard_map
+    with Session(database.engine) as db:
+        db.add(User(id=1, full_name="Writer", email="writer@bench.test", hashed_password="x"))
+        db.commit()
+        project_ids = [
+            crud_project.create_project_with_owner(
+                db, project_in=ProjectCreate(name=f"Project {i}", description=None), owner_id=1
+            ).id
+            for i in range(args.projects)
+        ]
+    task_ids = {}
+    for project_id in project_ids:
+        with shard_map.session(project_id) as db:
+            db.execute(insert(Task.__table__), [
+                {"title": f"Task {i}", "description": None, "status": TaskStatus.TO_DO.name,
+                 "project_id": project_id, "assignee_id": 1, "due_date": None}
+                for i in range(args.tasks)
+            ])
+            db.commit()
+            crud_stats.rebuild_task_stats(db, project_id=project_id)
+            task_ids[project_id] = db.exec(select(Task.id).where(Task.project_id == project_id)).all()
+
+    context = multiprocessing.get_context("spawn")
+    start = context.Manager().Event()
+    with context.Pool(args.writers) as pool:
+        pending = pool.map_async(
+            _writer, [(seed, args.writes, task_ids, start) for seed in range(args.writers)]
+        )
+        # Let every writer import the app before the clock starts
+        time.sleep(args.warmup_seconds)
+        started = time.perf_counter()
+        start.set()
+        outcomes = pending.get()
+        elapsed = time.perf_counter() - started
+    samples = [sample for writer_samples, _ in outcomes for sample in writer_samples]
+    failures = sum(failed for _, failed in outcomes)
+    drift = 0
+    with shard_map.shard_sessions() as sessions:
+        for db in sessions:
+            drift += len(crud_stats.verify_task_stats(db))
+    results = {
+        "writes": len(samples),
+        "writes_per_s": (len(samples) - failures) / elapsed,
+        "failures": failures,
+        "stats_drift": drift,
+        **percentiles(samples),
+    }
+
+    if shard_map.sharded:
+        results["rebalance"] = rebalance(args, directory, shard_map)
+    return results
+
+
+def rebalance(args, directory: str, shard_map) -> dict:
+    """Adds a shard, then times the moves `sharding.rebalance` plans onto it, checking the row counts."""
+    from sqlalchemy import create_engine, func, select
+
+    from app.crud import crud_stats
+    from app.db import sharding
+    from app.models.project_models import Task
+
+    _, overrides = _environment(directory, args.run, extra_shard=True)
+    url = json.loads(overrides["DATABASE_SHARD_URLS"])[-1]
+    grown = sharding.ShardMap(
+        shard_map.global_engine, [*shard_map.engines, create_engine(url)], cache_size=args.projects
+    )
+    sharding.prepare_shards(grown)
+
+    def tasks() -> int:
+        total = 0
+        for engine in grown.engines:
+            with engine.connect() as conn:
+                total += conn.execute(select(func.count()).select_from(Task)).scalar()
+        return total
+
+    before = tasks()
+    started = time.perf_counter()
+    moves = sharding.rebalance(grown)
+    elapsed = time.perf_counter() - started
+    drift = 0
+    with grown.shard_sessions() as sessions:
+        for db in sessions:
+            drift += len(crud_stats.verify_task_stats(db))
+    status = sharding.shard_status(grown)
+    return {
+        "projects_moved": len(moves),
+        "seconds": elapsed,
+        "rows_per_shard": [shard["rows"] for shard in status],
+        "tasks_kept": tasks() == before,
+        "stray_projects": sum(len(shard["stray_projects"]) for shard in status),
+        "stats_drift": drift,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--shards", default="1,2,4,8", help="comma-separated shard counts; 1 is unsharded")
+    parser.add_argument("--writers", type=int, default=8, help="writer processes")
+    parser.add_argument("--writes", type=int, default=250, help="writes per writer")
+    parser.add_argument("--projects", type=int, default=32)
+    parser.add_argument("--tasks", type=int, default=100, help="tasks per project")
+    parser.add_argument("--warmup-seconds", type=float, default=3.0)
+    parser.add_argument("--directory", help="where the SQLite files go; defaults to a temporary directory")
+    parser.add_argument("--run", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run is not None:
+        print(json.dumps(run(args)))
+        return
+
+    temporary = args.directory is None
+    args.directory = args.directory or tempfile.mkdtemp(prefix="synergysphere-bench-")
+    results: dict = {
+        "writers": args.writers, "writes_per_writer": args.writes, "projects": args.projects, "cpus": os.cpu_count(),
+    }
+    try:
+        for shards in (int(value) for value in args.shards.split(",")):
+            child = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_shards", *sys.argv[1:], "--directory", args.directory,
+                 "--run", str(shards)],
+                capture_output=True, text=True, check=True,
+            )
+            results[f"shards_{shards}"] = json.loads(child.stdout.splitlines()[-1])
+    finally:
+        if temporary:
+            shutil.rmtree(args.directory, ignore_errors=True)
+    baseline = results.get("shards_1")
+    if baseline:
+        for key, value in results.items():
+            if key.startswith("shards_"):
+                value["speedup"] = round(value["writes_per_s"] / baseline["writes_per_s"], 2)
+    report("shards", results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Worker cold start: importing the app, running its lifespan and serving the
+first request.
+
+Migrates and seeds a database once, then starts `--runs` fresh interpreters
+that each time `import main`, entering the app's lifespan and a first
+authenticated `GET /api/projects/`, and reports the median and worst of each
+phase. Also compares, in this process, the per-boot schema check against the
+`create_all` that the lifespan used to run, in time and in statements sent
+to the database (each one a round trip on a networked server).
+
+Meant to run on every change: with `--max-seconds` it exits with status 1 if
+the median time from interpreter start to the first response exceeds it.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from benchmarks.common import configure_environment, measure, report
+
+PHASES = ("import_s", "lifespan_s", "first_request_s", "total_s")
+
+
+def probe() -> None:
+    """Runs in the child interpreter; prints the phase timings as JSON."""
+    started = time.perf_counter()
+    from main import app
+    imported = time.perf_counter()
+
+    from fastapi.testclient import TestClient
+
+    from app.db import database
+
+    timings = {"engine_built_at_import": database.get_engine.cache_info().currsize > 0}
+    with TestClient(app) as client:
+        entered = time.perf_counter()
+        response = client.get("/api/projects/", headers={"Authorization": os.environ["BENCH_AUTHORIZATION"]})
+        answered = time.perf_counter()
+        assert response.status_code == 200, response.text
+    timings.update({
+        "import_s": imported - started,
+        "lifespan_s": entered - imported,
+        "first_request_s": answered - entered,
+        "total_s": answered - started,
+    })
+    print(json.dumps(timings))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=7)
+    parser.add_argument("--requests", type=int, default=50, help="iterations of the in-process schema checks")
+    parser.add_argument("--max-seconds", type=float, help="fail if the median time to first response exceeds this")
+    parser.add_argument("--probe", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.probe:
+        probe()
+        return
+
+    configure_environment(PASSWORD_HASH_WORKERS=0)
+
+    from sqlalchemy import event
+    from sqlmodel import Session, SQLModel
+
+    from app.core import security
+    from app.db import database, migrations
+    from app.models.project_models import Project
+    from app.models.user_models import ProjectMemberLink, User
+
+    applied = migrations.migrate(database.engine)
+    with Session(database.engine) as db:
+        db.add(User(id=1, full_name="Booter", email="booter@bench.test", hashed_password="x"))
+        db.add(Project(id=1, name="Warm", description=None, owner_id=1))
+        db.add(ProjectMemberLink(user_id=1, project_id=1))
+        db.commit()
+    token = security.create_access_token(subject="booter@bench.test", user_id=1)
+    environment = {**os.environ, "BENCH_AUTHORIZATION": f"Bearer {token}"}
+
+    runs = []
+    for _ in range(args.runs):
+        child = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_startup", "--probe"],
+            env=environment, capture_output=True, text=True, check=True,
+        )
+        runs.append(json.loads(child.stdout.splitlines()[-1]))
+
+    results: dict = {"runs": args.runs, "migrations_applied": len(applied)}
+    for phase in PHASES:
+        samples = [run[phase] for run in runs]
+        results[phase] = {"median_ms": statistics.median(samples) * 1000, "max_ms": max(samples) * 1000}
+    results["engine_built_at_import"] = any(run["engine_built_at_import"] for run in runs)
+    statements = []
+    event.listen(database.engine, "before_cursor_execute", lambda *_: statements.append(1))
+    for name, check in (
+        ("schema_check", lambda: migrations.check_schema(database.engine)),
+        ("create_all", lambda: SQLModel.metadata.create_all(database.engine)),
+    ):
+        statements.clear()
+        check()
+        results[name] = {"statements": len(statements), **measure(check, args.requests)}
+
+    median_total = statistics.median(run["total_s"] for run in runs)
+    within_budget = args.max_seconds is None or median_total <= args.max_seconds
+    results["max_seconds"] = args.max_seconds
+    results["within_budget"] = within_budget
+    report("startup", results)
+    if not within_budget:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
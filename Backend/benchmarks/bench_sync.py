@@ -0,0 +1,139 @@
+"""
+Delta sync cost compared with re-downloading every task list.
+
+Seeds one user with `--projects` projects of `--tasks` tasks each, last
+modified a day ago. Measures what a client launch costs today (listing every
+project's tasks), a cold `GET /sync` walked through all its pages, and a warm
+sync after `--changes` task updates and deletions: latency, rows and response
+bytes. Also prints the SQLite plan of the changed-tasks query.
+"""
+import argparse
+import time
+from datetime import datetime, timedelta
+
+from benchmarks.common import configure_environment, measure, report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--projects", type=int, default=20)
+    parser.add_argument("--tasks", type=int, default=10_000, help="tasks per project")
+    parser.add_argument("--changes", type=int, default=20)
+    parser.add_argument("--page-size", type=int, default=5000)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    configure_environment()
+
+    from fastapi.testclient import TestClient
+    from sqlalchemy import insert
+    from sqlmodel import Session, select
+
+    from app.core import security
+    from app.crud import crud_sync, crud_task
+    from app.db import database
+    from app.models.project_models import Project, Task
+    from app.models.user_models import ProjectMemberLink, User
+    from app.schemas.task_schemas import TaskUpdate
+    from main import app
+
+    database.create_db_and_tables()
+    long_ago = datetime.utcnow() - timedelta(days=1)
+    with Session(database.engine) as db:
+        db.add(User(id=1, full_name="Client", email="client@bench.test", hashed_password="x"))
+        for project_id in range(1, args.projects + 1):
+            db.add(Project(id=project_id, name=f"Project {project_id}", description=None, owner_id=1, updated_at=long_ago))
+            db.add(ProjectMemberLink(user_id=1, project_id=project_id, joined_at=long_ago))
+        db.flush()
+        for project_id in range(1, args.projects + 1):
+            db.execute(insert(Task.__table__), [
+                {
+                    "title": f"Task {i}", "description": "Seeded", "status": "TO_DO", "created_at": long_ago,
+                    "updated_at": long_ago, "project_id": project_id, "assignee_id": None,
+                }
+                for i in range(args.tasks)
+            ])
+        db.commit()
+    headers = {"Authorization": f"Bearer {security.create_access_token(subject='client@bench.test', user_id=1)}"}
+    results: dict = {"projects": args.projects, "tasks": args.projects * args.tasks, "changes": args.changes}
+
+    with TestClient(app) as client:
+        def list_every_project() -> tuple[int, int]:
+            pages, size = 0, 0
+            for project_id in range(1, args.projects + 1):
+                cursor = None
+                while True:
+                    params = {"limit": 1000, **({"cursor": cursor} if cursor else {})}
+                    response = client.get(f"/api/projects/{project_id}/tasks/", params=params, headers=headers)
+                    assert response.status_code == 200, response.text
+                    pages, size = pages + 1, size + len(response.content)
+                    cursor = response.headers.get("X-Next-Cursor")
+                    if cursor is None:
+                        break
+            return pages, size
+
+        started = time.perf_counter()
+        pages, size = list_every_project()
+        results["list_every_project"] = {"seconds": time.perf_counter() - started, "pages": pages, "bytes": size}
+
+        def cold_sync() -> tuple[str, int, int, int]:
+            token, pages, rows, size = None, 0, 0, 0
+            while True:
+                params = {"limit": args.page_size, **({"since": token} if token else {})}
+                response = client.get("/api/sync/", params=params, headers=headers)
+                assert response.status_code == 200, response.text
+                body = response.json()
+                token, pages, rows, size = body["next"], pages + 1, rows + len(body["tasks"]), size + len(response.content)
+                if not body["has_more"]:
+                    return token, pages, rows, size
+
+        started = time.perf_counter()
+        token, pages, rows, size = cold_sync()
+        results["cold_sync"] = {"seconds": time.perf_counter() - started, "pages": pages, "tasks": rows, "bytes": size}
+        assert rows == args.projects * args.tasks
+
+        with Session(database.engine) as db:
+            task_ids = db.exec(select(Task.id).order_by(Task.id).limit(args.changes)).all()
+            for task_id in task_ids[: args.changes // 2]:
+                crud_task.update_task(
+                    db, db_task=db.get(Task, task_id),
+                    task_in=TaskUpdate(title="Edited", description=None, due_date=None, status="Done", assignee_id=None),
+                )
+            for task_id in task_ids[args.changes // 2:]:
+                crud_task.delete_task(db, task_id=task_id)
+
+        def warm_sync():
+            response = client.get("/api/sync/", params={"since": token}, headers=headers)
+            assert response.status_code == 200, response.text
+            return response
+
+        body = warm_sync().json()
+        assert len(body["tasks"]) == args.changes // 2 and len(body["deleted_task_ids"]) == args.changes - args.changes // 2, body
+        results["warm_sync"] = {
+            "tasks": len(body["tasks"]),
+            "deleted": len(body["deleted_task_ids"]),
+            "bytes": len(warm_sync().content),
+            **measure(warm_sync, args.requests),
+        }
+
+    since = datetime.utcnow() - timedelta(minutes=1)
+    with Session(database.engine) as db:
+        if database.engine.dialect.name == "sqlite":
+            statement = (
+                select(Task.id).where(Task.project_id.in_(select(ProjectMemberLink.project_id).where(ProjectMemberLink.user_id == 1)))
+                .where(Task.updated_at > since).order_by(Task.updated_at, Task.id)
+            )
+            compiled = statement.compile(dialect=database.engine.dialect)
+            params = tuple(compiled.params[name] for name in compiled.positiontup)
+            results["plan"] = [
+                row[-1] for row in db.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", params).all()
+            ]
+        results["crud_warm_sync"] = measure(
+            lambda: crud_sync.get_changes(db, user_id=1, since=since, limit=args.page_size), args.requests
+        )
+
+    report("sync", results)
+
+
+if __name__ == "__main__":
+    main()
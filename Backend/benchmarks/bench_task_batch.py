@@ -0,0 +1,94 @@
+"""
+Task write throughput: the per-item endpoints against the batch endpoints.
+
+Creates and then updates `--tasks` tasks once through
+`POST/PUT /projects/{id}/tasks` one request per task, and once through
+`POST/PATCH /projects/{id}/tasks:batch` in batches of `--batch-size`.
+"""
+import argparse
+import time
+
+from benchmarks.common import configure_environment, report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tasks", type=int, default=1000)
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    configure_environment()
+
+    from fastapi.testclient import TestClient
+    from sqlmodel import Session
+
+    from app.core import security
+    from app.crud import crud_project
+    from app.db import database
+    from app.models.user_models import User
+    from app.schemas.project_schemas import ProjectCreate
+    from main import app
+
+    database.engine.echo = False
+    database.create_db_and_tables()
+
+    with Session(database.engine) as db:
+        user = User(full_name="Bench", email="bench@bench.test", hashed_password=security.get_password_hash("x"))
+        db.add(user)
+        db.commit()
+        project = crud_project.create_project_with_owner(
+            db, project_in=ProjectCreate(name="bench", description=None), owner_id=user.id
+        )
+        project_id = project.id
+        headers = {"Authorization": f"Bearer {security.create_access_token(subject=user.email, user_id=user.id)}"}
+
+    def task_body(i: int) -> dict:
+        return {"title": f"task {i}", "description": None, "due_date": None, "assignee_id": user.id}
+
+    results = {}
+    with TestClient(app) as client:
+        started = time.perf_counter()
+        ids = []
+        for i in range(args.tasks):
+            response = client.post(f"/api/projects/{project_id}/tasks/", json=task_body(i), headers=headers)
+            ids.append(response.json()["id"])
+        create_elapsed = time.perf_counter() - started
+        started = time.perf_counter()
+        for task_id in ids:
+            client.put(
+                f"/api/projects/{project_id}/tasks/{task_id}",
+                json={**task_body(task_id), "status": "In Progress"},
+                headers=headers,
+            )
+        update_elapsed = time.perf_counter() - started
+        results["per_item"] = {
+            "create_tasks_per_s": args.tasks / create_elapsed,
+            "update_tasks_per_s": args.tasks / update_elapsed,
+        }
+
+        started = time.perf_counter()
+        ids = []
+        for offset in range(0, args.tasks, args.batch_size):
+            batch = [task_body(i) for i in range(offset, min(offset + args.batch_size, args.tasks))]
+            response = client.post(f"/api/projects/{project_id}/tasks:batch", json={"tasks": batch}, headers=headers)
+            ids.extend(item["task"]["id"] for item in response.json())
+        create_elapsed = time.perf_counter() - started
+        started = time.perf_counter()
+        for offset in range(0, len(ids), args.batch_size):
+            batch = [
+                {**task_body(task_id), "id": task_id, "status": "In Progress"}
+                for task_id in ids[offset:offset + args.batch_size]
+            ]
+            client.patch(f"/api/projects/{project_id}/tasks:batch", json={"tasks": batch}, headers=headers)
+        update_elapsed = time.perf_counter() - started
+        results["batch"] = {
+            "batch_size": args.batch_size,
+            "create_tasks_per_s": args.tasks / create_elapsed,
+            "update_tasks_per_s": args.tasks / update_elapsed,
+        }
+
+    report("task_batch", results)
+
+
+if __name__ == "__main__":
+    main()
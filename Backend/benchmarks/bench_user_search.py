@@ -0,0 +1,97 @@
+"""
+User search latency at scale.
+
+Builds the in-process user search index over `--users` synthetic users and
+reports p50/p95/p99 per query for a mix of short and long prefixes, and how
+many queries hit the index's scan limit. With
+`--compare-like`, the same users are written to SQLite and the old
+`email LIKE '%x%' LIMIT 10` query is timed for comparison.
+"""
+import argparse
+import random
+import time
+
+from benchmarks.common import configure_environment, percentiles, report
+
+FIRST_NAMES = ["james", "mary", "john", "patricia", "robert", "jennifer", "michael", "linda", "william",
+               "elizabeth", "david", "barbara", "richard", "susan", "joseph", "jessica", "thomas", "sarah",
+               "charles", "karen", "aiko", "chen", "fatima", "ivan", "lucia", "mohammed", "noor", "olga"]
+LAST_NAMES = ["smith", "johnson", "williams", "brown", "jones", "garcia", "miller", "davis", "rodriguez",
+              "martinez", "hernandez", "lopez", "gonzalez", "wilson", "anderson", "thomas", "taylor",
+              "moore", "jackson", "martin", "lee", "perez", "thompson", "white", "harris", "sanchez"]
+DOMAINS = ["example.com", "corp.io", "mail.net", "synergy.dev", "acme.org"]
+
+
+def synthetic_users(count: int, rng: random.Random):
+    for user_id in range(1, count + 1):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        yield user_id, f"{first}.{last}{user_id}@{rng.choice(DOMAINS)}", f"{first.title()} {last.title()}"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=5000)
+    parser.add_argument("--compare-like", action="store_true")
+    args = parser.parse_args()
+
+    configure_environment()
+    from app.core.user_search import UserSearchIndex
+
+    rng = random.Random(42)
+    rows = list(synthetic_users(args.users, rng))
+
+    index = UserSearchIndex()
+    started = time.perf_counter()
+    index.load(rows)
+    results = {"users": args.users, "index_load_s": time.perf_counter() - started}
+
+    queries = []
+    for _ in range(args.queries):
+        _, email, full_name = rng.choice(rows)
+        source = rng.choice([email, full_name.split()[0], full_name.split()[1], full_name])
+        queries.append(source[: rng.randint(1, len(source))])
+
+    samples = []
+    truncated = 0
+    for query in queries:
+        t0 = time.perf_counter()
+        _, cut_short = index.search(query, limit=10)
+        samples.append(time.perf_counter() - t0)
+        truncated += cut_short
+    results["index_search"] = percentiles(samples)
+    results["index_search_truncated"] = truncated
+
+    samples = []
+    for query in queries[:1000]:
+        t0 = time.perf_counter()
+        index.search(query, offset=40, limit=10)
+        samples.append(time.perf_counter() - t0)
+    results["index_search_page_5"] = percentiles(samples)
+
+    if args.compare_like:
+        from sqlalchemy import insert
+        from sqlmodel import Session, select
+
+        from app.db import database
+        from app.models.user_models import User
+
+        database.create_db_and_tables()
+        with Session(database.engine) as db:
+            db.execute(insert(User), [
+                {"id": user_id, "email": email, "full_name": name, "hashed_password": "x", "is_active": True}
+                for user_id, email, name in rows
+            ])
+            db.commit()
+            samples = []
+            for query in queries[:200]:
+                t0 = time.perf_counter()
+                db.exec(select(User).where(User.email.contains(query)).limit(10)).all()
+                samples.append(time.perf_counter() - t0)
+        results["like_scan"] = percentiles(samples)
+
+    report("user_search", results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Shared helpers for the benchmark scripts.
+
+Every benchmark runs the real FastAPI app in-process against a throwaway SQLite
+database. Run them from the `Backend` directory, e.g.::
+
+    python -m benchmarks.bench_principal_cache
+
+`configure_environment` must be called before anything under `app` is imported,
+because `app.core.config.settings` is read at import time.
+"""
+import json
+import os
+import statistics
+import tempfile
+import time
+from typing import Callable
+
+
+def configure_environment(database_url: str | None = None, **overrides: str) -> str:
+    """Points the app at a benchmark database and fills in required settings."""
+    if database_url is None:
+        path = os.path.join(tempfile.mkdtemp(prefix="synergysphere-bench-"), "bench.db")
+        database_url = f"sqlite:///{path}"
+    os.environ["DATABASE_URL"] = database_url
+    os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+    os.environ.setdefault("ALGORITHM", "HS256")
+    os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "60")
+    for key, value in overrides.items():
+        os.environ[key] = str(value)
+    return database_url
+
+
+def percentiles(samples: list[float]) -> dict[str, float]:
+    """Summarises latency samples (seconds) as milliseconds."""
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+
+    def pick(q: float) -> float:
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000
+
+    return {
+        "count": len(ordered),
+        "mean_ms": statistics.fmean(ordered) * 1000,
+        "p50_ms": pick(0.50),
+        "p95_ms": pick(0.95),
+        "p99_ms": pick(0.99),
+        "max_ms": ordered[-1] * 1000,
+    }
+
+
+def measure(fn: Callable[[], object], iterations: int) -> dict[str, float]:
+    """Calls `fn` `iterations` times and reports throughput plus latency percentiles."""
+    samples = []
+    started = time.perf_counter()
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - started
+    return {"throughput_per_s": iterations / elapsed, **percentiles(samples)}
+
+
+def report(name: str, results: dict) -> None:
+    print(json.dumps({"benchmark": name, "results": results}, indent=2, default=str))
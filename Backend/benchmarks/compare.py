@@ -0,0 +1,62 @@
+"""
+Compares two `benchmarks.loadtest` reports route by route.
+
+    python -m benchmarks.compare before.json after.json --threshold 0.10
+
+Prints throughput and p50/p95/p99 for both runs with the relative change, and
+exits with status 1 if any route's p95 got slower, or its throughput lower, by
+more than `--threshold`.
+"""
+import argparse
+import json
+import sys
+
+METRICS = ("throughput_per_s", "p50_ms", "p95_ms", "p99_ms")
+
+
+def _change(before: float, after: float) -> float:
+    return (after - before) / before if before else 0.0
+
+
+def compare(before: dict, after: dict, threshold: float) -> tuple[list[str], list[str]]:
+    """Returns the table lines and the list of regressed routes."""
+    lines = [f"{'route':<52}" + "".join(f"{m:>28}" for m in METRICS)]
+    regressions = []
+    for route, old in before["routes"].items():
+        new = after["routes"].get(route)
+        if new is None:
+            lines.append(f"{route:<52} (missing from second run)")
+            continue
+        cells = []
+        for metric in METRICS:
+            a, b = old.get(metric, 0.0), new.get(metric, 0.0)
+            cells.append(f"{a:>10.2f} -> {b:>9.2f} {_change(a, b):>+6.0%}")
+        lines.append(f"{route:<52}" + "".join(f"{cell:>28}" for cell in cells))
+        if (
+            _change(old.get("p95_ms", 0.0), new.get("p95_ms", 0.0)) > threshold
+            or _change(old.get("throughput_per_s", 0.0), new.get("throughput_per_s", 0.0)) < -threshold
+        ):
+            regressions.append(route)
+    return lines, regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("before")
+    parser.add_argument("after")
+    parser.add_argument("--threshold", type=float, default=0.10)
+    args = parser.parse_args()
+
+    with open(args.before) as f:
+        before = json.load(f)
+    with open(args.after) as f:
+        after = json.load(f)
+    lines, regressions = compare(before, after, args.threshold)
+    print("\n".join(lines))
+    if regressions:
+        print(f"\nRegressed beyond {args.threshold:.0%}: " + ", ".join(regressions))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,421 @@
+"""
+Load test for every API route against a seeded synthetic dataset.
+
+Seeds the database with `benchmarks.seed` (unless it already holds users),
+then drives the real app in-process through httpx, acting as the user with the
+most project memberships. Each route is exercised by `--concurrency` clients
+for `--requests` requests (login and register get a fraction of that, since
+they are bounded by bcrypt) and the run is written as JSON with throughput and
+p50/p95/p99 per route, ready for `benchmarks.compare`:
+
+    python -m benchmarks.loadtest --database-url sqlite:///bench.db --output before.json
+    # ...change something...
+    python -m benchmarks.loadtest --database-url sqlite:///bench.db --output after.json
+    python -m benchmarks.compare before.json after.json
+
+Reusing the database between runs keeps the dataset identical and skips the
+seeding step; write routes add and delete rows, so reseed (delete the file) for
+a strictly clean comparison.
+"""
+import argparse
+import asyncio
+import json
+import platform
+import random
+import subprocess
+import time
+from datetime import datetime, timedelta
+from dataclasses import asdict, dataclass, field
+from typing import Awaitable, Callable
+
+from benchmarks.common import configure_environment, percentiles
+
+
+@dataclass
+class LoadContext:
+    client: object
+    headers: dict[str, str]
+    email: str
+    project_ids: list[int]
+    owned_project_ids: list[int]
+    task_ids: dict[int, list[int]]
+    user_count: int
+    rng: random.Random
+    # (project_id, user_id) of the members added by the run, for removing them again
+    added_members: list[tuple[int, int]] = field(default_factory=list)
+
+    def project(self) -> int:
+        return self.rng.choice(self.project_ids)
+
+    def task(self) -> tuple[int, int]:
+        project_id = self.rng.choice([pid for pid in self.project_ids if self.task_ids.get(pid)])
+        return project_id, self.rng.choice(self.task_ids[project_id])
+
+
+@dataclass
+class Scenario:
+    # "METHOD /path/template", matching the route labels used by /metrics
+    route: str
+    call: Callable[[LoadContext, int], Awaitable[object]]
+    # Share of --requests issued for this route
+    weight: float = 1.0
+
+
+async def _login(ctx: LoadContext, i: int):
+    from benchmarks.seed import SEED_PASSWORD
+
+    return await ctx.client.post("/api/auth/login", data={"username": ctx.email, "password": SEED_PASSWORD})
+
+
+async def _register(ctx: LoadContext, i: int):
+    email = f"loadtest-{time.time_ns()}-{i}@bench.test"
+    return await ctx.client.post(
+        "/api/auth/register", json={"email": email, "full_name": "Load Test", "password": "load-test-password"}
+    )
+
+
+async def _me(ctx: LoadContext, i: int):
+    return await ctx.client.get("/api/users/me", headers=ctx.headers)
+
+
+async def _my_tasks(ctx: LoadContext, i: int):
+    return await ctx.client.get(
+        "/api/users/me/tasks", params={"sort": ("due_date", "status")[i % 2], "limit": 50}, headers=ctx.headers
+    )
+
+
+async def _my_due_tasks(ctx: LoadContext, i: int):
+    return await ctx.client.get(
+        "/api/users/me/tasks/due", params={"within": ("PT12H", "P1D", "P7D")[i % 3], "limit": 50}, headers=ctx.headers
+    )
+
+
+async def _search_users(ctx: LoadContext, i: int):
+    query = f"user{ctx.rng.randint(1, ctx.user_count)}"[: ctx.rng.randint(5, 8)]
+    return await ctx.client.get("/api/users/", params={"q": query}, headers=ctx.headers)
+
+
+async def _create_project(ctx: LoadContext, i: int):
+    return await ctx.client.post(
+        "/api/projects/", json={"name": f"Load test {i}", "description": None}, headers=ctx.headers
+    )
+
+
+async def _list_projects(ctx: LoadContext, i: int):
+    return await ctx.client.get("/api/projects/", headers=ctx.headers)
+
+
+async def _project_detail(ctx: LoadContext, i: int):
+    return await ctx.client.get(f"/api/projects/{ctx.project()}", headers=ctx.headers)
+
+
+async def _project_stats(ctx: LoadContext, i: int):
+    return await ctx.client.get(f"/api/projects/{ctx.project()}/stats", headers=ctx.headers)
+
+
+async def _update_project(ctx: LoadContext, i: int):
+    project_id = ctx.rng.choice(ctx.owned_project_ids)
+    return await ctx.client.put(
+        f"/api/projects/{project_id}", json={"description": f"Updated {i}"}, headers=ctx.headers
+    )
+
+
+async def _add_member(ctx: LoadContext, i: int):
+    project_id = ctx.rng.choice(ctx.owned_project_ids)
+    user_id = ctx.rng.randint(1, ctx.user_count)
+    # 409 for existing members is an expected outcome here
+    response = await ctx.client.post(
+        f"/api/projects/{project_id}/members", params={"user_id": user_id}, headers=ctx.headers
+    )
+    if response.status_code == 201:
+        ctx.added_members.append((project_id, user_id))
+    return response
+
+
+async def _remove_member(ctx: LoadContext, i: int):
+    if ctx.added_members:
+        project_id, user_id = ctx.added_members.pop()
+    else:
+        # 404 for non-members is an expected outcome here
+        project_id, user_id = ctx.rng.choice(ctx.owned_project_ids), ctx.rng.randint(1, ctx.user_count)
+    return await ctx.client.delete(f"/api/projects/{project_id}/members/{user_id}", headers=ctx.headers)
+
+
+async def _list_tasks(ctx: LoadContext, i: int):
+    return await ctx.client.get(f"/api/projects/{ctx.project()}/tasks/", headers=ctx.headers)
+
+
+async def _export_tasks(ctx: LoadContext, i: int):
+    return await ctx.client.get(
+        f"/api/projects/{ctx.project()}/tasks/export", params={"format": ("ndjson", "csv")[i % 2]}, headers=ctx.headers
+    )
+
+
+async def _import_tasks(ctx: LoadContext, i: int):
+    body = "".join(
+        json.dumps({"title": f"Load test import {i}.{n}", "status": "To-Do"}) + "\n" for n in range(20)
+    )
+    return await ctx.client.post(
+        f"/api/projects/{ctx.project()}/tasks/import", params={"format": "ndjson"}, content=body,
+        headers={**ctx.headers, "Content-Type": "application/x-ndjson"},
+    )
+
+
+async def _create_task(ctx: LoadContext, i: int):
+    return await ctx.client.post(
+        f"/api/projects/{ctx.project()}/tasks/",
+        json={"title": f"Load test task {i}", "description": None, "due_date": None, "assignee_id": None},
+        headers=ctx.headers,
+    )
+
+
+async def _update_task(ctx: LoadContext, i: int):
+    project_id, task_id = ctx.task()
+    return await ctx.client.put(
+        f"/api/projects/{project_id}/tasks/{task_id}",
+        json={
+            "title": f"Task {task_id}",
+            "description": None,
+            "due_date": None,
+            "status": ctx.rng.choice(["To-Do", "In Progress", "Done"]),
+            "assignee_id": None,
+        },
+        headers=ctx.headers,
+    )
+
+
+async def _delete_task(ctx: LoadContext, i: int):
+    project_id, task_id = ctx.task()
+    # Not picked again, by this or later scenarios
+    ctx.task_ids[project_id].remove(task_id)
+    return await ctx.client.delete(f"/api/projects/{project_id}/tasks/{task_id}", headers=ctx.headers)
+
+
+async def _batch_create_tasks(ctx: LoadContext, i: int):
+    tasks = [
+        {"title": f"Load test batch {i}.{n}", "description": None, "due_date": None, "assignee_id": None}
+        for n in range(20)
+    ]
+    return await ctx.client.post(
+        f"/api/projects/{ctx.project()}/tasks:batch", json={"tasks": tasks}, headers=ctx.headers
+    )
+
+
+async def _batch_update_tasks(ctx: LoadContext, i: int):
+    project_id = ctx.rng.choice([pid for pid in ctx.project_ids if ctx.task_ids.get(pid)])
+    ids = ctx.rng.sample(ctx.task_ids[project_id], min(20, len(ctx.task_ids[project_id])))
+    tasks = [
+        {"id": task_id, "title": f"Task {task_id}", "description": None, "due_date": None,
+         "status": "In Progress", "assignee_id": None}
+        for task_id in ids
+    ]
+    return await ctx.client.patch(
+        f"/api/projects/{project_id}/tasks:batch", json={"tasks": tasks}, headers=ctx.headers
+    )
+
+
+async def _list_comments(ctx: LoadContext, i: int):
+    return await ctx.client.get(f"/api/projects/{ctx.project()}/comments/", headers=ctx.headers)
+
+
+async def _create_comment(ctx: LoadContext, i: int):
+    return await ctx.client.post(
+        f"/api/projects/{ctx.project()}/comments/", json={"content": f"Load test comment {i}"}, headers=ctx.headers
+    )
+
+
+async def _sync(ctx: LoadContext, i: int):
+    from app.core.pagination import encode_cursor
+
+    # Mostly deltas since a recent sync, with the occasional first page of a full snapshot
+    params = {}
+    if i % 10:
+        params["since"] = encode_cursor({"since": (datetime.utcnow() - timedelta(minutes=5)).isoformat()})
+    return await ctx.client.get("/api/sync/", params=params, headers=ctx.headers)
+
+
+async def _metrics(ctx: LoadContext, i: int):
+    return await ctx.client.get("/metrics")
+
+
+SCENARIOS = [
+    Scenario("POST /api/auth/login", _login, weight=0.04),
+    Scenario("POST /api/auth/register", _register, weight=0.04),
+    Scenario("GET /api/users/me", _me),
+    Scenario("GET /api/users/me/tasks", _my_tasks),
+    Scenario("GET /api/users/me/tasks/due", _my_due_tasks),
+    Scenario("GET /api/users/", _search_users),
+    Scenario("POST /api/projects/", _create_project, weight=0.2),
+    Scenario("GET /api/projects/", _list_projects),
+    Scenario("GET /api/projects/{project_id}", _project_detail, weight=0.2),
+    Scenario("GET /api/projects/{project_id}/stats", _project_stats),
+    Scenario("PUT /api/projects/{project_id}", _update_project, weight=0.2),
+    Scenario("POST /api/projects/{project_id}/members", _add_member, weight=0.2),
+    Scenario("DELETE /api/projects/{project_id}/members/{user_id}", _remove_member, weight=0.2),
+    Scenario("GET /api/projects/{project_id}/tasks/", _list_tasks),
+    Scenario("GET /api/projects/{project_id}/tasks/export", _export_tasks, weight=0.2),
+    Scenario("POST /api/projects/{project_id}/tasks/import", _import_tasks, weight=0.1),
+    Scenario("POST /api/projects/{project_id}/tasks/", _create_task, weight=0.5),
+    Scenario("PUT /api/projects/{project_id}/tasks/{task_id}", _update_task, weight=0.5),
+    Scenario("DELETE /api/projects/{project_id}/tasks/{task_id}", _delete_task, weight=0.2),
+    Scenario("POST /api/projects/{project_id}/tasks:batch", _batch_create_tasks, weight=0.1),
+    Scenario("PATCH /api/projects/{project_id}/tasks:batch", _batch_update_tasks, weight=0.1),
+    Scenario("GET /api/projects/{project_id}/comments/", _list_comments),
+    Scenario("POST /api/projects/{project_id}/comments/", _create_comment, weight=0.5),
+    Scenario("GET /api/sync/", _sync, weight=0.5),
+    Scenario("GET /metrics", _metrics, weight=0.1),
+]
+
+
+async def run_scenario(ctx: LoadContext, scenario: Scenario, requests: int, concurrency: int) -> dict:
+    """Issues `requests` calls from `concurrency` workers; returns throughput, latency and status counts."""
+    counter = iter(range(requests))
+    samples: list[float] = []
+    statuses: dict[str, int] = {}
+
+    async def worker() -> None:
+        for i in counter:
+            t0 = time.perf_counter()
+            try:
+                outcome = str((await scenario.call(ctx, i)).status_code)
+            except Exception as exc:
+                outcome = type(exc).__name__
+            samples.append(time.perf_counter() - t0)
+            statuses[outcome] = statuses.get(outcome, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {"throughput_per_s": requests / elapsed, **percentiles(samples), "statuses": statuses}
+
+
+def _git_revision() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url")
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--projects", type=int, default=10_000)
+    parser.add_argument("--tasks", type=int, default=2_000_000)
+    parser.add_argument("--comments", type=int, default=200_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--requests", type=int, default=500, help="requests per route, scaled by its weight")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--route", action="append", help="only run routes containing this string")
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    args = parser.parse_args()
+
+    database_url = configure_environment(args.database_url)
+
+    import httpx
+    from sqlmodel import Session, func, select
+
+    from app.core import security
+    from app.core.security import password_hasher
+    from app.db import database
+    from app.models.project_models import Project, Task
+    from app.models.user_models import ProjectMemberLink, User
+    from benchmarks import seed
+    from main import app
+
+    database.create_db_and_tables()
+    with Session(database.engine) as db:
+        seeded = db.exec(select(func.count()).select_from(User)).one() > 0
+    seed_summary = None
+    if not seeded:
+        seed_summary = asdict(seed.seed(
+            users=args.users, projects=args.projects, tasks=args.tasks, comments=args.comments,
+            seed_value=args.seed,
+        ))
+
+    with Session(database.engine) as db:
+        user_count = db.exec(select(func.max(User.id))).one()
+        busiest_id = db.exec(
+            select(ProjectMemberLink.user_id)
+            .group_by(ProjectMemberLink.user_id)
+            .order_by(func.count().desc(), ProjectMemberLink.user_id)
+            .limit(1)
+        ).one()
+        user = db.get(User, busiest_id)
+        project_ids = list(db.exec(
+            select(ProjectMemberLink.project_id).where(ProjectMemberLink.user_id == busiest_id)
+        ).all())
+        owned_project_ids = list(db.exec(select(Project.id).where(Project.owner_id == busiest_id)).all())
+        if not owned_project_ids:
+            # Give the acting user a project to exercise owner-only routes on
+            project = Project(name="Load test", description=None, owner_id=busiest_id)
+            db.add(project)
+            db.flush()
+            db.add(ProjectMemberLink(user_id=busiest_id, project_id=project.id))
+            db.commit()
+            owned_project_ids = [project.id]
+            project_ids.append(project.id)
+        task_ids: dict[int, list[int]] = {}
+        for project_id, task_id in db.exec(
+            select(Task.project_id, Task.id).where(Task.project_id.in_(project_ids)).order_by(Task.id).limit(100_000)
+        ).all():
+            task_ids.setdefault(project_id, []).append(task_id)
+        dataset = {
+            "users": user_count,
+            "projects": db.exec(select(func.count()).select_from(Project)).one(),
+            "tasks": db.exec(select(func.count()).select_from(Task)).one(),
+            "acting_user_projects": len(project_ids),
+        }
+        token = security.create_access_token(subject=user.email, user_id=user.id)
+
+    scenarios = [s for s in SCENARIOS if not args.route or any(r in s.route for r in args.route)]
+
+    async def run() -> dict:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=600) as client:
+            ctx = LoadContext(
+                client=client,
+                headers={"Authorization": f"Bearer {token}"},
+                email=user.email,
+                project_ids=project_ids,
+                owned_project_ids=owned_project_ids,
+                task_ids=task_ids,
+                user_count=user_count,
+                rng=random.Random(args.seed),
+            )
+            results = {}
+            for scenario in scenarios:
+                requests = max(1, int(args.requests * scenario.weight))
+                results[scenario.route] = await run_scenario(ctx, scenario, requests, args.concurrency)
+            return results
+
+    try:
+        routes = asyncio.run(run())
+    finally:
+        password_hasher.shutdown()
+
+    report = {
+        "benchmark": "loadtest",
+        "meta": {
+            "revision": _git_revision(),
+            "database": database_url.split("://", 1)[0],
+            "python": platform.python_version(),
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "seed": args.seed,
+            "dataset": dataset,
+            "seeded_now": seed_summary,
+        },
+        "routes": routes,
+    }
+    output = json.dumps(report, indent=2, default=str)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
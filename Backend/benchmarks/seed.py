@@ -0,0 +1,185 @@
+"""
+Synthetic data generator for benchmarks and load tests.
+
+Seeds users, projects, memberships, tasks and comments with bulk inserts. Project sizes
+are skewed: member counts follow a Pareto distribution, so a few projects have
+thousands of members while most have a handful, and tasks and comments are spread in
+proportion to project size. Everything is driven by `--seed`, so two runs with
+the same arguments produce the same dataset.
+
+    python -m benchmarks.seed --database-url sqlite:///bench.db --users 100000 --projects 10000 --tasks 2000000
+"""
+import argparse
+import random
+import time
+from bisect import bisect_right
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from benchmarks.common import configure_environment
+
+SEED_PASSWORD = "benchmark-password"
+CHUNK_SIZE = 10_000
+
+
+@dataclass
+class SeedSummary:
+    users: int
+    projects: int
+    memberships: int
+    tasks: int
+    comments: int
+    elapsed_s: float
+    # The user in the most projects; load tests act as this user
+    busiest_user_id: int
+    busiest_user_email: str
+
+
+def _insert_chunked(db, table, rows) -> int:
+    from sqlalchemy import insert
+
+    count = 0
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= CHUNK_SIZE:
+            db.execute(insert(table), chunk)
+            count += len(chunk)
+            chunk = []
+    if chunk:
+        db.execute(insert(table), chunk)
+        count += len(chunk)
+    return count
+
+
+def seed(*, users: int, projects: int, tasks: int, comments: int = 0, max_members: int = 2000, seed_value: int = 42) -> SeedSummary:
+    """Fills the configured database. Tables must already exist."""
+    from sqlmodel import Session
+
+    from app.core.security import get_password_hash
+    from app.crud import crud_stats
+    from app.db import database
+    from app.models.project_models import Comment, Project, Task, TaskStatus
+    from app.models.user_models import ProjectMemberLink, User
+
+    rng = random.Random(seed_value)
+    started = time.perf_counter()
+    now = datetime.utcnow()
+    hashed_password = get_password_hash(SEED_PASSWORD)
+    statuses = list(TaskStatus)
+
+    # Skewed project sizes; every project has at least its owner
+    sizes = [min(max_members, max(1, int(rng.paretovariate(1.2)))) for _ in range(projects)]
+    members_by_project: list[list[int]] = []
+    for size in sizes:
+        members_by_project.append(rng.sample(range(1, users + 1), min(size, users)))
+
+    membership_counts: dict[int, int] = {}
+    for members in members_by_project:
+        for user_id in members:
+            membership_counts[user_id] = membership_counts.get(user_id, 0) + 1
+    busiest_user_id = max(membership_counts, key=membership_counts.get)
+
+    with Session(database.engine) as db:
+        _insert_chunked(db, User, (
+            {
+                "id": user_id,
+                "full_name": f"User {user_id}",
+                "email": f"user{user_id}@bench.test",
+                "hashed_password": hashed_password,
+                "is_active": True,
+            }
+            for user_id in range(1, users + 1)
+        ))
+        _insert_chunked(db, Project, (
+            {
+                "id": project_id,
+                "name": f"Project {project_id}",
+                "description": f"Synthetic project {project_id}",
+                "created_at": now,
+                "owner_id": members[0],
+                "version": 1,
+            }
+            for project_id, members in enumerate(members_by_project, start=1)
+        ))
+        memberships = _insert_chunked(db, ProjectMemberLink, (
+            {"user_id": user_id, "project_id": project_id}
+            for project_id, members in enumerate(members_by_project, start=1)
+            for user_id in members
+        ))
+
+        total_size = sum(sizes)
+        cumulative = []
+        running = 0
+        for size in sizes:
+            running += size
+            cumulative.append(running)
+
+        def task_rows():
+            for task_id in range(1, tasks + 1):
+                project_index = bisect_right(cumulative, rng.random() * total_size)
+                members = members_by_project[project_index]
+                yield {
+                    "id": task_id,
+                    "title": f"Task {task_id}",
+                    "description": "Synthetic task used for benchmarking " * rng.randint(0, 4),
+                    "status": rng.choice(statuses),
+                    "created_at": now - timedelta(days=rng.randint(0, 365)),
+                    "due_date": now + timedelta(days=rng.randint(-60, 120)) if rng.random() < 0.7 else None,
+                    "project_id": project_index + 1,
+                    "assignee_id": rng.choice(members) if rng.random() < 0.8 else None,
+                }
+
+        task_count = _insert_chunked(db, Task, task_rows())
+
+        def comment_rows():
+            for _ in range(comments):
+                project_index = bisect_right(cumulative, rng.random() * total_size)
+                yield {
+                    "content": "Synthetic comment " * rng.randint(1, 10),
+                    "created_at": now - timedelta(seconds=rng.randint(0, 365 * 86400)),
+                    "project_id": project_index + 1,
+                    "author_id": rng.choice(members_by_project[project_index]),
+                }
+
+        comment_count = _insert_chunked(db, Comment, comment_rows())
+        db.commit()
+        # Bulk inserts bypass crud_task, so derive the counters in one pass
+        crud_stats.rebuild_task_stats(db)
+
+    return SeedSummary(
+        users=users,
+        projects=projects,
+        memberships=memberships,
+        tasks=task_count,
+        comments=comment_count,
+        elapsed_s=time.perf_counter() - started,
+        busiest_user_id=busiest_user_id,
+        busiest_user_email=f"user{busiest_user_id}@bench.test",
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url")
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--projects", type=int, default=10_000)
+    parser.add_argument("--tasks", type=int, default=2_000_000)
+    parser.add_argument("--comments", type=int, default=200_000)
+    parser.add_argument("--max-members", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    database_url = configure_environment(args.database_url)
+    from app.db import database
+
+    database.create_db_and_tables()
+    summary = seed(
+        users=args.users, projects=args.projects, tasks=args.tasks, comments=args.comments,
+        max_members=args.max_members, seed_value=args.seed,
+    )
+    print(f"Seeded {database_url}: {summary}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,49 @@
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from starlette.middleware.cors import CORSMiddleware
 
 from app.api.api_router import api_router
-from app.db.database import create_db_and_tables
+from app.api.endpoints import metrics, projects
+from app.api.middleware import CompressionMiddleware, RequestMetricsMiddleware
+from app.core.access import project_access
+from app.core.archival import TaskArchiver
+from app.core.config import settings
+from app.core.events import change_hub
+from app.core.metrics import cache_collector, registry
+from app.core.principals import principal_cache
+from app.core.reminders import reminder_scheduler
+from app.core.security import PasswordHasherBusy, password_hasher
+from app.db.database import get_engine, recent_writers
+from app.db.migrations import check_schema
+from app.db.replicas import ReadYourWritesMiddleware
+from app.db.unit_of_work import group_committer
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    create_db_and_tables()
+    # Tables are created and changed by `manage.py migrate`; workers only check the stored revision
+    check_schema(get_engine())
+    archiver = None
+    if settings.TASK_ARCHIVE_INTERVAL_SECONDS > 0:
+        archiver = TaskArchiver(
+            after_days=settings.TASK_ARCHIVE_AFTER_DAYS,
+            batch_size=settings.TASK_ARCHIVE_BATCH_SIZE,
+            interval=settings.TASK_ARCHIVE_INTERVAL_SECONDS,
+        )
+        archiver.start(get_engine())
+    # Group sessions aren't bound to a project's shard; sharding spreads the commits instead
+    if settings.GROUP_COMMIT_WINDOW_MS > 0 and not settings.DATABASE_SHARD_URLS:
+        group_committer.start(get_engine())
+    if settings.TASK_REMINDERS_ENABLED:
+        reminder_scheduler.start(get_engine())
     yield
+    reminder_scheduler.stop()
+    group_committer.stop()
+    if archiver is not None:
+        archiver.stop()
+    password_hasher.shutdown()
 app=FastAPI(title="SynergySphere API",
     description="The backend API for the SynergySphere collaboration platform.",
     version="0.1.0",lifespan=lifespan)
@@ -28,12 +61,41 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],           # allow all HTTP methods
     allow_headers=["*"],           # allow all headers
+    expose_headers=["ETag", "X-Next-Cursor", "X-DB-Query-Count", "X-DB-Time-Ms", "X-DB-Slowest-Ms", "X-DB-Slowest-Statement", "X-DB-Repeated-Statements", "X-Search-Truncated"],
 )
 
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.RESPONSE_COMPRESSION_MINIMUM_SIZE,
+    gzip_level=settings.RESPONSE_GZIP_LEVEL,
+    brotli_quality=settings.RESPONSE_BROTLI_QUALITY,
+)
+
+app.add_middleware(ReadYourWritesMiddleware, writers=recent_writers)
+
+app.add_middleware(RequestMetricsMiddleware)
+
+registry.register_collector(cache_collector("project_access", project_access.stats))
+registry.register_collector(cache_collector("principal", principal_cache.stats))
+registry.register_collector(cache_collector("project_detail", projects.project_detail_cache.stats))
+registry.register_collector(lambda: {(f"change_hub_{key}", ()): value for key, value in change_hub.stats().items()})
+registry.register_collector(lambda: {("task_reminders_pending", ()): reminder_scheduler.pending()})
+
+
+
+@app.exception_handler(PasswordHasherBusy)
+async def password_hasher_busy_handler(request: Request, exc: PasswordHasherBusy):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Authentication is temporarily overloaded, please retry"},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
 
 
 app.include_router(api_router, prefix="/api")
 
+app.include_router(metrics.router, tags=["Metrics"])
+
 @app.get('/',tags=["Root"])
 def read_root():
     return {"message": "Welcome to SynergySphere API! Navigate to /docs for documentation."}
@@ -0,0 +1,209 @@
+"""
+Maintenance commands, run from the Backend directory with the app's settings:
+
+    python manage.py migrate [--check]
+    python manage.py task-stats verify [--project-id ID]
+    python manage.py task-stats rebuild [--project-id ID]
+    python manage.py import-tasks --project-id ID [--format csv|ndjson] [--chunk-size N] FILE
+    python manage.py purge-tombstones [--older-than-days N]
+    python manage.py archive-tasks [--older-than-days N] [--batch-size N]
+    python manage.py shards status
+    python manage.py shards rebalance [--dry-run]
+    python manage.py shards move --project-id ID --shard N
+
+Commands over tasks run on every shard when DATABASE_SHARD_URLS is set.
+"""
+import argparse
+import sys
+from contextlib import nullcontext
+
+
+def migrate(args) -> int:
+    from app.db import migrations, sharding
+    from app.db.database import engine, shard_map
+
+    if args.check:
+        with engine.connect() as conn:
+            revision = migrations.current_revision(conn)
+        pending = [f"{number}: {description}" for number, description, _ in migrations.MIGRATIONS if number > revision]
+        for line in pending:
+            print(f"pending {line}")
+        print(f"Schema is at revision {revision} of {migrations.SCHEMA_REVISION}")
+        return 1 if pending else 0
+    applied = migrations.migrate(engine)
+    for line in sharding.prepare_shards(shard_map):
+        print(f"prepared {line}")
+    for line in applied:
+        print(f"applied {line}")
+    print(f"Schema is at revision {migrations.SCHEMA_REVISION}" if applied else "Schema is up to date")
+    return 0
+
+
+def task_stats(args) -> int:
+    from app.crud import crud_stats
+    from app.db.database import shard_map
+
+    if args.project_id is None:
+        sessions = shard_map.shard_sessions()
+    else:
+        sessions = nullcontext([shard_map.session(args.project_id)])
+    drift = []
+    with sessions as shard_sessions:
+        for db in shard_sessions:
+            with db:
+                if args.action == "rebuild":
+                    crud_stats.rebuild_task_stats(db, project_id=args.project_id)
+                else:
+                    drift += crud_stats.verify_task_stats(db, project_id=args.project_id)
+    if args.action == "rebuild":
+        print("Task statistics rebuilt")
+        return 0
+    for line in drift:
+        print(line)
+    print(f"{len(drift)} drifted counter rows" if drift else "Task statistics are consistent")
+    return 1 if drift else 0
+
+
+def import_tasks(args) -> int:
+    from app.core.config import settings
+    from app.crud import crud_import
+    from app.db.database import shard_map
+
+    format = args.format or ("ndjson" if args.file.endswith((".ndjson", ".jsonl")) else "csv")
+
+    def progress(imported: int, rejected: int) -> None:
+        print(f"\r{imported} imported, {rejected} rejected", end="", file=sys.stderr, flush=True)
+
+    with open(args.file, "rb") as f, shard_map.session(args.project_id) as db:
+        chunks = iter(lambda: f.read(1 << 16), b"")
+        importer = crud_import.TaskImporter(
+            db, project_id=args.project_id, chunk_size=args.chunk_size or settings.IMPORT_CHUNK_SIZE, progress=progress
+        )
+        report = importer.run(crud_import.parse_records(crud_import.iter_lines(chunks), format))
+    print(file=sys.stderr)
+    for error in report.errors:
+        print(f"line {error.line}: {error.error}")
+    print(
+        f"Imported {report.imported} tasks in {report.elapsed_s:.1f}s ({report.rows_per_s:.0f} rows/s), "
+        f"rejected {report.rejected}"
+    )
+    return 1 if report.rejected else 0
+
+
+def purge_tombstones(args) -> int:
+    from datetime import datetime, timedelta
+
+    from app.core.config import settings
+    from app.crud import crud_sync
+    from app.db.database import shard_map
+
+    days = settings.SYNC_TOMBSTONE_RETENTION_DAYS if args.older_than_days is None else args.older_than_days
+    before = datetime.utcnow() - timedelta(days=days)
+    with shard_map.shard_sessions() as sessions:
+        deleted = sum(crud_sync.purge_tombstones(db, before=before) for db in sessions)
+    print(f"Purged {deleted} sync tombstones older than {days} days")
+    return 0
+
+
+def archive_tasks(args) -> int:
+    from datetime import datetime, timedelta
+
+    from app.core.config import settings
+    from app.crud import crud_task
+    from app.db.database import shard_map
+
+    days = settings.TASK_ARCHIVE_AFTER_DAYS if args.older_than_days is None else args.older_than_days
+    archived = 0
+
+    def progress(shard_archived: int) -> None:
+        print(f"\r{archived + shard_archived} archived", end="", file=sys.stderr, flush=True)
+
+    with shard_map.shard_sessions() as sessions:
+        for db in sessions:
+            archived += crud_task.archive_done_tasks(
+                db,
+                done_before=datetime.utcnow() - timedelta(days=days),
+                batch_size=args.batch_size or settings.TASK_ARCHIVE_BATCH_SIZE,
+                progress=progress,
+            )
+    print(file=sys.stderr)
+    print(f"Archived {archived} tasks Done for more than {days} days")
+    return 0
+
+
+def shards(args) -> int:
+    from app.db import sharding
+    from app.db.database import shard_map
+
+    if not shard_map.sharded:
+        print("Not sharded; set DATABASE_SHARD_URLS")
+        return 1
+    if args.action == "status":
+        status = sharding.shard_status(shard_map)
+        for shard in status:
+            stray = f", rows of projects placed elsewhere: {shard['stray_projects']}" if shard["stray_projects"] else ""
+            print(f"shard {shard['shard']}: {shard['projects']} projects, {shard['rows']} rows{stray}")
+        return 1 if any(shard["stray_projects"] for shard in status) else 0
+    if args.action == "move":
+        if args.project_id is None or args.shard is None:
+            print("move needs --project-id and --shard")
+            return 2
+        copied = sharding.move_project(shard_map, project_id=args.project_id, shard=args.shard)
+        print(f"Project {args.project_id} is on shard {args.shard}, {copied} rows copied")
+        return 0
+
+    def progress(project_id: int, shard: int, rows: int) -> None:
+        print(f"moved project {project_id} to shard {shard}, {rows} rows")
+
+    moves = sharding.rebalance(shard_map, dry_run=args.dry_run, progress=progress)
+    if args.dry_run:
+        for project_id, source, target in moves:
+            print(f"would move project {project_id} from shard {source} to {target}")
+    print(f"{len(moves)} projects {'to move' if args.dry_run else 'moved'}")
+    return 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    migrate_parser = commands.add_parser("migrate", help="bring the database schema up to this release")
+    migrate_parser.add_argument("--check", action="store_true", help="only list pending revisions; exit 1 if any")
+    migrate_parser.set_defaults(handler=migrate)
+
+    stats_parser = commands.add_parser("task-stats", help="verify or rebuild the per-project task counters")
+    stats_parser.add_argument("action", choices=["verify", "rebuild"])
+    stats_parser.add_argument("--project-id", type=int)
+    stats_parser.set_defaults(handler=task_stats)
+
+    import_parser = commands.add_parser("import-tasks", help="bulk-load tasks into a project from CSV or NDJSON")
+    import_parser.add_argument("file")
+    import_parser.add_argument("--project-id", type=int, required=True)
+    import_parser.add_argument("--format", choices=["csv", "ndjson"], help="defaults to the file extension")
+    import_parser.add_argument("--chunk-size", type=int)
+    import_parser.set_defaults(handler=import_tasks)
+
+    purge_parser = commands.add_parser("purge-tombstones", help="delete delta sync tombstones past their retention")
+    purge_parser.add_argument("--older-than-days", type=int, help="defaults to SYNC_TOMBSTONE_RETENTION_DAYS")
+    purge_parser.set_defaults(handler=purge_tombstones)
+
+    archive_parser = commands.add_parser("archive-tasks", help="move long-Done tasks to the archive table")
+    archive_parser.add_argument("--older-than-days", type=int, help="defaults to TASK_ARCHIVE_AFTER_DAYS")
+    archive_parser.add_argument("--batch-size", type=int, help="defaults to TASK_ARCHIVE_BATCH_SIZE")
+    archive_parser.set_defaults(handler=archive_tasks)
+
+    shards_parser = commands.add_parser(
+        "shards", help="show project shards, or move projects between them; run with the app stopped"
+    )
+    shards_parser.add_argument("action", choices=["status", "rebalance", "move"])
+    shards_parser.add_argument("--dry-run", action="store_true", help="rebalance: only list the moves")
+    shards_parser.add_argument("--project-id", type=int)
+    shards_parser.add_argument("--shard", type=int)
+    shards_parser.set_defaults(handler=shards)
+
+    args = parser.parse_args()
+    sys.exit(args.handler(args))
+
+
+if __name__ == "__main__":
+    main()
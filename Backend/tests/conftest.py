@@ -0,0 +1,85 @@
+"""
+The tests run the app in-process against a throwaway SQLite database, set up
+here before anything under `app` is imported (settings are read at import).
+Run them from the `Backend` directory with `python -m pytest`.
+
+Tests that write use the `database` fixture, which gives each test a database
+of its own; requests go through `client` (no lifespan, so no background
+threads) and are authenticated with the headers `make_user` returns.
+"""
+import itertools
+
+import pytest
+
+from benchmarks.common import configure_environment
+
+configure_environment(PASSWORD_HASH_WORKERS=0)
+
+_emails = itertools.count(1)
+
+
+def reset_app_state() -> None:
+    """Drops the cached engines and the in-process caches, which would otherwise outlive a test's database."""
+    from app.api.endpoints.projects import project_detail_cache
+    from app.core.access import project_access
+    from app.core.principals import principal_cache
+    from app.core.user_search import user_search_index
+    from app.db import database
+
+    if database.get_engine.cache_info().currsize:
+        database.get_engine().dispose()
+    if database.get_replicas.cache_info().currsize:
+        for engine in database.get_replicas().engines:
+            engine.dispose()
+    for get in (
+        database.get_engine, database.get_async_engine, database.get_replicas,
+        database.get_async_replicas, database.get_shard_map,
+    ):
+        get.cache_clear()
+    for cache in (
+        principal_cache, project_access, project_detail_cache, database.recent_writers, user_search_index,
+    ):
+        cache.clear()
+
+
+@pytest.fixture
+def database(tmp_path, monkeypatch):
+    """A fresh, migrated database for the test; yields `app.db.database`."""
+    from app.core.config import settings
+    from app.db import database
+
+    monkeypatch.setattr(settings, "DATABASE_URL", f"sqlite:///{tmp_path / 'primary.db'}")
+    reset_app_state()
+    database.create_db_and_tables()
+    yield database
+    reset_app_state()
+
+
+@pytest.fixture
+def client(database):
+    from fastapi.testclient import TestClient
+
+    from main import app
+
+    return TestClient(app)
+
+
+@pytest.fixture
+def make_user(database):
+    """Creates a user; returns it with the Authorization header of a token for it."""
+    from sqlmodel import Session
+
+    from app.core import security
+    from app.models.user_models import User
+
+    def make(full_name: str = "Test User", **fields) -> tuple[User, dict[str, str]]:
+        email = f"user{next(_emails)}@example.test"
+        with Session(database.get_engine()) as db:
+            user = User(full_name=full_name, email=email, hashed_password="x", **fields)
+            db.add(user)
+            db.commit()
+            db.refresh(user)
+        token = security.create_access_token(subject=email, user_id=user.id)
+        return user, {"Authorization": f"Bearer {token}"}
+
+    return make
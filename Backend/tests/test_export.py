@@ -0,0 +1,45 @@
+"""Task exports stream: their peak memory stays flat as the project grows."""
+import asyncio
+import tracemalloc
+
+import pytest
+
+from benchmarks.bench_export import _drive, _seed
+
+# Project sizes exported, and how much larger the peak of the largest may be
+ROWS = [2_000, 20_000]
+MAX_GROWTH = 1.5
+
+
+@pytest.fixture(scope="module")
+def app_and_headers():
+    from app.core import security
+    from main import app
+
+    _seed(ROWS)
+    token = security.create_access_token(subject="owner@bench.test", user_id=1)
+    return app, [(b"authorization", f"Bearer {token}".encode())]
+
+
+@pytest.mark.parametrize("query", ["format=ndjson&gzip=false", "format=csv&gzip=false", "format=ndjson&gzip=true"])
+def test_export_peak_memory_is_flat(app_and_headers, query):
+    app, headers = app_and_headers
+    # Warm up imports, caches and the connection pool outside the measurement
+    asyncio.run(_drive(app, "/api/projects/1/tasks/export", query, headers))
+
+    peaks, sizes = [], []
+    tracemalloc.start()
+    try:
+        for project_id in range(1, len(ROWS) + 1):
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+            status, size = asyncio.run(_drive(app, f"/api/projects/{project_id}/tasks/export", query, headers))
+            assert status == 200
+            peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+            sizes.append(size)
+    finally:
+        tracemalloc.stop()
+
+    # The body grows with the project while the peak must not
+    assert sizes[-1] > sizes[0] * ROWS[-1] / ROWS[0] / 2
+    assert peaks[-1] <= peaks[0] * MAX_GROWTH, f"peak grew {peaks[-1] / peaks[0]:.2f}x from {ROWS[0]} to {ROWS[-1]} rows"
@@ -0,0 +1,68 @@
+"""Group commit: lone writes don't wait for the window, and task writes all run through it."""
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from sqlalchemy import event, func
+from sqlmodel import Session, select
+
+from app.db.unit_of_work import GroupCommitter, commit, group_committer
+from app.models.project_models import ArchivedTask, Task
+
+
+@pytest.fixture
+def committer(database, monkeypatch):
+    """The app's group committer, running with a long window."""
+    monkeypatch.setattr(group_committer, "window", 2.0)
+    group_committer.start(database.get_engine())
+    yield group_committer
+    group_committer.stop()
+
+
+def _write(value: int):
+    def write(db: Session) -> int:
+        db.exec(select(1))
+        commit(db)
+        return value
+    return write
+
+
+def test_a_lone_write_does_not_wait_for_the_window(database):
+    committer = GroupCommitter(window=2.0, max_size=8)
+    committer.start(database.get_engine())
+    try:
+        started = time.monotonic()
+        assert committer.run(_write(1)) == 1
+        assert time.monotonic() - started < 1.0
+    finally:
+        committer.stop()
+
+
+def test_queued_writes_share_a_commit(database):
+    committer = GroupCommitter(window=0.2, max_size=8)
+    commits = []
+    event.listen(database.get_engine(), "commit", lambda connection: commits.append(1))
+    # Queued before the thread starts, so the first write finds the others behind it
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        futures = [pool.submit(committer.run, _write(value)) for value in range(4)]
+        time.sleep(0.1)
+        committer.start(database.get_engine())
+        assert [future.result() for future in futures] == [0, 1, 2, 3]
+    committer.stop()
+    assert len(commits) == 1
+
+
+def test_task_writes_run_through_the_group_committer(client, database, make_user, committer):
+    _, headers = make_user()
+    project_id = client.post("/api/projects/", json={"name": "Grouped", "description": None}, headers=headers).json()["id"]
+    body = {"title": "Task", "description": None, "due_date": None, "assignee_id": None}
+
+    task_id = client.post(f"/api/projects/{project_id}/tasks/", json=body, headers=headers).json()["id"]
+    updated = client.put(f"/api/projects/{project_id}/tasks/{task_id}", json={**body, "status": "Done"}, headers=headers)
+    assert updated.json()["status"] == "Done"
+    assert client.delete(f"/api/projects/{project_id}/tasks/{task_id}", headers=headers).status_code == 204
+    assert client.delete(f"/api/projects/{project_id}/tasks/{task_id}", headers=headers).status_code == 404
+
+    with Session(database.get_engine()) as db:
+        assert db.exec(select(func.count()).select_from(Task)).one() == 0
+        assert db.exec(select(ArchivedTask.deleted).where(ArchivedTask.id == task_id)).one() is True
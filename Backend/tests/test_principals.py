@@ -0,0 +1,25 @@
+"""Cached principals don't outlive a deactivation made through `crud_user`."""
+import pytest
+from sqlmodel import Session
+
+from app.core.principals import principal_cache
+from app.crud import crud_user
+from app.models.user_models import User
+from app.schemas.user_schemas import UserUpdate
+
+
+# A sync endpoint, and an async one authenticating on the async session
+@pytest.mark.parametrize("path", ["/api/users/me", "/api/projects/"])
+def test_deactivated_user_is_refused_on_the_next_request(client, database, make_user, path):
+    user, headers = make_user()
+    assert client.get(path, headers=headers).status_code == 200
+    assert client.get(path, headers=headers).status_code == 200
+    # The second request was served from the cached snapshot
+    assert principal_cache.stats()["size"] == 1
+
+    with Session(database.get_engine()) as db:
+        crud_user.update_user(db, db_user=db.get(User, user.id), user_in=UserUpdate(is_active=False))
+
+    response = client.get(path, headers=headers)
+    assert response.status_code == 403
+    assert response.json()["detail"] == "Inactive user"
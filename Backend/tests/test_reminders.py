@@ -0,0 +1,176 @@
+"""The reminder scheduler, driven by a fake clock through `run_pending`."""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import insert
+from sqlmodel import Session
+
+from app.core.reminders import ReminderScheduler
+from app.crud import crud_task
+from app.models.project_models import Task, TaskStatus
+
+START = datetime(2030, 1, 1, 9, 0)
+
+
+class FakeClock:
+    def __init__(self, now: datetime):
+        self.now = now
+
+    def __call__(self) -> datetime:
+        return self.now
+
+    def advance(self, **delta) -> None:
+        self.now += timedelta(**delta)
+
+
+@pytest.fixture
+def clock():
+    return FakeClock(START)
+
+
+@pytest.fixture
+def sent():
+    """The (task_id, minutes_before_due) of the reminders emitted, in order."""
+    return []
+
+
+@pytest.fixture
+def scheduler(database, clock, sent, monkeypatch):
+    scheduler = ReminderScheduler(
+        leads=[timedelta(minutes=60), timedelta(0)],
+        horizon=timedelta(hours=24),
+        max_pending=1000,
+        refresh=timedelta(days=1),
+        clock=clock,
+        emit=lambda project_id, kind, data: sent.append((data["id"], data["minutes_before_due"])),
+    )
+    # The CRUD helpers track the tasks they write on this scheduler
+    monkeypatch.setattr(crud_task, "reminder_scheduler", scheduler)
+    return scheduler
+
+
+@pytest.fixture
+def project(client, make_user):
+    _, headers = make_user()
+    project = client.post("/api/projects/", json={"name": "Reminders", "description": None}, headers=headers).json()
+    return project["id"], headers
+
+
+def _create(client, project, due: timedelta | None) -> int:
+    project_id, headers = project
+    response = client.post(f"/api/projects/{project_id}/tasks/", json={
+        "title": "Task", "description": None, "assignee_id": None,
+        "due_date": None if due is None else (START + due).isoformat(),
+    }, headers=headers)
+    assert response.status_code == 201
+    return response.json()["id"]
+
+
+def _update(client, project, task_id: int, due: timedelta | None, status: TaskStatus = TaskStatus.TO_DO) -> None:
+    project_id, headers = project
+    response = client.put(f"/api/projects/{project_id}/tasks/{task_id}", json={
+        "title": "Task", "description": None, "assignee_id": None, "status": status.value,
+        "due_date": None if due is None else (START + due).isoformat(),
+    }, headers=headers)
+    assert response.status_code == 200
+
+
+def _run(scheduler, database) -> int:
+    with Session(database.get_engine()) as db:
+        return scheduler.run_pending(db)
+
+
+def test_reminders_are_sent_in_time_order(client, database, project, scheduler, clock, sent):
+    late = _create(client, project, timedelta(hours=3, minutes=30))
+    early = _create(client, project, timedelta(hours=1, minutes=30))
+    middle = _create(client, project, timedelta(hours=2))
+    _create(client, project, None)
+    _run(scheduler, database)
+    assert scheduler.pending() == 6
+
+    clock.advance(minutes=45)
+    assert _run(scheduler, database) == 1
+    assert sent == [(early, 60)]
+
+    clock.advance(hours=4)
+    assert _run(scheduler, database) == 5
+    assert sent == [(early, 60), (middle, 60), (early, 0), (middle, 0), (late, 60), (late, 0)]
+    assert scheduler.pending() == 0
+
+
+def test_created_and_updated_tasks_are_tracked(client, database, project, scheduler, clock, sent):
+    _run(scheduler, database)
+    moved = _create(client, project, timedelta(hours=2))
+    cleared = _create(client, project, timedelta(hours=2))
+    done = _create(client, project, timedelta(hours=2))
+    assert scheduler.pending() == 6
+
+    _update(client, project, moved, timedelta(hours=5))
+    _update(client, project, cleared, None)
+    _update(client, project, done, timedelta(hours=2), status=TaskStatus.DONE)
+
+    clock.advance(hours=3)
+    assert _run(scheduler, database) == 0
+    clock.advance(hours=2)
+    assert _run(scheduler, database) == 2
+    assert sent == [(moved, 60), (moved, 0)]
+
+
+def test_the_next_horizon_is_loaded_when_the_clock_reaches_it(client, database, project, scheduler, clock, sent):
+    scheduler.horizon = timedelta(hours=2)
+    task_id = _create(client, project, timedelta(hours=3))
+    _run(scheduler, database)
+    # Only the reminder an hour before falls within the first two hours
+    assert scheduler.pending() == 1
+
+    clock.advance(hours=2, minutes=30)
+    assert _run(scheduler, database) == 1
+    assert scheduler.pending() == 1
+
+    clock.advance(minutes=30)
+    assert _run(scheduler, database) == 1
+    assert sent == [(task_id, 60), (task_id, 0)]
+
+
+def test_the_horizon_is_cut_short_at_max_pending(client, database, project, scheduler, clock, sent):
+    scheduler.leads = [timedelta(0)]
+    scheduler.max_pending = 2
+    first, second, third = (_create(client, project, timedelta(hours=hours)) for hours in (1, 2, 3))
+    _run(scheduler, database)
+    assert scheduler.pending() == 2
+
+    # A tracked task beyond the cut isn't held either
+    fourth = _create(client, project, timedelta(hours=2, minutes=30))
+    assert scheduler.pending() == 2
+
+    clock.advance(hours=2)
+    assert _run(scheduler, database) == 2
+    clock.advance(hours=1)
+    assert _run(scheduler, database) == 2
+    assert sent == [(first, 0), (second, 0), (fourth, 0), (third, 0)]
+
+
+def test_due_dates_set_by_other_processes_are_found_on_refresh(client, database, project, scheduler, clock, sent):
+    scheduler.leads = [timedelta(0)]
+    scheduler.refresh = timedelta(minutes=10)
+    tracked = _create(client, project, timedelta(minutes=3))
+    _run(scheduler, database)
+
+    # Written without tracking, as another worker would
+    with Session(database.get_engine()) as db:
+        untracked = db.execute(insert(Task).returning(Task.id), {
+            "title": "Elsewhere", "status": TaskStatus.TO_DO, "project_id": project[0],
+            "due_date": START + timedelta(minutes=5), "created_at": START,
+        }).scalar_one()
+        db.commit()
+
+    clock.advance(minutes=6)
+    assert _run(scheduler, database) == 1
+    assert sent == [(tracked, 0)]
+
+    # Found late by the refresh; what was sent already isn't sent again
+    clock.advance(minutes=4)
+    assert _run(scheduler, database) == 1
+    clock.advance(minutes=10)
+    assert _run(scheduler, database) == 0
+    assert sent == [(tracked, 0), (untracked, 0)]
@@ -0,0 +1,126 @@
+"""Reads are spread over the replicas, writes and a recent writer's reads go to the primary."""
+import shutil
+
+import pytest
+from sqlalchemy import func, select
+from starlette.requests import Request
+
+from app.models.project_models import Task
+
+
+@pytest.fixture
+def project(client, make_user):
+    """An owner and their project with one task, created before the replicas are copied from the primary."""
+    _, headers = make_user()
+    project = client.post("/api/projects/", json={"name": "Replicated", "description": None}, headers=headers).json()
+    client.post(f"/api/projects/{project['id']}/tasks/", json=_task("Replicated task"), headers=headers)
+    return project["id"], headers
+
+
+def _task(title: str) -> dict:
+    return {"title": title, "description": None, "due_date": None, "assignee_id": None}
+
+
+def _use_replicas(database, monkeypatch, urls: list[str]):
+    monkeypatch.setattr(database.settings, "DATABASE_REPLICA_URLS", urls)
+    database.get_replicas.cache_clear()
+    # The replicas start out caught up, so the fixture's writes don't pin anyone
+    database.recent_writers.clear()
+    return database.get_replicas()
+
+
+def _copy_primary(database, tmp_path, count: int) -> list[str]:
+    primary = database.get_engine().url.database
+    urls = []
+    for i in range(count):
+        shutil.copyfile(primary, tmp_path / f"replica{i}.db")
+        urls.append(f"sqlite:///{tmp_path / f'replica{i}.db'}")
+    return urls
+
+
+def _read_bind(database, headers: dict[str, str] | None = None):
+    """The engine `get_read_session` hands a request with `headers` a session on."""
+    request = Request({
+        "type": "http", "method": "GET", "path": "/", "query_string": b"", "path_params": {},
+        "headers": [(name.lower().encode(), value.encode()) for name, value in (headers or {}).items()],
+    })
+    sessions = database.get_read_session(request)
+    session = next(sessions)
+    try:
+        return session.get_bind()
+    finally:
+        sessions.close()
+
+
+def _task_count(engine) -> int:
+    with engine.connect() as connection:
+        return connection.execute(select(func.count()).select_from(Task)).scalar_one()
+
+
+def test_reads_round_robin_over_the_replicas(database, project, tmp_path, monkeypatch):
+    replicas = _use_replicas(database, monkeypatch, _copy_primary(database, tmp_path, 2))
+
+    binds = [_read_bind(database) for _ in range(4)]
+
+    assert binds == [replicas.engines[0], replicas.engines[1], replicas.engines[0], replicas.engines[1]]
+
+
+def test_a_dead_replica_is_marked_down_and_skipped(database, project, tmp_path, monkeypatch):
+    # SQLite can't open a file in a directory that doesn't exist
+    dead = f"sqlite:///{tmp_path / 'missing' / 'replica.db'}"
+    replicas = _use_replicas(database, monkeypatch, [dead, *_copy_primary(database, tmp_path, 1)])
+
+    assert [_read_bind(database) for _ in range(3)] == [replicas.engines[1]] * 3
+    assert replicas.candidates() == [replicas.engines[1]]
+
+
+def test_reads_fall_back_to_the_primary_when_every_replica_is_down(database, project, tmp_path, monkeypatch):
+    dead = [f"sqlite:///{tmp_path / 'missing' / f'replica{i}.db'}" for i in range(2)]
+    replicas = _use_replicas(database, monkeypatch, dead)
+
+    assert _read_bind(database) is database.get_engine()
+    assert replicas.candidates() == []
+    assert _read_bind(database) is database.get_engine()
+
+
+def test_writes_go_to_the_primary(client, database, project, tmp_path, monkeypatch):
+    project_id, headers = project
+    replicas = _use_replicas(database, monkeypatch, _copy_primary(database, tmp_path, 2))
+
+    response = client.post(f"/api/projects/{project_id}/tasks/", json=_task("Written"), headers=headers)
+
+    assert response.status_code == 201
+    assert _task_count(database.get_engine()) == 2
+    assert [_task_count(engine) for engine in replicas.engines] == [1, 1]
+
+
+def test_a_recent_writer_reads_from_the_primary(client, database, project, tmp_path, monkeypatch, make_user):
+    project_id, headers = project
+    _use_replicas(database, monkeypatch, _copy_primary(database, tmp_path, 2))
+    _, other_headers = make_user()
+
+    def titles(request_headers) -> list[str]:
+        response = client.get(f"/api/projects/{project_id}/tasks/", headers=request_headers)
+        assert response.status_code == 200
+        return [task["title"] for task in response.json()]
+
+    assert client.post(f"/api/projects/{project_id}/tasks/", json=_task("Fresh"), headers=headers).status_code == 201
+    assert _read_bind(database, headers) is database.get_engine()
+    assert _read_bind(database, other_headers) is not database.get_engine()
+    # Within the window the writer sees its own write, though the replicas lack it
+    assert titles(headers) == ["Replicated task", "Fresh"]
+    assert titles(headers) == ["Replicated task", "Fresh"]
+
+    # Once the window has passed, its reads go back to the replicas
+    database.recent_writers.clear()
+    assert titles(headers) == ["Replicated task"]
+
+
+def test_failed_writes_do_not_pin_the_client(client, database, project, tmp_path, monkeypatch):
+    project_id, headers = project
+    _use_replicas(database, monkeypatch, _copy_primary(database, tmp_path, 1))
+
+    response = client.post(f"/api/projects/{project_id}/tasks/", json={"description": None}, headers=headers)
+
+    assert response.status_code == 422
+    assert _read_bind(database, headers) is not database.get_engine()
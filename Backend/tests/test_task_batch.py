@@ -0,0 +1,49 @@
+"""Batch task updates change only the fields each item sends."""
+
+
+def _project_with_task(client, headers) -> tuple[int, dict]:
+    project = client.post("/api/projects/", json={"name": "Batch", "description": None}, headers=headers).json()
+    task = client.post(
+        f"/api/projects/{project['id']}/tasks/",
+        json={"title": "Write report", "description": "Quarterly", "due_date": "2030-01-02T09:00:00", "assignee_id": None},
+        headers=headers,
+    ).json()
+    return project["id"], task
+
+
+def test_partial_items_keep_the_fields_they_omit(client, make_user):
+    _, headers = make_user()
+    project_id, task = _project_with_task(client, headers)
+
+    response = client.patch(
+        f"/api/projects/{project_id}/tasks:batch",
+        json={"tasks": [{"id": task["id"], "title": "Write the report", "status": "In Progress"}]},
+        headers=headers,
+    )
+
+    assert response.status_code == 200
+    [result] = response.json()
+    assert result["ok"]
+    assert result["task"]["title"] == "Write the report"
+    assert result["task"]["status"] == "In Progress"
+    assert result["task"]["description"] == "Quarterly"
+    assert result["task"]["due_date"] == "2030-01-02T09:00:00"
+
+
+def test_items_can_clear_optional_fields_but_not_title_or_status(client, make_user):
+    _, headers = make_user()
+    project_id, task = _project_with_task(client, headers)
+
+    cleared = client.patch(
+        f"/api/projects/{project_id}/tasks:batch",
+        json={"tasks": [{"id": task["id"], "due_date": None}]},
+        headers=headers,
+    )
+    assert cleared.status_code == 200
+    assert cleared.json()[0]["task"]["due_date"] is None
+
+    for field in ("title", "status"):
+        response = client.patch(
+            f"/api/projects/{project_id}/tasks:batch", json={"tasks": [{"id": task["id"], field: None}]}, headers=headers
+        )
+        assert response.status_code == 422
@@ -0,0 +1,73 @@
+"""The user search index: ranking, syncing other workers' changes, and truncated pages."""
+from sqlalchemy import delete, update
+from sqlmodel import Session, select
+
+from app.core.user_search import UserSearchIndex, user_search_index
+from app.models.user_models import User
+
+
+def _load(index: UserSearchIndex, database) -> None:
+    with Session(database.get_engine()) as db:
+        index.load(db.exec(select(User.id, User.email, User.full_name)).all())
+
+
+def _search(index: UserSearchIndex, query: str, **page) -> list[int]:
+    user_ids, _ = index.search(query, **page)
+    return user_ids
+
+
+def test_word_matches_rank_alphabetically_by_word():
+    index = UserSearchIndex()
+    index.load([(1, "x1@example.test", "Andrew Smith"), (2, "x2@example.test", "Ann Lee"), (3, "x3@example.test", "An Li")])
+
+    assert _search(index, "an") == [3, 1, 2]
+    assert _search(index, "ann") == [2]
+
+
+def test_sync_picks_up_users_changed_by_other_workers(database, make_user):
+    index = UserSearchIndex(sync_interval=0)
+    renamed, _ = make_user("Alice Walker")
+    deleted, _ = make_user("Alina Stone")
+    _load(index, database)
+    assert sorted(_search(index, "ali")) == sorted([renamed.id, deleted.id])
+
+    # Written without going through the index, as another worker would
+    created, _ = make_user("Alison Park")
+    with Session(database.get_engine()) as db:
+        db.execute(update(User).where(User.id == renamed.id).values(full_name="Beatrice Walker"))
+        db.commit()
+        index.sync(db)
+
+    assert sorted(_search(index, "ali")) == sorted([deleted.id, created.id])
+    assert _search(index, "beatrice") == [renamed.id]
+
+
+def test_search_drops_deleted_users(client, database, make_user):
+    kept, headers = make_user("Carla Diaz")
+    deleted, _ = make_user("Carlos Ruiz")
+    _load(user_search_index, database)
+    with Session(database.get_engine()) as db:
+        db.execute(delete(User).where(User.id == deleted.id))
+        db.commit()
+
+    response = client.get("/api/users/", params={"q": "carl"}, headers=headers)
+
+    assert [user["id"] for user in response.json()] == [kept.id]
+    assert _search(user_search_index, "carl") == [kept.id]
+
+
+def test_pages_cut_short_by_the_scan_limit_are_flagged(client, database, make_user, monkeypatch):
+    for _ in range(4):
+        _, headers = make_user("Dana Fox")
+    _load(user_search_index, database)
+
+    full = client.get("/api/users/", params={"q": "dana"}, headers=headers)
+    assert len(full.json()) == 4
+    assert "X-Search-Truncated" not in full.headers
+
+    monkeypatch.setattr(user_search_index, "max_scan", 2)
+    cut = client.get("/api/users/", params={"q": "dana"}, headers=headers)
+    assert len(cut.json()) == 2
+    assert cut.headers["X-Search-Truncated"] == "true"
+    # A page the scan filled isn't flagged
+    assert "X-Search-Truncated" not in client.get("/api/users/", params={"q": "dana", "limit": 2}, headers=headers).headers